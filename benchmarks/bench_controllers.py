@@ -0,0 +1,97 @@
+"""
+Staircase vs. Bayesian controller: convergence in simulated sessions and per-update cost.
+
+Runs ``--seeds`` headless sessions of the sampler sim config (``MidSamplerResponder``)
+with each controller type and reports, per type, the mean trials-to-convergence,
+final-third accuracy error and duration variance (``src.sweep.condition_metrics``),
+plus the cost of one ``get_duration`` + ``update`` pair.
+
+Usage::
+
+    python benchmarks/bench_controllers.py [--seeds 20] [--trials 180] [--updates 100000]
+    python benchmarks/bench_controllers.py --bayesian step=0.005 slope=0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+TASK_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TASK_ROOT))
+
+from psyflow import load_config  # noqa: E402
+
+from src.headless import run_headless  # noqa: E402
+from src.sweep import condition_metrics  # noqa: E402
+from src.utils import build_controller  # noqa: E402
+
+
+def _parse_overrides(items: List[str]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for item in items:
+        name, value = item.split("=", 1)
+        out[name] = float(value) if "." in value or "e" in value else int(value)
+    return out
+
+
+def session_metrics(cfg: Dict[str, Any], controller_cfg: Dict[str, Any], seed: int, tolerance: float) -> List[Dict[str, Any]]:
+    result = run_headless({**cfg, "controller_config": controller_cfg}, seed=seed, write_outputs=False)
+    table = result.trials
+    codes = table.column("condition")
+    durations = table.column("target_duration")
+    hits = table.column("feedback_hit").astype(float)
+    target = controller_cfg.get("target_accuracy", 0.66)
+    return [
+        condition_metrics(durations[codes == code], hits[codes == code], target, tolerance)
+        for code in range(len(table.categories["condition"]))
+    ]
+
+
+def update_cost(controller_cfg: Dict[str, Any], n: int) -> float:
+    outcomes = [(random.Random(i).random() < 0.66, ("win", "lose", "neut")[i % 3]) for i in range(n)]
+    controller = build_controller(controller_cfg)
+    t0 = time.perf_counter()
+    for hit, cond in outcomes:
+        controller.get_duration(cond)
+        controller.update(hit, cond)
+    return (time.perf_counter() - t0) / n
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default=str(TASK_ROOT / "config/config_sampler_sim.yaml"))
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--trials", type=int, default=180, help="Trials per session (3 blocks).")
+    parser.add_argument("--updates", type=int, default=100_000)
+    parser.add_argument("--tolerance", type=float, default=0.03, help="Convergence band in seconds (same for both types).")
+    parser.add_argument("--bayesian", nargs="*", default=[], help="name=value overrides for the Bayesian controller.")
+    args = parser.parse_args(argv)
+
+    cfg = load_config(args.config)
+    blocks = 3
+    cfg["task_config"] = {**cfg["task_config"], "total_blocks": blocks, "total_trials": args.trials, "trial_per_block": args.trials // blocks}
+    base = {**cfg["controller_config"], "enable_logging": False}
+    bayes = {k: v for k, v in base.items() if k in ("initial_duration", "min_duration", "max_duration", "target_accuracy", "condition_specific", "enable_logging")}
+    variants = {
+        "staircase": {**base, "type": "staircase"},
+        "bayesian": {**bayes, "type": "bayesian", "step": 0.01, **_parse_overrides(args.bayesian)},
+    }
+
+    print(f"{'controller':<12}{'converge (trials)':>19}{'acc error':>11}{'dur var':>11}{'update':>12}")
+    for name, controller_cfg in variants.items():
+        rows = [m for seed in range(args.seeds) for m in session_metrics(cfg, controller_cfg, seed, args.tolerance)]
+        converge = statistics.mean(r["trials_to_converge"] for r in rows)
+        error = statistics.mean(abs(r["accuracy_error"]) for r in rows)
+        var = statistics.mean(r["duration_var"] for r in rows)
+        cost = update_cost(controller_cfg, args.updates)
+        print(f"{name:<12}{converge:19.1f}{error:11.3f}{var:11.5f}{cost * 1e6:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Per-decision cost of ``MidSamplerResponder.act``: scalar vs. batch (NumPy pool) mode.
+
+Usage::
+
+    python benchmarks/bench_mid_sampler.py [--decisions 200000] [--batch-size 4096] [--repeats 5]
+    python benchmarks/bench_mid_sampler.py --save benchmarks/mid_sampler_result.json
+
+Each timing includes ``start_session`` (where batch mode precomputes its first
+decks) and is the best of ``--repeats`` sessions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from psyflow.sim.contracts import Observation  # noqa: E402
+
+from responders.mid_sampler import MidSamplerResponder  # noqa: E402
+
+
+def _observations(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    obs = []
+    for i in range(n):
+        cond = rng.choice(("win", "lose", "neut"))
+        phase = "anticipation_fixation" if i % 2 == 0 else "target_response_window"
+        obs.append(Observation.from_dict({
+            "trial_id": i // 2,
+            "phase": phase,
+            "deadline_s": 1.1 if phase == "anticipation_fixation" else 0.25,
+            "valid_keys": ["space"],
+            "condition_id": cond,
+            "task_factors": {"condition": cond, "stage": phase},
+        }))
+    return obs
+
+
+def time_decisions(responder: MidSamplerResponder, obs: list, seed: int = 0, repeats: int = 1) -> float:
+    """Return seconds per ``act`` call over ``obs``, session setup included; best of ``repeats``."""
+    best = math.inf
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        responder.start_session(None, random.Random(seed))
+        act = responder.act
+        for o in obs:
+            act(o)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(obs)
+
+
+def hit_rates(responder: MidSamplerResponder, obs: list, seed: int = 0) -> dict:
+    responder.start_session(None, random.Random(seed))
+    hits: dict = {}
+    for o in obs:
+        if o.phase != "target_response_window":
+            continue
+        action = responder.act(o)
+        n, h = hits.get(o.condition_id, (0, 0))
+        hits[o.condition_id] = (n + 1, h + (action.key is not None))
+    return {cond: h / n for cond, (n, h) in sorted(hits.items())}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--decisions", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--save", default=None, help="Also write the result as JSON to this path.")
+    args = parser.parse_args(argv)
+
+    obs = _observations(args.decisions)
+    scalar = time_decisions(MidSamplerResponder(), obs, repeats=args.repeats)
+    batch = time_decisions(MidSamplerResponder(batch_size=args.batch_size), obs, repeats=args.repeats)
+    rates = {
+        "scalar": hit_rates(MidSamplerResponder(), obs),
+        "batch": hit_rates(MidSamplerResponder(batch_size=args.batch_size), obs),
+    }
+    print(f"scalar : {scalar * 1e9:8.0f} ns/decision")
+    print(f"batch  : {batch * 1e9:8.0f} ns/decision  ({scalar / batch:.2f}x)")
+    print(f"hit rates scalar: {rates['scalar']}")
+    print(f"hit rates batch : {rates['batch']}")
+    if args.save:
+        result = {
+            "decisions": args.decisions,
+            "batch_size": args.batch_size,
+            "repeats": args.repeats,
+            "python": platform.python_version(),
+            "ns_per_decision": {"scalar": round(scalar * 1e9), "batch": round(batch * 1e9)},
+            "speedup": round(scalar / batch, 2),
+            "hit_rates": rates,
+        }
+        Path(args.save).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        print(f"saved {args.save}")
+
+
+if __name__ == "__main__":
+    main()
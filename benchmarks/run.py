@@ -0,0 +1,253 @@
+"""
+Benchmark suite for the MID task's hot paths.
+
+Cases (median of ``--repeat`` runs, seconds per operation):
+
+- ``controller_update`` / ``controller_update_bayesian``: ``update`` + ``get_duration`` over a long
+  session for the staircase and the grid-Bayesian controller.
+- ``sampler_act`` / ``sampler_act_batch``: ``MidSamplerResponder.act`` throughput.
+- ``run_trial_scripted`` / ``run_trial_sampler``: end-to-end headless ``run_trial``
+  (per trial) with the scripted and sampler sim configs.
+- ``startup_<mode>``: ``python main.py <mode>`` wall time up to the first screen (imports, config
+  load, window, triggers, stimulus preload, first instruction flip), via ``benchmarks/startup_probe.py``.
+- ``result_serialization``: streaming trial journal + final CSV for a 180-trial table.
+- ``trial_table``: appending 180 trial dicts to a columnar ``TrialTable`` and wrapping it as a DataFrame.
+- ``config_load_yaml`` / ``config_load_cached``: ``psyflow.load_config`` vs. a ``load_compiled_config``
+  hit on the on-disk cache (fresh process state) for ``config/config.yaml``.
+
+Usage::
+
+    python benchmarks/run.py                    # compare against benchmarks/baseline.json (records missing cases)
+    python benchmarks/run.py --save-baseline    # record new baseline numbers
+    python benchmarks/run.py --only controller --fail-threshold 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+TASK_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TASK_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _measure(fn: Callable[[], int], repeat: int) -> float:
+    """Median seconds per operation; ``fn`` runs once and returns its op count."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n_ops = fn()
+        samples.append((time.perf_counter() - t0) / max(1, n_ops))
+    return statistics.median(samples)
+
+
+def bench_controller_update(n: int = 100_000, kind: str = "staircase") -> Callable[[], int]:
+    from src.utils import build_controller
+
+    outcomes = [(random.Random(i).random() < 0.66, ("win", "lose", "neut")[i % 3]) for i in range(n)]
+
+    def run() -> int:
+        controller = build_controller({"type": kind, "enable_logging": False})
+        for hit, cond in outcomes:
+            controller.get_duration(cond)
+            controller.update(hit, cond)
+        return n
+
+    return run
+
+
+def bench_sampler_act(batch_size: int = 0, n: int = 100_000) -> Callable[[], int]:
+    from bench_mid_sampler import _observations, time_decisions
+
+    from responders.mid_sampler import MidSamplerResponder
+
+    obs = _observations(n)
+
+    def run() -> int:
+        time_decisions(MidSamplerResponder(batch_size=batch_size), obs)
+        return n
+
+    return run
+
+
+def bench_run_trial(config: str) -> Callable[[], int]:
+    from psyflow import load_config
+
+    from src.headless import run_headless
+
+    cfg = load_config(str(TASK_ROOT / config))
+    tmp = tempfile.mkdtemp(prefix="mid_bench_")
+
+    def run() -> int:
+        result = run_headless(cfg, seed=0, output_dir=tmp, write_outputs=False)
+        return len(result.trials)
+
+    return run
+
+
+def bench_startup(mode: str) -> Callable[[], int]:
+    def run() -> int:
+        subprocess.run(
+            [sys.executable, str(Path(__file__).resolve().parent / "startup_probe.py"), mode],
+            cwd=TASK_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        return 1
+
+    return run
+
+
+def bench_result_serialization(n_trials: int = 180) -> Callable[[], int]:
+    from psyflow import load_config
+
+    from src.headless import run_headless
+    from src.results import TrialResultWriter
+
+    cfg = load_config(str(TASK_ROOT / "config/config_sampler_sim.yaml"))
+    rows: List[dict] = []
+    while len(rows) < n_trials:
+        rows.extend(run_headless(cfg, seed=len(rows), write_outputs=False).trials)
+    rows = rows[:n_trials]
+    tmp = Path(tempfile.mkdtemp(prefix="mid_bench_"))
+
+    def run() -> int:
+        with TrialResultWriter(str(tmp / "bench.csv")) as writer:
+            for row in rows:
+                writer.write(row)
+        return 1
+
+    return run
+
+
+def bench_trial_table(n_trials: int = 180) -> Callable[[], int]:
+    from psyflow import load_config
+
+    from src.headless import run_headless
+    from src.records import TrialTable
+
+    cfg = load_config(str(TASK_ROOT / "config/config_sampler_sim.yaml"))
+    rows: List[dict] = []
+    while len(rows) < n_trials:
+        rows.extend(run_headless(cfg, seed=len(rows), write_outputs=False).trials)
+    rows = rows[:n_trials]
+
+    def run() -> int:
+        TrialTable(n_trials).extend(rows).to_dataframe()
+        return 1
+
+    return run
+
+
+def bench_config_load(cached: bool, n: int = 20) -> Callable[[], int]:
+    from psyflow import load_config
+
+    from src import config_cache
+
+    path = str(TASK_ROOT / "config/config.yaml")
+    cache_dir = tempfile.mkdtemp(prefix="mid_bench_config_")
+    config_cache.load_compiled_config(path, cache_dir)
+
+    def run() -> int:
+        for _ in range(n):
+            if cached:
+                config_cache._BLOBS.clear()
+                config_cache.load_compiled_config(path, cache_dir)
+            else:
+                load_config(path)
+        return n
+
+    return run
+
+
+CASES: Dict[str, Tuple[Callable[[], Callable[[], int]], int]] = {
+    "controller_update": (bench_controller_update, 5),
+    "controller_update_bayesian": (lambda: bench_controller_update(20_000, "bayesian"), 5),
+    "sampler_act": (lambda: bench_sampler_act(0), 5),
+    "sampler_act_batch": (lambda: bench_sampler_act(4096), 5),
+    "run_trial_scripted": (lambda: bench_run_trial("config/config_scripted_sim.yaml"), 5),
+    "run_trial_sampler": (lambda: bench_run_trial("config/config_sampler_sim.yaml"), 5),
+    "startup_human": (lambda: bench_startup("human"), 3),
+    "startup_qa": (lambda: bench_startup("qa"), 3),
+    "startup_sim": (lambda: bench_startup("sim"), 3),
+    "result_serialization": (bench_result_serialization, 5),
+    "trial_table": (bench_trial_table, 5),
+    "config_load_yaml": (lambda: bench_config_load(False), 5),
+    "config_load_cached": (lambda: bench_config_load(True), 5),
+}
+
+
+def _environment() -> Dict[str, str]:
+    try:
+        from importlib.metadata import version
+
+        psyflow_version = version("psyflow")
+    except Exception:
+        psyflow_version = "unknown"
+    return {"python": platform.python_version(), "platform": platform.platform(), "psyflow": psyflow_version}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="MID hot-path benchmark suite.")
+    parser.add_argument("--only", default=None, help="Run cases whose name contains this substring.")
+    parser.add_argument("--repeat", type=int, default=None, help="Override repeat count for every case.")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write results to {BASELINE.name}.")
+    parser.add_argument("--baseline", default=str(BASELINE), help="Baseline JSON to compare against.")
+    parser.add_argument("--fail-threshold", type=float, default=None, help="Exit 1 if any case is slower by more than this %%.")
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, float] = {}
+    if Path(args.baseline).is_file():
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")).get("results", {})
+
+    results: Dict[str, float] = {}
+    regressions = []
+    print(f"{'case':<24}{'per op':>14}{'baseline':>14}{'delta':>10}")
+    for name, (factory, repeat) in CASES.items():
+        if args.only and args.only not in name:
+            continue
+        seconds = _measure(factory(), args.repeat or repeat)
+        results[name] = seconds
+        base = baseline.get(name)
+        delta = (seconds - base) / base * 100 if base else None
+        if delta is not None and args.fail_threshold is not None and delta > args.fail_threshold:
+            regressions.append(name)
+        base_txt = f"{base * 1e6:11.2f} us" if base else f"{'-':>14}"
+        delta_txt = f"{delta:+9.1f}%" if delta is not None else f"{'-':>10}"
+        print(f"{name:<24}{seconds * 1e6:11.2f} us{base_txt}{delta_txt}")
+
+    missing = {name: seconds for name, seconds in results.items() if name not in baseline}
+    if args.save_baseline:
+        merged = {**baseline, **results}
+    elif missing and not args.only:
+        print(f"[bench] no baseline for {', '.join(missing)} in {args.baseline}; recording this run")
+        merged = {**baseline, **missing}
+    else:
+        merged = None
+    if merged is not None:
+        Path(args.baseline).write_text(
+            json.dumps({"environment": _environment(), "results": merged}, indent=2) + "\n", encoding="utf-8"
+        )
+        print(f"[bench] baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"[bench] regressions over {args.fail_threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
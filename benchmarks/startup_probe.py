@@ -0,0 +1,72 @@
+"""
+Run ``main.py <mode>`` up to the first screen, then exit (the ``startup_<mode>`` benchmark cases).
+
+The real ``main.main()`` runs unchanged; only psyflow entry points that would block or
+persist are patched before it starts:
+
+- ``SubInfo.collect`` returns a fixed subject (no participant form in human mode).
+- ``TaskSettings.save_to_json`` is a no-op (no settings JSON per probe run).
+- ``StimUnit.wait_and_continue`` draws the first instruction frame once and stops the run.
+
+Everything before that point — imports, config load, window, triggers, stimulus preload, the
+first flip — is what gets timed. Headless sim configs return before any screen and just finish.
+Needs a display for the windowed modes. Spawned in a fresh interpreter by
+``benchmarks/run.py`` so imports are cold.
+
+Usage::
+
+    python benchmarks/startup_probe.py human
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+TASK_ROOT = Path(__file__).resolve().parents[1]
+
+
+class FirstScreen(Exception):
+    """Raised once the first instruction frame has been flipped."""
+
+
+def _patch_psyflow() -> None:
+    import psyflow
+
+    class ProbeSubInfo:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def collect(self):
+            return {"subject_id": "999"}
+
+    def first_screen(unit, *args, **kwargs):
+        unit.show(duration=0)
+        raise FirstScreen
+
+    psyflow.SubInfo = ProbeSubInfo
+    psyflow.TaskSettings.save_to_json = lambda self, *args, **kwargs: None
+    psyflow.StimUnit.wait_and_continue = first_screen
+
+
+def main(argv=None) -> int:
+    mode = (argv if argv is not None else sys.argv[1:])[0]
+    os.chdir(TASK_ROOT)
+    sys.path.insert(0, str(TASK_ROOT))
+    sys.argv = ["main.py", mode]
+    _patch_psyflow()
+
+    import main as task_main
+
+    try:
+        task_main.main()
+    except FirstScreen:
+        print(f"[bench] startup probe: first screen shown (mode={mode})", flush=True)
+        # Skip PsychoPy/trigger teardown; only the time to the first screen is measured.
+        os._exit(0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
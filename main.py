@@ -1,27 +1,14 @@
 from contextlib import nullcontext
 from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
-from psychopy import core
+if TYPE_CHECKING:
+    from psyflow import TaskRunOptions
 
-from psyflow import (
-    BlockUnit,
-    StimBank,
-    StimUnit,
-    SubInfo,
-    TaskRunOptions,
-    TaskSettings,
-    context_from_config,
-    count_down,
-    initialize_exp,
-    initialize_triggers,
-    load_config,
-    parse_task_run_options,
-    runtime_context,
-)
-
-from src import Controller, run_trial
+# Heavy modules (psychopy, the full psyflow surface, pandas) are imported inside
+# run() for the path that needs them, so --help, headless sims and batch tools
+# only pay for what they use. Profile with: python -m src.import_profile
 
 
 MODES = ("human", "qa", "sim")
@@ -32,12 +19,62 @@ DEFAULT_CONFIG_BY_MODE = {
 }
 
 
-def run(options: TaskRunOptions):
+def run(options: "TaskRunOptions"):
     """Run MID task in human/qa/sim mode with one auditable flow."""
+    from src.config_cache import load_compiled_config
+
     task_root = Path(__file__).resolve().parent
-    cfg = load_config(str(options.config_path))
+    cfg = load_compiled_config(options.config_path, task_root / "outputs" / "config_cache")
     print(f"[MID] mode={options.mode} config={options.config_path}")
 
+    if options.mode == "sim" and (cfg["raw"].get("sim") or {}).get("backend") == "headless":
+        from src.headless import run_headless
+
+        result = run_headless(cfg, task_root=task_root)
+        print(
+            f"[MID] headless sim: {len(result.trials)} trials, "
+            f"virtual {result.virtual_duration_s:.1f}s in {result.wall_duration_s * 1000:.0f} ms -> {result.res_file}"
+        )
+        return
+
+    spot_check = 0
+    qa_cfg = cfg["raw"].get("qa") or {}
+    if options.mode == "qa" and qa_cfg.get("backend") == "headless":
+        from src.qa import print_report, run_qa_headless
+
+        report = run_qa_headless(cfg, task_root=task_root)
+        print_report(report)
+        if not report["passed"] and qa_cfg.get("strict", False):
+            raise SystemExit(1)
+        spot_check = int(qa_cfg.get("spot_check_trials", 0) or 0)
+        if not spot_check:
+            return
+        print(f"[MID] real-time spot check of the first {spot_check} trials")
+
+    from psychopy import core
+    from psyflow import (
+        BlockUnit,
+        StimBank,
+        StimUnit,
+        SubInfo,
+        TaskSettings,
+        context_from_config,
+        count_down,
+        initialize_exp,
+        initialize_triggers,
+        runtime_context,
+    )
+
+    from src import build_controller, run_trial
+    from src.checkpoint import setup_checkpoint
+    from src.results import TrialResultWriter, streaming_trial
+    from src.schedule import load_or_compile
+    from src.stats import SessionStats
+    from src.stim_loading import preload_stimuli
+    from src.timing_probe import TimingProbe
+    from src.trigger_dispatch import AsyncTriggerRuntime, wrap_dispatch
+    from src.voice_cache import VoiceCache, register_cached_voice
+
     output_dir: Path | None = None
     runtime_scope = nullcontext()
     runtime_ctx = None
@@ -70,87 +107,152 @@ def run(options: TaskRunOptions):
             settings.json_file = str(output_dir / "qa_settings.json")
 
         settings.triggers = cfg["trigger_config"]
+        plan = None
+        # Opt-in for human runs: precompiled jitter is seeded, so under same_across_sub every
+        # participant gets identical durations instead of StimUnit's per-run random draws.
+        if getattr(settings, "precompile_schedule", options.mode != "human") or spot_check:
+            plan = load_or_compile(settings, task_root / "outputs" / "schedule_cache")
+        if spot_check:
+            plan = plan.head(spot_check)
+            settings.total_blocks = 1
+            settings.trials_per_block = settings.total_trials = len(plan.block(0))
         trigger_runtime = initialize_triggers(mock=True) if options.mode in ("qa", "sim") else initialize_triggers(cfg)
 
         win, kb = initialize_exp(settings)
 
+        probe = None
+        if getattr(settings, "timing_probe", False):
+            probe = TimingProbe(settings.total_trials, frame_time=getattr(win, "monitorFramePeriod", None) or 1 / 60)
+            # Time the port write itself; with async dispatch it runs on the worker thread.
+            trigger_runtime = probe.wrap_triggers(trigger_runtime)
+        trigger_runtime = dispatcher = wrap_dispatch(trigger_runtime, settings)
+
+        validator = None
+        if options.mode == "qa" and qa_cfg.get("stream_validate", True) and output_dir is not None:
+            from src.qa import StreamingValidator, ValidatedTriggerRuntime, ValidatedWriter, trigger_codes
+
+            criteria = dict(qa_cfg.get("acceptance_criteria") or {})
+            if spot_check:
+                criteria.update(expected_trial_count=spot_check, trigger_codes_expected=None)
+            validator = StreamingValidator(criteria, known_codes=trigger_codes(settings.triggers), source="qa")
+            trigger_runtime = ValidatedTriggerRuntime(trigger_runtime, validator, output_dir / "qa_triggers.csv")
+
         if settings.voice_enabled and options.mode not in ("qa", "sim"):
-            stim_bank = (
-                StimBank(win, cfg["stim_config"])
-                .convert_to_voice("instruction_text", voice=settings.voice_name)
-                .preload_all()
+            voice_cache = VoiceCache(
+                task_root / getattr(settings, "voice_cache_dir", "assets/voice_cache"),
+                max_entries=getattr(settings, "voice_cache_max_entries", 16),
+            )
+            stim_bank = register_cached_voice(
+                StimBank(win, cfg["stim_config"]),
+                cfg["stim_config"],
+                "instruction_text",
+                voice=settings.voice_name,
+                cache=voice_cache,
+                fallback_dir=task_root / "assets",
             )
         else:
-            stim_bank = StimBank(win, cfg["stim_config"]).preload_all()
+            stim_bank = StimBank(win, cfg["stim_config"])
+        stim_bank, stim_warmer = preload_stimuli(
+            stim_bank, win, settings.conditions, mode=getattr(settings, "preload_mode", "all")
+        )
 
         settings.controller = cfg["controller_config"]
+        settings.mode = options.mode
         settings.save_to_json()
-        controller = Controller.from_dict(settings.controller)
+        controller = build_controller(settings.controller)
+        checkpoint = setup_checkpoint(settings, controller)
 
         trigger_runtime.send(settings.triggers.get("exp_onset"))
 
         instr = StimUnit("instruction_text", win, kb, runtime=trigger_runtime).add_stim(stim_bank.get("instruction_text"))
         if settings.voice_enabled and options.mode not in ("qa", "sim"):
             instr.add_stim(stim_bank.get("instruction_text_voice"))
+        if stim_warmer is not None:
+            instr.add_stim(stim_warmer)
         instr.wait_and_continue()
 
-        all_data = []
+        writer = TrialResultWriter(
+            settings.res_file,
+            fsync_every=getattr(settings, "result_fsync_every", 0),
+            result_format=getattr(settings, "result_format", "csv"),
+        ).open()
+        trial_writer = writer
+        if validator is not None:
+            trial_writer = ValidatedWriter(writer, validator)
+        stats = SessionStats()
         for block_i in range(settings.total_blocks):
             if options.mode not in ("qa", "sim"):
                 count_down(win, 3, color="black")
 
-            block = (
-                BlockUnit(
-                    block_id=f"block_{block_i}",
-                    block_idx=block_i,
-                    settings=settings,
-                    window=win,
-                    keyboard=kb,
-                )
-                .generate_conditions()
-                .on_start(lambda b: trigger_runtime.send(settings.triggers.get("block_onset")))
+            block = BlockUnit(
+                block_id=f"block_{block_i}",
+                block_idx=block_i,
+                settings=settings,
+                window=win,
+                keyboard=kb,
+            )
+            if plan is not None:
+                block.add_condition(plan.conditions(block_i))
+            else:
+                block.generate_conditions()
+            (
+                block.on_start(lambda b: trigger_runtime.send(settings.triggers.get("block_onset")))
                 .on_end(lambda b: trigger_runtime.send(settings.triggers.get("block_end")))
+                .on_end(lambda b: checkpoint.after_block(controller, b.block_id))
                 .run_trial(
-                    partial(
-                        run_trial,
-                        stim_bank=stim_bank,
-                        controller=controller,
-                        trigger_runtime=trigger_runtime,
+                    streaming_trial(
+                        partial(
+                            run_trial,
+                            stim_bank=stim_bank,
+                            controller=controller,
+                            trigger_runtime=trigger_runtime,
+                            block_id=f"block_{block_i}",
+                            block_idx=block_i,
+                            stats=stats,
+                            probe=probe,
+                            schedule=plan.replay(block_i) if plan is not None else None,
+                            checkpoint=checkpoint,
+                        ),
+                        trial_writer,
                         block_id=f"block_{block_i}",
-                        block_idx=block_i,
                     )
                 )
-                .to_dict(all_data)
             )
 
-            block_trials = block.get_all_data()
-            hit_rate = sum(trial.get("target_hit", False) for trial in block_trials) / len(block_trials)
-            total_score = sum(trial.get("feedback_delta", 0) for trial in block_trials)
+            block_stats = stats.block(f"block_{block_i}")
             StimUnit("block", win, kb, runtime=trigger_runtime).add_stim(
                 stim_bank.get_and_format(
                     "block_break",
                     block_num=block_i + 1,
                     total_blocks=settings.total_blocks,
-                    accuracy=hit_rate,
-                    total_score=total_score,
+                    accuracy=block_stats.hit_rate,
+                    total_score=block_stats.score,
                 )
             ).wait_and_continue()
 
-        final_score = sum(trial.get("feedback_delta", 0) for trial in all_data)
         StimUnit("goodbye", win, kb, runtime=trigger_runtime).add_stim(
-            stim_bank.get_and_format("good_bye", total_score=final_score)
+            stim_bank.get_and_format("good_bye", total_score=stats.session.score)
         ).wait_and_continue(terminate=True)
 
         trigger_runtime.send(settings.triggers.get("exp_end"))
 
-        df = pd.DataFrame(all_data)
-        df.to_csv(settings.res_file, index=False)
+        writer.close()
+        checkpoint.close()
+        if probe is not None:
+            probe.write_summary(str(Path(settings.res_file).with_suffix("")) + "_timing.json")
 
         trigger_runtime.close()
+        if isinstance(dispatcher, AsyncTriggerRuntime):
+            dispatcher.write_summary(str(Path(settings.res_file).with_suffix("")) + "_trigger_dispatch.json")
+        if validator is not None:
+            counts = validator.finish()
+            print(f"[QA] stream validation passed: {counts['rows']} trials, {counts['triggers']} triggers")
         core.quit()
 
 
 def main() -> None:
+    from psyflow import parse_task_run_options
+
     task_root = Path(__file__).resolve().parent
     options = parse_task_run_options(
         task_root=task_root,
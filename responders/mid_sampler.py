@@ -24,6 +24,11 @@ class _RtParams:
     min_rt: float = 0.12
 
 
+_ANTICIPATION_PHASES = ("anticipation", "anticipation_fixation")
+_TARGET_PHASES = ("target", "target_response_window")
+_DEALT_PHASES = _ANTICIPATION_PHASES + _TARGET_PHASES
+
+
 class MidSamplerResponder:
     """Task-specific MID sampler responder.
 
@@ -31,6 +36,18 @@ class MidSamplerResponder:
     - instruction/block/goodbye: always continue with a key press.
     - anticipation: mostly no response, with small early-press probability.
     - target: condition-dependent hit/miss + RT sampling.
+
+    With ``batch_size > 0`` the anticipation and target draws come from NumPy
+    pools filled per condition in one vectorized pass, and are dealt into
+    decks of ready-made ``Action`` objects per (phase, condition)
+    (``start_session`` calls ``precompute`` for win/lose/neut). For the usual
+    observation (exact phase and condition names, ``key`` valid, no
+    ``min_wait_s``) ``act`` is a deck lookup, a pop and a deadline comparison;
+    anything else takes the general path. Precomputed actions without a
+    per-draw RT are shared instances, so callers must not mutate them.
+    Distributions are unchanged; the
+    stream is seeded from the session RNG, so runs stay reproducible per seed
+    (but differ draw-for-draw from the scalar ``random.Random`` path).
     """
 
     def __init__(
@@ -49,8 +66,14 @@ class MidSamplerResponder:
         rt_mu_default: float = 0.28,
         rt_sigma: float = 0.05,
         rt_min_s: float = 0.12,
+        batch_size: int = 0,
     ):
         self._rng: Any = None
+        self._np_rng: Any = None
+        self.batch_size = int(batch_size)
+        self._target_pools: dict[str, _TargetPool] = {}
+        self._early_pool: _EarlyPool | None = None
+        self._decks: dict[tuple[str, str], list[Action]] | None = None
         self._session: SessionInfo | None = None
         self.key = str(key)
         self.p_early = float(p_early)
@@ -69,10 +92,73 @@ class MidSamplerResponder:
             sigma=float(rt_sigma),
             min_rt=float(rt_min_s),
         )
+        self._p_hit_by_cond = {"win": self.hit.win, "lose": self.hit.lose, "neut": self.hit.neut}
+        self._rt_mu_by_cond = {"win": self.rt.win, "lose": self.rt.lose, "neut": self.rt.neut}
 
     def start_session(self, session: SessionInfo, rng: Any) -> None:
         self._session = session
         self._rng = rng
+        self._np_rng = None
+        self._target_pools = {}
+        self._early_pool = None
+        self._decks = None
+        if self.batch_size > 0:
+            import numpy as np
+
+            self._np_rng = np.random.default_rng(rng.getrandbits(64))
+            self._early_pool = _EarlyPool(self._np_rng, self.p_early, self.batch_size)
+            self._decks = {(phase, cond): [] for phase in _DEALT_PHASES for cond in self._p_hit_by_cond}
+            self.precompute(self.batch_size)
+
+    def precompute(self, n_per_condition: int, conditions: tuple[str, ...] = ("win", "lose", "neut")) -> None:
+        """Deal ``n_per_condition`` ready-made target and anticipation actions per condition."""
+        if self._np_rng is None:
+            raise RuntimeError("MidSamplerResponder.precompute needs batch_size > 0 and start_session() first.")
+        for cond in conditions:
+            for phase in (_TARGET_PHASES[-1], _ANTICIPATION_PHASES[-1]):
+                self._deal((phase, cond), n_per_condition)
+
+    def _deal(self, slot: tuple[str, str], n: int) -> list[Action]:
+        """
+        Add ``n`` precomputed actions for ``slot`` = (phase, condition) to its
+        deck; the next one is last. Only target hits carry per-draw values, so
+        misses, withholds and early presses are shared instances.
+        """
+        phase, cond = slot
+        key = self.key
+        if phase in _TARGET_PHASES:
+            p_hit = self._p_hit(cond)
+            min_rt = self.rt.min_rt
+            miss = Action(key=None, rt_s=None, meta={"source": "mid_sampler", "phase": phase, "condition": cond, "reason": "miss", "p_hit": p_hit})
+            actions = [
+                miss
+                if rt_raw != rt_raw
+                else Action(
+                    key=key,
+                    rt_s=max(rt_raw, min_rt),
+                    meta={"source": "mid_sampler", "phase": phase, "condition": cond, "p_hit": p_hit, "rt_raw": rt_raw},
+                )
+                for rt_raw in self._target_pool(cond).take(n).tolist()
+            ]
+        else:
+            press = Action(
+                key=key,
+                rt_s=max(self.continue_rt_s, self.rt.min_rt),
+                meta={"source": "mid_sampler", "phase": phase, "condition": cond, "reason": "early_press"},
+            )
+            withhold = Action(key=None, rt_s=None, meta={"source": "mid_sampler", "phase": phase, "condition": cond, "reason": "withhold"})
+            actions = [press if early else withhold for early in self._early_pool.take(n).tolist()]
+        deck = self._decks.setdefault(slot, [])
+        actions.reverse()
+        deck[:0] = actions
+        return deck
+
+    def _target_pool(self, cond: str) -> "_TargetPool":
+        pool = self._target_pools.get(cond)
+        if pool is None:
+            pool = _TargetPool(self._np_rng, self._p_hit(cond), self._rt_mu_by_cond.get(cond, self.rt.default), self.rt.sigma, self.batch_size)
+            self._target_pools[cond] = pool
+        return pool
 
     def _condition(self, obs: Observation) -> str:
         cond = (obs.condition_id or "").strip().lower()
@@ -97,6 +183,8 @@ class MidSamplerResponder:
 
     def _min_wait(self, obs: Observation) -> float:
         raw = obs.extras.get("min_wait_s")
+        if raw is None:
+            return 0.0
         try:
             return max(0.0, float(raw))
         except Exception:
@@ -109,26 +197,56 @@ class MidSamplerResponder:
         return rt
 
     def _draw_target_rt(self, cond: str) -> float:
-        if cond == "win":
-            mu = self.rt.win
-        elif cond == "lose":
-            mu = self.rt.lose
-        elif cond == "neut":
-            mu = self.rt.neut
-        else:
-            mu = self.rt.default
+        mu = self._rt_mu_by_cond.get(cond, self.rt.default)
         return float(self._rng.gauss(mu, self.rt.sigma))
 
     def _p_hit(self, cond: str) -> float:
-        if cond == "win":
-            return self.hit.win
-        if cond == "lose":
-            return self.hit.lose
-        if cond == "neut":
-            return self.hit.neut
-        return self.hit.default
+        return self._p_hit_by_cond.get(cond, self.hit.default)
+
+    def _early_press(self) -> bool:
+        if self._early_pool is not None:
+            return self._early_pool.next()
+        return self._rng.random() <= self.p_early
+
+    def _target_draw(self, cond: str, p_hit: float) -> float | None:
+        """Raw target RT for a hit, or None for a miss."""
+        if self._np_rng is not None:
+            return self._target_pool(cond).next()
+        if self._rng.random() > p_hit:
+            return None
+        return self._draw_target_rt(cond)
 
     def act(self, obs: Observation) -> Action:
+        decks = self._decks
+        if decks is not None:
+            fields = obs if isinstance(obs, dict) else getattr(obs, "__dict__", None)
+            if fields is not None and not fields.get("extras"):
+                deck = decks.get((fields.get("phase"), fields.get("condition_id")))
+                if deck is not None and self.key in (fields.get("valid_keys") or ()):
+                    if not deck:
+                        self._deal((fields["phase"], fields["condition_id"]), self.batch_size)
+                    action = deck.pop()
+                    if action.rt_s is None:
+                        return action
+                    deadline = fields.get("deadline_s")
+                    if deadline is None:
+                        deadline = fields.get("response_window_s")
+                    if deadline is None or action.rt_s <= deadline:
+                        return action
+                    return self._late(action)
+        return self._act(obs)
+
+    def _late(self, action: Action) -> Action:
+        """Withheld version of a precomputed press that falls past the deadline."""
+        meta = action.meta
+        if "rt_raw" in meta:
+            late = {k: meta[k] for k in ("source", "phase", "condition")}
+            late.update(reason="late", rt_raw=meta["rt_raw"], p_hit=meta["p_hit"])
+        else:
+            late = {**meta, "reason": "early_late"}
+        return Action(key=None, rt_s=None, meta=late)
+
+    def _act(self, obs: Observation) -> Action:
         if isinstance(obs, dict):
             obs = Observation.from_dict(obs)
 
@@ -154,7 +272,7 @@ class MidSamplerResponder:
 
         # Early presses in anticipation are rare.
         if phase in ("anticipation", "anticipation_fixation"):
-            if self._rng.random() > self.p_early:
+            if not self._early_press():
                 return Action(
                     key=None,
                     rt_s=None,
@@ -176,13 +294,13 @@ class MidSamplerResponder:
         # MID target: condition-dependent miss/hit + RT model.
         if phase in ("target", "target_response_window"):
             p_hit = self._p_hit(cond)
-            if self._rng.random() > p_hit:
+            rt_raw = self._target_draw(cond, p_hit)
+            if rt_raw is None:
                 return Action(
                     key=None,
                     rt_s=None,
                     meta={"source": "mid_sampler", "phase": phase, "condition": cond, "reason": "miss", "p_hit": p_hit},
                 )
-            rt_raw = self._draw_target_rt(cond)
             rt = self._clamp_or_miss(rt_raw, deadline, min_wait)
             if rt is None:
                 return Action(
@@ -216,3 +334,108 @@ class MidSamplerResponder:
 
     def end_session(self) -> None:
         return None
+
+
+class _TargetPool:
+    """
+    Per-condition buffer of target decisions read by index and refilled in place.
+
+    ``rts[i]`` is the raw RT of a hit, NaN for a miss.
+    """
+
+    def __init__(self, np_rng: Any, p_hit: float, mu: float, sigma: float, size: int):
+        import numpy as np
+
+        self._np_rng = np_rng
+        self.p_hit = p_hit
+        self.mu = mu
+        self.sigma = sigma
+        self.size = size
+        self._u = np.empty(0)
+        self._rts = np.empty(0)
+        self._pos = 0
+
+    def refill(self, n: int | None = None) -> None:
+        """Append ``n`` decisions after the unread ones, reusing the buffers when they fit."""
+        import numpy as np
+
+        n = int(n or self.size)
+        keep = len(self._rts) - self._pos
+        if keep or len(self._rts) != n:
+            rts = np.empty(keep + n)
+            rts[:keep] = self._rts[self._pos:]
+            self._rts = rts
+        if len(self._u) != n:
+            self._u = np.empty(n)
+        new = self._rts[keep:]
+        self._np_rng.random(out=self._u)
+        self._np_rng.standard_normal(out=new)
+        new *= self.sigma
+        new += self.mu
+        # Same decision rule as the scalar path: miss when u > p_hit.
+        new[self._u > self.p_hit] = np.nan
+        self._pos = 0
+
+    def take(self, n: int):
+        """Next ``n`` raw RTs as an array (NaN for a miss)."""
+        import numpy as np
+
+        if len(self._rts) - self._pos < n:
+            self.refill(max(self.size, n - (len(self._rts) - self._pos)))
+        out = np.array(self._rts[self._pos:self._pos + n])
+        self._pos += n
+        return out
+
+    def next(self) -> float | None:
+        if self._pos == len(self._rts):
+            self.refill()
+        rt = float(self._rts[self._pos])
+        self._pos += 1
+        return None if rt != rt else rt
+
+
+class _EarlyPool:
+    """Buffer of anticipation early-press draws read by index and refilled in place."""
+
+    def __init__(self, np_rng: Any, p_early: float, size: int):
+        import numpy as np
+
+        self._np_rng = np_rng
+        self.p_early = p_early
+        self.size = size
+        self._u = np.empty(0)
+        self._early = np.empty(0, dtype=bool)
+        self._pos = 0
+
+    def refill(self, n: int | None = None) -> None:
+        """Append ``n`` draws after the unread ones, reusing the buffers when they fit."""
+        import numpy as np
+
+        n = int(n or self.size)
+        keep = len(self._early) - self._pos
+        if keep or len(self._early) != n:
+            early = np.empty(keep + n, dtype=bool)
+            early[:keep] = self._early[self._pos:]
+            self._early = early
+        if len(self._u) != n:
+            self._u = np.empty(n)
+        self._np_rng.random(out=self._u)
+        np.less_equal(self._u, self.p_early, out=self._early[keep:])
+        self._pos = 0
+
+    def take(self, n: int):
+        """Next ``n`` early-press draws as a bool array."""
+        import numpy as np
+
+        if len(self._early) - self._pos < n:
+            self.refill(max(self.size, n - (len(self._early) - self._pos)))
+        out = np.array(self._early[self._pos:self._pos + n])
+        self._pos += n
+        return out
+
+    def next(self) -> bool:
+        if self._pos == len(self._early):
+            self.refill()
+        early = bool(self._early[self._pos])
+        self._pos += 1
+        return early
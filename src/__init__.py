@@ -1,2 +1,21 @@
-from .utils import Controller
-from .run_trial import run_trial
+# Submodules are loaded on first attribute access so that importing ``src``
+# (e.g. for the Controller in batch tools) does not pull in psyflow/psychopy.
+_EXPORTS = {
+    "Controller": ".utils",
+    "BayesianController": ".bayesian",
+    "build_controller": ".utils",
+    "run_trial": ".run_trial",
+    "run_headless": ".headless",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
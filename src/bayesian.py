@@ -0,0 +1,236 @@
+"""Grid-based Bayesian target-duration controller (``controller.type: bayesian``)."""
+
+from typing import Any, Dict, Iterable, Optional, Set
+
+import numpy as np
+
+from .utils import POOLED_KEY, _log_data
+
+
+class BayesianController:
+    """
+    Grid-based Bayesian alternative to the fixed-step ``Controller``
+    (``controller.type: bayesian``).
+
+    The hit probability at target duration ``d`` is modelled as
+
+        p(hit | d, theta) = guess + (1 - guess - lapse) * sigmoid((d - theta) / slope)
+
+    with an unknown threshold ``theta`` per key. The posterior over ``theta`` is
+    kept as a log-density on a fixed grid of ``grid_size`` points, and the
+    log-likelihood of a hit and of a miss at every candidate duration
+    (``min_duration`` to ``max_duration`` in ``step`` increments) is
+    precomputed once. A trial update adds one precomputed row to the log
+    posterior, and the next duration is the candidate whose posterior-predictive
+    hit rate is closest to ``target_accuracy``; both are fixed-size NumPy
+    operations, so the cost per trial does not depend on session length.
+
+    The prior is Gaussian (``prior_sd``) around the threshold at which
+    ``initial_duration`` would give ``target_accuracy``. ``update``,
+    ``get_duration``, ``accuracy``, ``state``/``load_state``/``pop_dirty`` and
+    ``describe`` match ``Controller``, so ``run_trial``, checkpoints and
+    sweeps work unchanged.
+    """
+
+    PARAM_NAMES = ("initial_duration", "min_duration", "max_duration", "step", "target_accuracy",
+                   "condition_specific", "slope", "lapse", "guess", "grid_size", "prior_sd")
+
+    def __init__(
+        self,
+        initial_duration: float = 0.25,
+        min_duration: float = 0.08,
+        max_duration: float = 0.4,
+        step: float = 0.01,
+        target_accuracy: float = 0.66,
+        condition_specific: bool = True,
+        enable_logging: bool = True,
+        slope: float = 0.03,
+        lapse: float = 0.02,
+        guess: float = 0.0,
+        grid_size: int = 121,
+        prior_sd: float = 0.1,
+    ):
+        if not 0.0 <= guess < target_accuracy < 1.0 - lapse:
+            raise ValueError(
+                f"[BayesianController] need 0 <= guess < target_accuracy < 1 - lapse, "
+                f"got guess={guess}, target_accuracy={target_accuracy}, lapse={lapse}"
+            )
+        if float(step) <= 0 or float(slope) <= 0 or float(prior_sd) <= 0:
+            raise ValueError("[BayesianController] step, slope and prior_sd must be > 0")
+        if int(grid_size) < 2:
+            raise ValueError(f"[BayesianController] grid_size must be >= 2, got {grid_size}")
+
+        self.initial_duration = initial_duration
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.step = step
+        self.target_accuracy = target_accuracy
+        self.condition_specific = condition_specific
+        self.enable_logging = enable_logging
+        self.slope = float(slope)
+        self.lapse = float(lapse)
+        self.guess = float(guess)
+        self.grid_size = int(grid_size)
+        self.prior_sd = float(prior_sd)
+
+        self.candidates = np.round(np.arange(min_duration, max_duration + step / 2, step), 10)
+        margin = 4 * self.slope
+        self.theta = np.linspace(min_duration - margin, max_duration + margin, self.grid_size)
+        scale = 1.0 - self.guess - self.lapse
+        p_hit = self.guess + scale / (1.0 + np.exp(-(self.candidates[:, None] - self.theta[None, :]) / self.slope))
+        self._p_hit = p_hit
+        self._log_hit = np.log(p_hit)
+        self._log_miss = np.log1p(-p_hit)
+        # Threshold at which initial_duration is predicted to hit target_accuracy.
+        q = (target_accuracy - self.guess) / scale
+        theta0 = initial_duration - self.slope * np.log(q / (1.0 - q))
+        self._log_prior = -0.5 * ((self.theta - theta0) / self.prior_sd) ** 2
+
+        self.durations: Dict[Optional[str], float] = {}
+        self.hits: Dict[Optional[str], int] = {}
+        self.trials: Dict[Optional[str], int] = {}
+        self.log_posterior: Dict[Optional[str], np.ndarray] = {}
+        self._index: Dict[Optional[str], int] = {}
+        self._dirty: Set[Optional[str]] = set()
+
+    @classmethod
+    def from_dict(cls, config: dict) -> 'BayesianController':
+        """Create a controller from a flattened config dictionary; unknown keys are rejected."""
+        allowed_keys = {
+            'initial_duration': 0.25,
+            'min_duration': 0.1,
+            'max_duration': 0.4,
+            'step': 0.01,
+            'target_accuracy': 0.66,
+            'condition_specific': True,
+            'enable_logging': True,
+            'slope': 0.03,
+            'lapse': 0.02,
+            'guess': 0.0,
+            'grid_size': 121,
+            'prior_sd': 0.1,
+        }
+        extra_keys = set(config.keys()) - set(allowed_keys)
+        if extra_keys:
+            raise ValueError(f"[BayesianController] Unsupported config keys: {extra_keys}")
+        return cls(**{k: config.get(k, default) for k, default in allowed_keys.items()})
+
+    def _get_key(self, condition: Optional[str]) -> Optional[str]:
+        return condition if self.condition_specific else None
+
+    def _nearest(self, duration: float) -> int:
+        return int(np.abs(self.candidates - duration).argmin())
+
+    def _init_key(self, key: Optional[str]) -> None:
+        self._index[key] = self._nearest(self.initial_duration)
+        self.durations[key] = float(self.candidates[self._index[key]])
+        self.hits[key] = 0
+        self.trials[key] = 0
+        self.log_posterior[key] = self._log_prior.copy()
+
+    def _posterior(self, key: Optional[str]) -> np.ndarray:
+        log_post = self.log_posterior[key]
+        post = np.exp(log_post - log_post.max())
+        return post / post.sum()
+
+    def accuracy(self, condition: Optional[str] = None) -> float:
+        """Observed hit rate for ``condition`` (the posterior does the adapting)."""
+        key = self._get_key(condition)
+        trials = self.trials.get(key, 0)
+        return self.hits[key] / trials if trials else 0.0
+
+    def threshold(self, condition: Optional[str] = None) -> float:
+        """Posterior mean of the threshold ``theta`` for ``condition``."""
+        key = self._get_key(condition)
+        if key not in self.durations:
+            self._init_key(key)
+        return float(self.theta @ self._posterior(key))
+
+    def update(self, hit: bool, condition: Optional[str] = None):
+        key = self._get_key(condition)
+        if key not in self.durations:
+            self._init_key(key)
+
+        hit = bool(hit)
+        self.hits[key] += hit
+        self.trials[key] += 1
+        idx = self._index[key]
+        log_post = self.log_posterior[key]
+        log_post += self._log_hit[idx] if hit else self._log_miss[idx]
+        log_post -= log_post.max()
+
+        post = np.exp(log_post)
+        predicted = (self._p_hit @ post) / post.sum()
+        new_idx = int(np.abs(predicted - self.target_accuracy).argmin())
+        old_duration = self.durations[key]
+        self._index[key] = new_idx
+        self.durations[key] = float(self.candidates[new_idx])
+        self._dirty.add(key)
+
+        if self.enable_logging:
+            label = f"[{condition}]" if condition else ""
+            _log_data(f"[Controller📢]Bayesian{label} — Trials: {self.trials[key]}, "
+                      f"[Controller📢]Predicted hit rate: {predicted[new_idx]:.2%}, "
+                      f"Duration updated: {old_duration:.3f} → {self.durations[key]:.3f}")
+
+    def get_duration(self, condition: Optional[str] = None) -> float:
+        key = self._get_key(condition)
+        if key not in self.durations:
+            self._init_key(key)
+        return self.durations[key]
+
+    def pop_dirty(self) -> Set[Optional[str]]:
+        """Return and clear the keys updated since the previous call."""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def state(self, keys: Optional[Iterable[Optional[str]]] = None) -> Dict[str, Dict[str, Any]]:
+        """JSON-safe per-key state: current duration, counts and the log posterior."""
+        out = {}
+        for key in (self.durations if keys is None else keys):
+            out[POOLED_KEY if key is None else key] = {
+                "duration": self.durations[key],
+                "hits": self.hits[key],
+                "trials": self.trials[key],
+                "log_posterior": [round(float(v), 6) for v in self.log_posterior[key]],
+            }
+        return out
+
+    def load_state(self, state: Dict[str, Dict[str, Any]]) -> 'BayesianController':
+        """
+        Restore per-key state saved by ``state``. A posterior saved on a
+        different grid (or a staircase snapshot without one) starts from the
+        prior; the duration snaps to the nearest candidate.
+        Raises ``ValueError`` if ``state`` has keys but none match
+        ``condition_specific`` (pooled snapshot into a per-condition controller
+        or vice versa).
+        """
+        matching = {label: entry for label, entry in state.items() if (label == POOLED_KEY) != self.condition_specific}
+        if state and not matching:
+            raise ValueError(
+                f"[MID] controller state has keys {sorted(state)} but none match "
+                f"condition_specific={self.condition_specific}; nothing to restore"
+            )
+        for label, entry in matching.items():
+            key = None if label == POOLED_KEY else label
+            self._init_key(key)
+            self._index[key] = self._nearest(float(entry["duration"]))
+            self.durations[key] = float(self.candidates[self._index[key]])
+            self.hits[key] = int(entry.get("hits", 0))
+            self.trials[key] = int(entry.get("trials", 0))
+            saved = entry.get("log_posterior")
+            if saved is not None and len(saved) == self.grid_size:
+                self.log_posterior[key] = np.asarray(saved, dtype=float)
+            self._dirty.add(key)
+        return self
+
+    def describe(self):
+        print("Bayesian Controller Status")
+        for key, trials in self.trials.items():
+            if not trials:
+                continue
+            label = f"[{key}]" if key else "[All]"
+            print(
+                f"{label} — Accuracy: {self.accuracy(key):.2%} ({trials} trials), "
+                f"Threshold: {float(self.theta @ self._posterior(key)):.3f}, Duration: {self.durations[key]:.3f}"
+            )
@@ -0,0 +1,163 @@
+"""
+Controller checkpoints: save the adaptive staircase during a session and resume it later.
+
+A checkpoint is an append-only JSONL file next to the result file
+(``<res_file stem>_controller.jsonl``). The first line records the controller
+parameters; every save appends one line holding only the keys updated since
+the previous save, so a per-trial save writes a single short line. Loading
+replays the lines (latest entry per key wins). After ``compact_every`` saves
+the file is rewritten atomically as one full snapshot.
+
+Config (``task`` section)::
+
+    controller_checkpoint: block     # block | trial | none
+    controller_resume_from: latest   # null, a *_controller.jsonl path, or "latest"
+
+``latest`` picks the subject's most recent checkpoint in ``save_path``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .utils import POOLED_KEY
+
+CHECKPOINT_MODES = ("block", "trial", "none")
+CHECKPOINT_SUFFIX = "_controller.jsonl"
+_PARAMS = ("initial_duration", "min_duration", "max_duration", "step", "target_accuracy",
+           "condition_specific", "accuracy_mode", "window_size", "ewma_alpha")
+
+
+def _params(controller) -> Dict[str, Any]:
+    names = getattr(controller, "PARAM_NAMES", _PARAMS)
+    return {"type": type(controller).__name__, **{name: getattr(controller, name) for name in names}}
+
+
+def _dump(record: Dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+class ControllerCheckpoint:
+    """Incremental, append-only checkpoint writer for one session's ``Controller``."""
+
+    def __init__(self, path: str | Path, every: Optional[str] = "block", *, fsync: bool = False, compact_every: int = 200):
+        every = "none" if every in (None, False) else str(every)
+        if every not in CHECKPOINT_MODES:
+            raise ValueError(f"[MID] controller_checkpoint must be one of {CHECKPOINT_MODES}, got {every!r}")
+        self.path = Path(path)
+        self.every = every
+        self.fsync = fsync
+        self.compact_every = int(compact_every)
+        self._f = None
+        self._saves = 0
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._f.write(_dump(record))
+        self._f.flush()
+        if self.fsync:
+            os.fsync(self._f.fileno())
+
+    def save(self, controller, tag: Any = None) -> None:
+        """Append the keys changed since the last save (no-op when nothing changed)."""
+        if self.every == "none":
+            return
+        if self._f is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._f = open(self.path, "w", encoding="utf-8")
+            self._write({"params": _params(controller)})
+        keys = controller.pop_dirty()
+        if not keys:
+            return
+        self._write({"t": time.time(), "tag": tag, "state": controller.state(keys)})
+        self._saves += 1
+        if self.compact_every and self._saves % self.compact_every == 0:
+            self.compact(controller, tag)
+
+    def compact(self, controller, tag: Any = None) -> None:
+        """Rewrite the file as the params line plus one full snapshot."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_dump({"params": _params(controller)}))
+            f.write(_dump({"t": time.time(), "tag": tag, "state": controller.state()}))
+        self._f.close()
+        os.replace(tmp, self.path)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def after_trial(self, controller, tag: Any = None) -> None:
+        if self.every == "trial":
+            self.save(controller, tag)
+
+    def after_block(self, controller, tag: Any = None) -> None:
+        if self.every in ("block", "trial"):
+            self.save(controller, tag)
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def load_checkpoint(path: str | Path) -> Dict[str, Any]:
+    """Return ``{"params": ..., "state": ...}`` merged from a checkpoint file (torn last line ignored)."""
+    params: Dict[str, Any] = {}
+    state: Dict[str, Dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if "params" in record:
+                params = record["params"]
+            state.update(record.get("state", {}))
+    return {"params": params, "state": state}
+
+
+def latest_checkpoint(save_path: str | Path, subject_id: Any, exclude: Optional[str | Path] = None) -> Optional[Path]:
+    """Most recently modified checkpoint of ``subject_id`` in ``save_path``, if any."""
+    exclude = Path(exclude).resolve() if exclude is not None else None
+    candidates = [
+        p for p in Path(save_path).glob(f"sub-{subject_id}_*{CHECKPOINT_SUFFIX}")
+        if p.is_file() and p.resolve() != exclude
+    ]
+    return max(candidates, key=lambda p: p.stat().st_mtime) if candidates else None
+
+
+def resume_controller(controller, source: str | Path) -> Dict[str, Any]:
+    """
+    Load ``source`` into ``controller``; warns if the saved controller parameters
+    differ. ``load_state`` raises ``ValueError`` if no saved key fits the controller.
+    """
+    saved = load_checkpoint(source)
+    current = _params(controller)
+    changed = {k: (v, current[k]) for k, v in saved["params"].items() if current.get(k, v) != v}
+    if changed:
+        print(f"[Warning] Controller parameters changed since checkpoint {source}: {changed}")
+    controller.load_state(saved["state"])
+    restored = sum((label == POOLED_KEY) != controller.condition_specific for label in saved["state"])
+    if restored:
+        print(f"[MID] controller resumed from {source} ({restored} keys restored)")
+    else:
+        print(f"[Warning] Checkpoint {source} holds no controller state; starting fresh")
+    return saved
+
+
+def checkpoint_path(res_file: str) -> Path:
+    return Path(str(Path(res_file).with_suffix("")) + CHECKPOINT_SUFFIX)
+
+
+def setup_checkpoint(settings, controller) -> ControllerCheckpoint:
+    """Resume ``controller`` per ``task.controller_resume_from`` and return this session's checkpoint writer."""
+    path = checkpoint_path(settings.res_file)
+    resume_from = getattr(settings, "controller_resume_from", None)
+    if resume_from == "latest":
+        resume_from = latest_checkpoint(settings.save_path, settings.subject_id, exclude=path)
+        if resume_from is None:
+            print("[MID] no earlier controller checkpoint for this subject; starting fresh")
+    if resume_from:
+        resume_controller(controller, resume_from)
+    return ControllerCheckpoint(path, getattr(settings, "controller_checkpoint", "block"))
@@ -0,0 +1,239 @@
+"""
+Compiled, validated task configs.
+
+``psyflow.load_config`` parses the full YAML file on every launch and each
+consumer checks only its own slice (``Controller.from_dict`` its keys,
+``run_trial`` nothing until a ``{condition}_*`` trigger or stimulus turns out to
+be missing mid-session). :func:`load_compiled_config` instead:
+
+1. hashes the config file bytes (plus :data:`CONFIG_CACHE_VERSION`, the
+   installed psyflow version and a fingerprint of the validation rules) into a
+   cache key;
+2. returns the compiled config from memory, or unpickles
+   ``<cache_dir>/config_<key>.pkl`` when present;
+3. otherwise runs ``load_config`` once, validates the whole result with
+   :func:`validate_config` and writes the pickle atomically.
+
+Validation runs per section and is memoized on the section contents, so the
+stimuli/triggers/timing blocks shared by ``config.yaml``, ``config_qa.yaml``
+and the sim configs are checked once per process. Every problem is collected
+and raised together as one ``ValueError``. Any edit to a file changes its hash,
+and so does any change to the validators (this module, the controller classes
+whose ``from_dict`` checks the controller keys, ``schedule.TRIGGER_EVENTS``),
+so a stale cache entry is never used; old entries can simply be deleted.
+
+Usage::
+
+    python -m src.config_cache                       # compile + validate config/*.yaml
+    python -m src.config_cache config/config_qa.yaml --no-cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CONFIG_CACHE_VERSION = 1
+TASK_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = TASK_ROOT / "outputs" / "config_cache"
+
+# Names looked up by main.py / headless.py / run_trial.py.
+GLOBAL_TRIGGERS = ("exp_onset", "exp_end", "block_onset", "block_end", "fixation_onset")
+GLOBAL_STIMULI = ("fixation", "instruction_text", "block_break", "good_bye")
+CONDITION_STIMULI = ("cue", "target", "hit_feedback", "miss_feedback")
+TIMING_KEYS = ("fixation_duration", "cue_duration", "anticipation_duration", "prefeedback_duration", "feedback_duration")
+
+_BLOBS: Dict[str, bytes] = {}
+_CHECKED: Dict[str, Tuple[str, ...]] = {}
+
+
+def _psyflow_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("psyflow")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@lru_cache(maxsize=None)
+def validator_fingerprint() -> str:
+    """Hash of everything :func:`validate_config` depends on, so rule changes invalidate cached results."""
+    from .schedule import TRIGGER_EVENTS
+    from .trigger_dispatch import DISPATCH_MODES
+
+    h = hashlib.sha256()
+    for module in ("config_cache.py", "utils.py", "bayesian.py"):
+        h.update((Path(__file__).parent / module).read_bytes())
+    h.update(repr((TRIGGER_EVENTS, DISPATCH_MODES)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def config_key(data: bytes) -> str:
+    """Cache key of a config file's bytes for this cache format, psyflow version and validator version."""
+    h = hashlib.sha256(data)
+    h.update(f"\0{CONFIG_CACHE_VERSION}\0{_psyflow_version()}\0{validator_fingerprint()}".encode("utf-8"))
+    return h.hexdigest()[:20]
+
+
+def _memo(name: str, check: Callable[..., List[str]], *args) -> List[str]:
+    """Run ``check(*args)`` once per distinct input within this process."""
+    digest = hashlib.sha256(json.dumps([name, args], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    if digest not in _CHECKED:
+        _CHECKED[digest] = tuple(check(*args))
+    return list(_CHECKED[digest])
+
+
+def _check_triggers(triggers: Dict[str, Any], conditions: List[str]) -> List[str]:
+    from .schedule import TRIGGER_EVENTS
+
+    problems = []
+    required = list(GLOBAL_TRIGGERS) + [f"{c}_{event}" for c in conditions for event in TRIGGER_EVENTS]
+    missing = [name for name in required if triggers.get(name) is None]
+    if missing:
+        problems.append(f"triggers.map is missing {', '.join(missing)}")
+    seen: Dict[Any, str] = {}
+    for name, code in triggers.items():
+        if isinstance(code, bool) or not isinstance(code, int) or not 0 <= code <= 255:
+            problems.append(f"triggers.map.{name} must be an integer in 0..255, got {code!r}")
+        elif code in seen:
+            problems.append(f"triggers.map.{name} reuses code {code} of {seen[code]}")
+        else:
+            seen[code] = name
+    return problems
+
+
+def _check_stimuli(stimuli: Dict[str, Any], conditions: List[str]) -> List[str]:
+    problems = []
+    required = list(GLOBAL_STIMULI) + [f"{c}_{kind}" for c in conditions for kind in CONDITION_STIMULI]
+    missing = [name for name in required if name not in stimuli]
+    if missing:
+        problems.append(f"stimuli is missing {', '.join(missing)}")
+    for name, spec in stimuli.items():
+        if not isinstance(spec, dict) or not spec.get("type"):
+            problems.append(f"stimuli.{name} needs a 'type'")
+    return problems
+
+
+def _check_timing(task_config: Dict[str, Any]) -> List[str]:
+    problems = []
+    for name in TIMING_KEYS:
+        value = task_config.get(name)
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if value is None or not 1 <= len(values) <= 2 or not all(isinstance(v, (int, float)) and v >= 0 for v in values):
+            problems.append(f"timing.{name} must be a duration or [min, max] in seconds, got {value!r}")
+    return problems
+
+
+def _check_task(task_config: Dict[str, Any]) -> List[str]:
+    problems = []
+    conditions = task_config.get("conditions")
+    if not conditions or not all(isinstance(c, str) for c in conditions):
+        problems.append(f"task.conditions must be a non-empty list of names, got {conditions!r}")
+    for name in ("total_blocks", "total_trials"):
+        value = task_config.get(name)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            problems.append(f"task.{name} must be a positive integer, got {value!r}")
+    if not task_config.get("key_list"):
+        problems.append("task.key_list must list at least one response key")
+    from .trigger_dispatch import DISPATCH_MODES
+
+    dispatch = task_config.get("trigger_dispatch", "sync") or "sync"
+    if dispatch not in DISPATCH_MODES:
+        problems.append(f"task.trigger_dispatch must be one of {DISPATCH_MODES}, got {dispatch!r}")
+    return problems
+
+
+def _check_controller(controller: Dict[str, Any]) -> List[str]:
+    from .utils import build_controller
+
+    try:
+        build_controller({**controller, "enable_logging": False})
+    except (TypeError, ValueError) as exc:
+        return [f"controller: {exc}"]
+    return []
+
+
+def validate_config(cfg: Dict[str, Any]) -> List[str]:
+    """All problems found in a ``load_config`` result (empty when valid)."""
+    task_config = cfg.get("task_config") or {}
+    raw = cfg.get("raw") or {}
+    problems = _memo("task", _check_task, task_config)
+    conditions = [str(c) for c in task_config.get("conditions") or []]
+    triggers = (raw.get("triggers") or {}).get("map") or {}
+    problems += _memo("triggers", _check_triggers, triggers, conditions)
+    problems += _memo("stimuli", _check_stimuli, cfg.get("stim_config") or {}, conditions)
+    problems += _memo("timing", _check_timing, task_config)
+    problems += _memo("controller", _check_controller, cfg.get("controller_config") or {})
+    return problems
+
+
+def compile_config(config_path: str | Path) -> Dict[str, Any]:
+    """``load_config`` + :func:`validate_config`; raises ``ValueError`` listing every problem."""
+    from psyflow import load_config
+
+    cfg = load_config(str(config_path))
+    problems = validate_config(cfg)
+    if problems:
+        raise ValueError(f"[Config] {config_path} is invalid:\n  - " + "\n  - ".join(problems))
+    return cfg
+
+
+def load_compiled_config(
+    config_path: str | Path,
+    cache_dir: str | Path | None = DEFAULT_CACHE_DIR,
+) -> Dict[str, Any]:
+    """
+    Drop-in for ``psyflow.load_config`` that validates once per file version and
+    caches the result. Each call returns an independent copy, so callers may
+    modify it. With ``cache_dir=None`` the result is only memoized in-process.
+    """
+    key = config_key(Path(config_path).read_bytes())
+    blob = _BLOBS.get(key)
+    if blob is None:
+        path = Path(cache_dir) / f"config_{key}.pkl" if cache_dir is not None else None
+        if path is not None and path.is_file():
+            blob = path.read_bytes()
+        else:
+            blob = pickle.dumps(compile_config(config_path), protocol=pickle.HIGHEST_PROTOCOL)
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+                tmp.write_bytes(blob)
+                os.replace(tmp, path)
+        _BLOBS[key] = blob
+    return pickle.loads(blob)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Validate MID config files and warm the compiled-config cache.")
+    parser.add_argument("configs", nargs="*", help="Config files (default: config/*.yaml).")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument("--no-cache", action="store_true", help="Validate only; do not read or write the cache.")
+    args = parser.parse_args(argv)
+
+    paths = args.configs or sorted(str(p) for p in (TASK_ROOT / "config").glob("*.yaml"))
+    failed = 0
+    for path in paths:
+        try:
+            if args.no_cache:
+                compile_config(path)
+            else:
+                load_compiled_config(path, args.cache_dir)
+        except ValueError as exc:
+            failed += 1
+            print(exc)
+            continue
+        print(f"[Config] ok {path}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,559 @@
+"""
+Columnar, compressed sim event logs (``*_sim_events.evc``).
+
+``sim.log_format: columnar`` makes the headless backend write event logs with
+:class:`ColumnarEventWriter` instead of JSONL. Events are buffered and written
+in chunks. Each chunk holds the fields analyses filter on as fixed-width
+little-endian arrays (``t_s``, ``trial_id``, ``phase``, ``condition``,
+``block``, ``deadline_s``, ``key``, ``rt_s``; string fields as 1-byte dictionary
+codes) plus every remaining field as one zlib-compressed JSON blob. An
+extracted field stays in the blob as a placeholder (``null``, or ``0`` for an
+integer stored in a float column), which keeps the record's key order and
+marks which fields were present. A JSON
+footer records the chunk directory, the dictionaries and, per chunk, the
+trial-id range and phases present, so readers skip chunks that cannot match.
+
+The footer is only written on ``close()``. So that a crashed session stays
+readable, every chunk is also framed by its own header (``CHUNK_MAGIC`` plus
+data and metadata lengths) and followed by its footer entry and the dictionary
+values it introduced, and the file is flushed after each chunk.
+``ColumnarEventLog(path, recover=True)`` rebuilds the index of a file without a
+footer by walking the chunk headers and stops at the first torn chunk;
+``python -m src.event_store recover`` rewrites such files as complete logs.
+
+:class:`ColumnarEventLog` memory-maps a file and returns column views without
+parsing JSON; :func:`scan` pulls selected columns for one phase across many
+files. ``records()`` rebuilds the original event dicts (same keys, values and
+key order), so ``python -m src.event_store to-jsonl`` and ``convert``
+round-trip with JSONL; ``convert`` checks this on every file it writes.
+
+Layout::
+
+    MAGIC | chunk 0 | chunk 1 | ... | footer JSON | u64 footer length | MAGIC
+    chunk = CHUNK_MAGIC | u64 data length | u64 meta length | columns + residual | meta JSON
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import struct
+import zlib
+from itertools import zip_longest
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b"MIDEVC01"
+CHUNK_MAGIC = b"MIDEVCCK"
+_CHUNK_HEAD = struct.Struct("<QQ")
+FORMAT_VERSION = 3
+# Residual placeholders for extracted fields: the column holds the value (as an int for _INT_PLACEHOLDER).
+_PLACEHOLDER = None
+_INT_PLACEHOLDER = 0
+SUFFIX = ".evc"
+LOG_FORMATS = ("jsonl", "columnar")
+NONE_CODE = 255
+# (column, dtype, source): source is the top-level, observation or action field it comes from.
+COLUMNS = (
+    ("event", "u1", ("event",)),
+    ("t_s", "<f8", ("t_s",)),
+    ("trial_id", "<i4", ("observation", "trial_id")),
+    ("phase", "u1", ("observation", "phase")),
+    ("condition", "u1", ("observation", "condition_id")),
+    ("block", "u1", ("observation", "block_id")),
+    ("deadline_s", "<f8", ("observation", "deadline_s")),
+    ("key", "u1", ("action", "key")),
+    ("rt_s", "<f8", ("action", "rt_s")),
+)
+CODED = tuple(name for name, dtype, _ in COLUMNS if dtype == "u1")
+_MISSING = {"u1": NONE_CODE, "<i4": -1, "<f8": math.nan}
+
+
+def _fits(dtype: str, value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, bool):
+        return False
+    if dtype == "u1":
+        return isinstance(value, str)
+    if dtype == "<i4":
+        return isinstance(value, int) and -1 < value < 2**31
+    if isinstance(value, int):
+        return abs(value) < 2**53
+    # NaN would come back as None.
+    return isinstance(value, float) and value == value
+
+
+class ColumnarEventWriter:
+    """Event sink writing chunked columnar ``.evc`` files; same ``write(record)``/``close()`` as the JSONL sink."""
+
+    def __init__(self, path: str | Path, *, chunk_size: int = 4096, level: int = 6):
+        self.path = Path(path)
+        self.chunk_size = int(chunk_size)
+        self.level = int(level)
+        self.dictionaries: Dict[str, List[str]] = {name: [] for name in CODED}
+        self._codes: Dict[str, Dict[str, int]] = {name: {} for name in CODED}
+        self._rows: Dict[str, List[Any]] = {name: [] for name, _, _ in COLUMNS}
+        self._residual: List[Dict[str, Any]] = []
+        self._chunks: List[Dict[str, Any]] = []
+        self._announced = {name: 0 for name in CODED}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "wb")
+        self._f.write(MAGIC)
+
+    def _code(self, column: str, value: Optional[str]) -> int:
+        if value is None:
+            return NONE_CODE
+        code = self._codes[column].get(value)
+        if code is None:
+            code = len(self.dictionaries[column])
+            if code >= NONE_CODE:
+                raise ValueError(f"[EventStore] more than {NONE_CODE} distinct values in column {column!r}")
+            self._codes[column][value] = code
+            self.dictionaries[column].append(value)
+        return code
+
+    def write(self, record: Dict[str, Any]) -> None:
+        residual = dict(record)
+        parts = {"observation": None, "action": None}
+        for part in parts:
+            if isinstance(residual.get(part), dict):
+                parts[part] = residual[part] = dict(residual[part])
+        for name, dtype, source in COLUMNS:
+            holder = residual if len(source) == 1 else parts[source[0]]
+            field = source[-1]
+            if holder is None or field not in holder or not _fits(dtype, holder[field]):
+                value = _MISSING[dtype]
+            else:
+                raw = holder[field]
+                holder[field] = _INT_PLACEHOLDER if dtype == "<f8" and isinstance(raw, int) else _PLACEHOLDER
+                value = self._code(name, raw) if dtype == "u1" else _MISSING[dtype] if raw is None else raw
+            self._rows[name].append(value)
+        self._residual.append(residual)
+        if len(self._residual) >= self.chunk_size:
+            self.flush()
+
+    def _pad(self) -> None:
+        pad = -self._f.tell() % 8
+        if pad:
+            self._f.write(b"\0" * pad)
+
+    def flush(self) -> None:
+        """Write buffered events as one self-describing chunk and flush it to the OS."""
+        n = len(self._residual)
+        if not n:
+            return
+        self._pad()
+        data_start = self._f.tell() + len(CHUNK_MAGIC) + _CHUNK_HEAD.size
+        trial_ids = np.asarray(self._rows["trial_id"], dtype="<i4")
+        valid = trial_ids[trial_ids >= 0]
+        chunk: Dict[str, Any] = {
+            "version": FORMAT_VERSION,
+            "n": n,
+            "columns": {},
+            "trial_min": int(valid.min()) if len(valid) else None,
+            "trial_max": int(valid.max()) if len(valid) else None,
+            "phases": sorted(set(self._rows["phase"])),
+        }
+        parts: List[bytes] = []
+        size = 0
+        for name, dtype, _ in COLUMNS:
+            pad = -size % 8
+            if pad:
+                parts.append(b"\0" * pad)
+                size += pad
+            data = np.asarray(self._rows[name], dtype=dtype).tobytes()
+            chunk["columns"][name] = [data_start + size, len(data)]
+            parts.append(data)
+            size += len(data)
+            self._rows[name] = []
+        blob = zlib.compress(json.dumps(self._residual, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), self.level)
+        chunk["residual"] = [data_start + size, len(blob)]
+        parts.append(blob)
+        size += len(blob)
+        # Dictionary values first coded in this chunk, so a reader can rebuild the dictionaries without the footer.
+        new_values = {name: self.dictionaries[name][self._announced[name]:] for name in CODED}
+        self._announced = {name: len(self.dictionaries[name]) for name in CODED}
+        meta = json.dumps({**chunk, "new_values": new_values}, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self._f.write(CHUNK_MAGIC + _CHUNK_HEAD.pack(size, len(meta)))
+        self._f.write(b"".join(parts))
+        self._f.write(meta)
+        self._f.flush()
+        self._chunks.append(chunk)
+        self._residual = []
+
+    def close(self) -> None:
+        if self._f is None:
+            return
+        self.flush()
+        footer = json.dumps(
+            {"version": FORMAT_VERSION, "columns": [[n, d] for n, d, _ in COLUMNS], "dictionaries": self.dictionaries, "chunks": self._chunks},
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode("utf-8")
+        self._f.write(footer)
+        self._f.write(struct.pack("<Q", len(footer)))
+        self._f.write(MAGIC)
+        self._f.close()
+        self._f = None
+
+    def __enter__(self) -> "ColumnarEventWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonlEventWriter:
+    """The original one-JSON-object-per-line sink."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "w", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def log_suffix(log_format: str) -> str:
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"[EventStore] log_format must be one of {LOG_FORMATS}, got {log_format!r}")
+    return SUFFIX if log_format == "columnar" else ".jsonl"
+
+
+def open_event_sink(path: str | Path, log_format: str = "jsonl"):
+    log_suffix(log_format)
+    return ColumnarEventWriter(path) if log_format == "columnar" else JsonlEventWriter(path)
+
+
+class ColumnarEventLog:
+    """
+    Memory-mapped reader for one ``.evc`` file.
+
+    A file without a footer (the writer never reached ``close()``) raises
+    ``ValueError`` unless ``recover=True``, which indexes every complete chunk
+    from the chunk headers; ``recovered`` is then True.
+    """
+
+    def __init__(self, path: str | Path, *, recover: bool = False):
+        self.path = Path(path)
+        self.buf = np.memmap(self.path, dtype=np.uint8, mode="r") if self.path.stat().st_size else np.zeros(0, dtype=np.uint8)
+        if bytes(self.buf[:8]) != MAGIC:
+            raise ValueError(f"[EventStore] {self.path} is not a columnar event log")
+        self.dtypes = {name: dtype for name, dtype, _ in COLUMNS}
+        self.recovered = len(self.buf) < 24 or bytes(self.buf[-8:]) != MAGIC
+        if self.recovered:
+            if not recover:
+                raise ValueError(
+                    f"[EventStore] {self.path} is not a complete columnar event log "
+                    f"(no footer); recover it with `python -m src.event_store recover {self.path}`"
+                )
+            self.dictionaries, self.chunks = self._scan_chunks()
+            return
+        (footer_len,) = struct.unpack("<Q", bytes(self.buf[-16:-8]))
+        footer = json.loads(bytes(self.buf[-16 - footer_len:-16]).decode("utf-8"))
+        self.dtypes = dict(footer["columns"])
+        self.dictionaries: Dict[str, List[str]] = footer["dictionaries"]
+        self.chunks: List[Dict[str, Any]] = footer["chunks"]
+
+    def _scan_chunks(self):
+        """Index every complete chunk by walking the chunk headers from the start of the file."""
+        dictionaries: Dict[str, List[str]] = {name: [] for name in CODED}
+        chunks: List[Dict[str, Any]] = []
+        pos, size = len(MAGIC), len(self.buf)
+        head = len(CHUNK_MAGIC) + _CHUNK_HEAD.size
+        while True:
+            pos += -pos % 8
+            if pos + head > size or bytes(self.buf[pos:pos + len(CHUNK_MAGIC)]) != CHUNK_MAGIC:
+                break
+            data_len, meta_len = _CHUNK_HEAD.unpack(bytes(self.buf[pos + len(CHUNK_MAGIC):pos + head]))
+            end = pos + head + data_len + meta_len
+            if end > size:
+                break
+            try:
+                meta = json.loads(bytes(self.buf[end - meta_len:end]).decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                break
+            for name, values in meta.pop("new_values").items():
+                dictionaries[name].extend(values)
+            chunks.append(meta)
+            pos = end
+        return dictionaries, chunks
+
+    def __len__(self) -> int:
+        return sum(chunk["n"] for chunk in self.chunks)
+
+    def code(self, column: str, value: str) -> Optional[int]:
+        try:
+            return self.dictionaries[column].index(value)
+        except ValueError:
+            return None
+
+    def _view(self, chunk: Dict[str, Any], name: str) -> np.ndarray:
+        offset, nbytes = chunk["columns"][name]
+        return self.buf[offset:offset + nbytes].view(self.dtypes[name])
+
+    def _chunks_for(self, phase_code: Optional[int], trial_id: Optional[int]) -> List[Dict[str, Any]]:
+        out = []
+        for chunk in self.chunks:
+            if phase_code is not None and phase_code not in chunk["phases"]:
+                continue
+            if trial_id is not None and (chunk["trial_min"] is None or not chunk["trial_min"] <= trial_id <= chunk["trial_max"]):
+                continue
+            out.append(chunk)
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """Whole column (codes for dictionary columns); a zero-copy view for single-chunk files."""
+        views = [self._view(chunk, name) for chunk in self.chunks]
+        if len(views) == 1:
+            return views[0]
+        return np.concatenate(views) if views else np.empty(0, dtype=self.dtypes[name])
+
+    def select(
+        self,
+        phase: Optional[str] = None,
+        trial_id: Optional[int] = None,
+        columns: Sequence[str] = tuple(name for name, _, _ in COLUMNS),
+    ) -> Dict[str, np.ndarray]:
+        """Rows matching ``phase``/``trial_id`` as ``{column: array}`` (dictionary columns as codes)."""
+        phase_code = None
+        if phase is not None:
+            phase_code = self.code("phase", phase)
+            if phase_code is None:
+                return {name: np.empty(0, dtype=self.dtypes[name]) for name in columns}
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in columns}
+        for chunk in self._chunks_for(phase_code, trial_id):
+            mask = np.ones(chunk["n"], dtype=bool)
+            if phase_code is not None:
+                mask &= self._view(chunk, "phase") == phase_code
+            if trial_id is not None:
+                mask &= self._view(chunk, "trial_id") == trial_id
+            for name in columns:
+                parts[name].append(self._view(chunk, name)[mask])
+        return {
+            name: np.concatenate(arrays) if arrays else np.empty(0, dtype=self.dtypes[name])
+            for name, arrays in parts.items()
+        }
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Rebuild the original event dicts, one chunk in memory at a time."""
+        for chunk in self.chunks:
+            offset, nbytes = chunk["residual"]
+            residuals = json.loads(zlib.decompress(bytes(self.buf[offset:offset + nbytes])).decode("utf-8"))
+            views = {name: self._view(chunk, name) for name, _, _ in COLUMNS}
+            rebuild = self._rebuild if chunk.get("version", 1) >= 3 else self._rebuild_v2
+            for i, record in enumerate(residuals):
+                yield rebuild(record, views, i)
+
+    def _rebuild(self, record: Dict[str, Any], views: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+        """Fill the placeholders of one residual record from the columns, in place."""
+        for name, dtype, source in COLUMNS:
+            holder = record if len(source) == 1 else record.get(source[0])
+            field = source[-1]
+            if not isinstance(holder, dict) or field not in holder:
+                continue
+            marker = holder[field]
+            if marker is not _PLACEHOLDER and not (dtype == "<f8" and marker == _INT_PLACEHOLDER and type(marker) is int):
+                continue
+            raw = views[name][i]
+            if dtype == "u1":
+                holder[field] = None if raw == NONE_CODE else self.dictionaries[name][raw]
+            elif dtype == "<i4":
+                holder[field] = None if raw < 0 else int(raw)
+            elif math.isnan(raw):
+                holder[field] = None
+            else:
+                holder[field] = int(raw) if marker is not _PLACEHOLDER else float(raw)
+        return record
+
+    def _rebuild_v2(self, record: Dict[str, Any], views: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+        """Rebuild a record from a chunk written before placeholders (fields were removed from the residual)."""
+        extracted: Dict[str, Dict[str, Any]] = {"": {}, "observation": {}, "action": {}}
+        for name, dtype, source in COLUMNS:
+            raw = views[name][i]
+            if dtype == "u1":
+                value = None if raw == NONE_CODE else self.dictionaries[name][raw]
+                present = raw != NONE_CODE or source[-1] != "event"
+            elif dtype == "<i4":
+                value, present = (None if raw < 0 else int(raw)), True
+            else:
+                value, present = (None if math.isnan(raw) else float(raw)), True
+            holder = "" if len(source) == 1 else source[0]
+            if present:
+                extracted[holder][source[-1]] = value
+        out: Dict[str, Any] = {}
+        if "event" in extracted[""] and extracted[""]["event"] is not None:
+            out["event"] = extracted[""]["event"]
+        for key, value in record.items():
+            if key in ("observation", "action") and isinstance(value, dict):
+                value = {**extracted[key], **value}
+            out[key] = value
+        if extracted[""]["t_s"] is not None:
+            out.setdefault("t_s", extracted[""]["t_s"])
+        return out
+
+
+def scan(
+    paths: Iterable[str | Path],
+    phase: Optional[str] = None,
+    columns: Sequence[str] = ("trial_id", "condition", "deadline_s", "key", "rt_s"),
+):
+    """
+    Concatenate ``columns`` of every ``phase`` row across ``paths`` into one
+    DataFrame. ``session`` is the index into ``paths`` (also in ``df.attrs["sessions"]``).
+    """
+    import pandas as pd
+
+    labels: Dict[str, Dict[str, int]] = {name: {} for name in columns if name in CODED}
+    data: Dict[str, List[np.ndarray]] = {name: [] for name in columns}
+    sessions: List[np.ndarray] = []
+    names: List[str] = []
+    for i, path in enumerate(paths):
+        log = ColumnarEventLog(path)
+        rows = log.select(phase=phase, columns=columns)
+        n = len(next(iter(rows.values()))) if rows else 0
+        for name in columns:
+            values = rows[name]
+            if name in labels:
+                # Remap this file's dictionary codes onto one global dictionary.
+                lookup = np.full(256, -1, dtype=np.int16)
+                for code, label in enumerate(log.dictionaries[name]):
+                    lookup[code] = labels[name].setdefault(label, len(labels[name]))
+                values = lookup[values]
+            data[name].append(values)
+        sessions.append(np.full(n, i, dtype=np.int32))
+        names.append(str(path))
+    frame: Dict[str, Any] = {"session": np.concatenate(sessions) if sessions else np.empty(0, dtype=np.int32)}
+    for name in columns:
+        values = np.concatenate(data[name]) if data[name] else np.empty(0)
+        if name in labels:
+            frame[name] = pd.Categorical.from_codes(values, categories=list(labels[name]))
+        else:
+            frame[name] = values
+    df = pd.DataFrame(frame)
+    df.attrs["sessions"] = names
+    return df
+
+
+def iter_events(path: str | Path, event: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield event dicts from a JSONL or columnar log, one at a time (optionally only ``event`` records)."""
+    if Path(path).suffix == SUFFIX:
+        records: Iterable[Dict[str, Any]] = ColumnarEventLog(path).records()
+        for record in records:
+            if event is None or record.get("event") == event:
+                yield record
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if event is None or record.get("event") == event:
+                yield record
+
+
+def recover(src: str | Path, dst: Optional[str | Path] = None) -> Path:
+    """
+    Rewrite the complete chunks of a footer-less ``.evc`` (crashed writer) as a
+    complete log; in place unless ``dst`` is given. Events of a torn final chunk are lost.
+    """
+    src = Path(src)
+    dst = Path(dst) if dst else src
+    tmp = dst.with_name(dst.name + ".recover.tmp")
+    log = ColumnarEventLog(src, recover=True)
+    sink = ColumnarEventWriter(tmp)
+    try:
+        for record in log.records():
+            sink.write(record)
+    finally:
+        sink.close()
+        del log
+    tmp.replace(dst)
+    return dst
+
+
+def convert(src: str | Path, dst: Optional[str | Path] = None, log_format: Optional[str] = None, verify: bool = True) -> Path:
+    """
+    Convert between JSONL and columnar logs (direction from ``src``'s suffix
+    unless ``log_format`` is given); with ``verify`` the result is read back and
+    compared event by event with ``src`` (:func:`verify_roundtrip`).
+    """
+    src = Path(src)
+    log_format = log_format or ("jsonl" if src.suffix == SUFFIX else "columnar")
+    dst = Path(dst) if dst else src.with_suffix(log_suffix(log_format))
+    sink = open_event_sink(dst, log_format)
+    try:
+        for record in iter_events(src):
+            sink.write(record)
+    finally:
+        sink.close()
+    if verify:
+        verify_roundtrip(src, dst)
+    return dst
+
+
+def verify_roundtrip(a: str | Path, b: str | Path) -> int:
+    """
+    Check that two logs (either format) hold the same events with the same keys,
+    values and key order; raises ``ValueError`` at the first difference.
+    Returns the event count.
+    """
+    n = 0
+    missing = object()
+    for n, (left, right) in enumerate(zip_longest(iter_events(a), iter_events(b), fillvalue=missing), start=1):
+        if left is missing or right is missing:
+            raise ValueError(f"[EventStore] {a} and {b} differ in length after {n - 1} events")
+        if json.dumps(left, ensure_ascii=False) != json.dumps(right, ensure_ascii=False):
+            raise ValueError(f"[EventStore] {a} and {b} differ at event #{n}: {left!r} != {right!r}")
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert and query columnar MID sim event logs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="JSONL -> .evc (one output per input, next to it).")
+    conv.add_argument("logs", nargs="+")
+    back = sub.add_parser("to-jsonl", help=".evc -> JSONL.")
+    back.add_argument("logs", nargs="+")
+    rec = sub.add_parser("recover", help="Rebuild .evc logs left without a footer by a crash (in place).")
+    rec.add_argument("logs", nargs="+")
+    scan_p = sub.add_parser("scan", help="Summarize one phase's actions across many .evc logs.")
+    scan_p.add_argument("logs", nargs="+")
+    scan_p.add_argument("--phase", default="target_response_window")
+    args = parser.parse_args(argv)
+
+    if args.command in ("convert", "to-jsonl"):
+        fmt = "columnar" if args.command == "convert" else "jsonl"
+        for path in args.logs:
+            out = convert(path, log_format=fmt)
+            print(f"[EventStore] {path} ({Path(path).stat().st_size} B) -> {out} ({out.stat().st_size} B)")
+    elif args.command == "recover":
+        for path in args.logs:
+            log = ColumnarEventLog(path, recover=True)
+            if not log.recovered:
+                print(f"[EventStore] {path} is complete; nothing to recover")
+                continue
+            n = len(log)
+            del log
+            recover(path)
+            print(f"[EventStore] {path}: recovered {n} events")
+    else:
+        df = scan(args.logs, phase=args.phase)
+        pressed = df["key"].notna()
+        print(f"[EventStore] {len(df)} {args.phase} events in {len(args.logs)} logs; {int(pressed.sum())} with a key press")
+        if len(df):
+            print(df[pressed].groupby("condition", observed=True)["rt_s"].describe().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+"""
+Parameter recovery for the ``MidSamplerResponder`` model.
+
+The sampler responds to a target with probability ``p_hit_<condition>``; the
+raw RT is ``Normal(rt_mu_<condition>, rt_sigma)``, clamped up to ``rt_min_s``,
+and the press only registers if it falls inside the adaptive target window
+(``target_duration``; with frame polling, before the window's last frame).
+A registered RT is only known to the frame it was polled on. Anticipation
+presses are Bernoulli(``p_early``). Per trial the likelihood is therefore
+
+- press at ``rt``: ``p * P(raw in (rt - frame_time, rt])`` (lower edge open
+  to -inf in the ``rt_min_s`` frame);
+- no press: ``(1 - p) + p * P(raw > target_duration)`` — the RT is censored at
+  the deadline (always late when the window is shorter than ``rt_min_s``).
+
+:func:`fit_arrays` maximizes it by EM for many subjects at once: trial tables
+are packed into padded ``(subjects, trials)`` arrays and every E/M step is a
+handful of NumPy expressions (truncated-normal moments for the censored and
+interval-observed RTs, closed-form updates for ``p``, ``mu`` and ``sigma``), accelerated with
+SQUAREM, and converged subjects drop out of the working arrays. :func:`fit_table` splits subjects into chunks across a process pool.
+:func:`run_recovery` draws true parameters per subject, simulates them through
+the headless task (``src/headless.py``, real controller and deadlines), fits
+the trial tables and reports bias, RMSE and correlation per parameter.
+
+Usage::
+
+    python -m src.fit fit outputs/sim_population/population_trials.csv --by param_set seed --workers 8
+    python -m src.fit recover --config config/config_sampler_sim.yaml --subjects 500 --trials 180 --workers 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CONDITIONS = ("win", "lose", "neut")
+_BOUND = 40.0  # standardized bound used for +/- infinity (phi(40) underflows to 0)
+_MAX_STEP = 1e3  # cap on the SQUAREM step length |alpha|
+MIN_TRIALS_PER_CONDITION = 20  # below this, fit_table warns that p_hit estimates are unreliable
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF via a Chebyshev ``erfc`` fit (relative error < 1.2e-7)."""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 + t * (
+        0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    erfc = t * np.exp(poly)
+    return np.where(x >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+@dataclass
+class PackedTrials:
+    """Padded per-subject trial arrays; ``mask`` marks real trials."""
+
+    subjects: List[Tuple[Any, ...]]
+    conditions: Tuple[str, ...]
+    cond: np.ndarray  # (S, T) int, index into ``conditions``
+    deadline: np.ndarray  # (S, T) target_duration
+    pressed: np.ndarray  # (S, T) bool
+    rt: np.ndarray  # (S, T) registered target RT (NaN without a press)
+    early: np.ndarray  # (S, T) bool anticipation press
+    mask: np.ndarray  # (S, T) bool
+
+    def take(self, rows) -> "PackedTrials":
+        """Subset of subjects (a slice or an index array)."""
+        subjects = self.subjects[rows] if isinstance(rows, slice) else [self.subjects[i] for i in rows]
+        return PackedTrials(subjects, self.conditions, self.cond[rows], self.deadline[rows],
+                            self.pressed[rows], self.rt[rows], self.early[rows], self.mask[rows])
+
+
+def pack_trials(df, by: Sequence[str] = ("param_set", "seed"), conditions: Optional[Sequence[str]] = None) -> PackedTrials:
+    """Pack a (multi-subject) MID trial table into padded arrays, one row per ``by`` group."""
+    by = [c for c in by if c in df.columns]
+    if by:
+        group = df.groupby(by, sort=True, dropna=False).ngroup().to_numpy()
+        keys = df[by].drop_duplicates().sort_values(by)
+        subjects = list(keys.itertuples(index=False, name=None))
+    else:
+        group = np.zeros(len(df), dtype=np.int64)
+        subjects = [()]
+    order = np.argsort(group, kind="stable")
+    group = group[order]
+    n_subjects = len(subjects)
+    counts = np.bincount(group, minlength=n_subjects)
+    pos = np.arange(len(group)) - np.repeat(np.cumsum(counts) - counts, counts)
+    shape = (n_subjects, int(counts.max()) if len(counts) else 0)
+
+    conditions = tuple(conditions) if conditions is not None else tuple(c for c in CONDITIONS if c in set(df["condition"])) + tuple(
+        sorted(set(df["condition"].astype(str)) - set(CONDITIONS)))
+    code = {c: i for i, c in enumerate(conditions)}
+
+    def column(name: str, fill, dtype):
+        out = np.full(shape, fill, dtype=dtype)
+        out[group, pos] = df[name].to_numpy(dtype=dtype, na_value=fill)[order]
+        return out
+
+    cond = np.full(shape, -1, dtype=np.int64)
+    cond[group, pos] = df["condition"].astype(str).map(code).fillna(-1).to_numpy(dtype=np.int64)[order]
+    pressed = df["target_key_press"].fillna(False).astype(bool)
+    early = df["anticipation_key_press"].fillna(False).astype(bool) if "anticipation_key_press" in df else pressed & False
+    mask = np.zeros(shape, dtype=bool)
+    mask[group, pos] = True
+    mask &= cond >= 0
+    packed_pressed = np.zeros(shape, dtype=bool)
+    packed_pressed[group, pos] = pressed.to_numpy()[order]
+    packed_early = np.zeros(shape, dtype=bool)
+    packed_early[group, pos] = early.to_numpy()[order]
+    return PackedTrials(
+        subjects=subjects,
+        conditions=conditions,
+        cond=np.where(mask, cond, 0),
+        deadline=column("target_duration", np.nan, float),
+        pressed=packed_pressed & mask,
+        rt=np.where(packed_pressed & mask, column("target_rt", np.nan, float), np.nan),
+        early=packed_early & mask,
+        mask=mask,
+    )
+
+
+def _truncated_moments(mu, sigma, lo, hi):
+    """Probability mass, E[x] and E[x^2] of Normal(mu, sigma) restricted to (lo, hi)."""
+    a = np.clip((lo - mu) / sigma, -_BOUND, _BOUND)
+    b = np.clip((hi - mu) / sigma, -_BOUND, _BOUND)
+    mass = np.maximum(norm_cdf(b) - norm_cdf(a), 1e-300)
+    pa, pb = norm_pdf(a), norm_pdf(b)
+    with np.errstate(over="ignore", invalid="ignore"):
+        lam = (pa - pb) / mass
+        mean = np.clip(mu + sigma * lam, lo, hi)
+        var = sigma * sigma * (1.0 + (a * pa - b * pb) / mass - lam * lam)
+    # Far in the tail the ratios lose all precision; the interval bounds the variance anyway.
+    var = np.clip(np.nan_to_num(var, nan=0.0, posinf=0.0), 0.0, 0.25 * (hi - lo) ** 2)
+    return mass, mean, var + mean * mean
+
+
+def _upper_tail_moments(mu, sigma, lo):
+    """:func:`_truncated_moments` on ``(lo, inf)`` without evaluating the infinite edge."""
+    a = np.clip((lo - mu) / sigma, -_BOUND, _BOUND)
+    mass = np.maximum(norm_cdf(-a), 1e-300)
+    pa = norm_pdf(a)
+    lam = pa / mass
+    mean = np.maximum(mu + sigma * lam, lo)
+    var = sigma * sigma * np.maximum(1.0 + a * pa / mass - lam * lam, 0.0)
+    return mass, mean, var + mean * mean
+
+
+class _EM:
+    """Flattened trials of one chunk of subjects and the EM update on them."""
+
+    def __init__(self, data: PackedTrials, rt_min: float, frame_time: float):
+        self.S = data.mask.shape[0]
+        self.C = len(data.conditions)
+        # Work on the real trials only, split once into pressed / not pressed.
+        subj = np.nonzero(data.mask)[0]
+        cell = subj * self.C + data.cond[data.mask]  # flat (subject, condition) index
+        pressed = data.pressed[data.mask]
+        self.s_p, self.cell_p = subj[pressed], cell[pressed]
+        self.s_n, self.cell_n = subj[~pressed], cell[~pressed]
+
+        # Interval each observed RT came from; the rt_min frame is open below.
+        self.rt = data.rt[data.mask][pressed]
+        lo_p = self.rt - frame_time if frame_time > 0 else self.rt
+        self.lo_p = np.where(lo_p < rt_min, -np.inf, lo_p)
+        self.point = np.isfinite(self.lo_p) & (frame_time <= 0)
+        deadline = data.deadline[data.mask][~pressed]
+        if frame_time > 0:
+            # A press is polled on the next flip and must land before the window's last frame.
+            deadline = (np.round(deadline / frame_time) - 1) * frame_time
+        # No press: late attempt above the deadline, or any RT when the window is shorter than rt_min.
+        self.lo_n = np.where(deadline >= rt_min, deadline, -np.inf)
+
+        self.n_cell = self.per_cell(cell).astype(float)
+        self.hits_cell = self.per_cell(self.cell_p).astype(float)
+
+    def per_cell(self, index, weights=None):
+        return np.bincount(index, weights=weights, minlength=self.S * self.C)
+
+    def start(self):
+        p = np.clip(self.hits_cell / np.maximum(self.n_cell, 1), 0.05, 0.95)
+        mean_rt = float(self.rt.mean()) if len(self.rt) else 0.3
+        mu = np.where(self.hits_cell > 0, self.per_cell(self.cell_p, self.rt) / np.maximum(self.hits_cell, 1), mean_rt)
+        return p, mu, np.full(self.S, 0.05)
+
+    def step(self, p, mu, sigma):
+        """One EM update; returns the new parameters and the per-subject log-likelihood of the old ones."""
+        S, C = self.S, self.C
+        mass_p, ex_p, ex2_p = _truncated_moments(mu[self.cell_p], sigma[self.s_p], self.lo_p, self.rt)
+        if self.point.any():
+            pt = self.point
+            mass_p[pt] = norm_pdf((self.rt[pt] - mu[self.cell_p][pt]) / sigma[self.s_p][pt]) / sigma[self.s_p][pt]
+            ex_p[pt] = self.rt[pt]
+            ex2_p[pt] = self.rt[pt] ** 2
+        late, ex_n, ex2_n = _upper_tail_moments(mu[self.cell_n], sigma[self.s_n], self.lo_n)
+        p_n = p[self.cell_n]
+        no_press = (1.0 - p_n) + p_n * late
+        loglik = (np.bincount(self.s_p, np.log(p[self.cell_p] * mass_p + 1e-300), minlength=S)
+                  + np.bincount(self.s_n, np.log(no_press + 1e-300), minlength=S))
+
+        # E-step: weight of "attempted, but late" for every unanswered trial.
+        w_n = p_n * late / no_press
+        # M-step: closed-form p, mu per (subject, condition) and pooled sigma per subject.
+        w_cell = self.hits_cell + self.per_cell(self.cell_n, w_n)
+        sum_x = self.per_cell(self.cell_p, ex_p) + self.per_cell(self.cell_n, w_n * ex_n)
+        sum_x2 = self.per_cell(self.cell_p, ex2_p) + self.per_cell(self.cell_n, w_n * ex2_n)
+        p = np.clip(w_cell / np.maximum(self.n_cell, 1), 1e-6, 1 - 1e-6)
+        mu = np.where(w_cell > 0, sum_x / np.maximum(w_cell, 1e-12), mu)
+        ss = (sum_x2 - 2 * mu * sum_x + mu * mu * w_cell).reshape(S, C).sum(axis=1)
+        sigma = np.sqrt(np.maximum(ss / np.maximum(w_cell.reshape(S, C).sum(axis=1), 1e-12), 1e-6))
+        return p, mu, sigma, loglik
+
+    # SQUAREM works on an unconstrained vector per subject: (logit p, mu) per condition, log sigma.
+    def pack(self, p, mu, sigma):
+        return np.concatenate([np.log(p / (1 - p)).reshape(self.S, self.C), mu.reshape(self.S, self.C), np.log(sigma)[:, None]], axis=1)
+
+    def unpack(self, x):
+        C = self.C
+        p = np.clip(1.0 / (1.0 + np.exp(-np.clip(x[:, :C], -30, 30))), 1e-6, 1 - 1e-6).ravel()
+        return p, x[:, C:2 * C].ravel(), np.exp(np.clip(x[:, -1], np.log(1e-3), 0.0))
+
+
+def fit_arrays(
+    data: PackedTrials,
+    *,
+    rt_min: float = 0.12,
+    frame_time: float = 1 / 60,
+    max_iter: int = 1000,
+    tol: float = 1e-6,
+) -> Dict[str, np.ndarray]:
+    """
+    EM fit of every subject in ``data`` at once. Each iteration is one
+    SQUAREM step (two EM updates give a per-subject extrapolation that is
+    kept only if it does not lower that subject's likelihood). A subject stops
+    when its log-likelihood improves by less than ``tol``; converged subjects
+    are dropped from the working arrays, so the few slow fits near
+    ``p_hit -> 1`` do not keep the whole batch iterating. Returns ``(S,)``
+    arrays for ``p_hit_<c>``, ``rt_mu_<c>``, ``rt_sigma``, ``p_early``, plus
+    ``loglik``, ``n_trials`` and ``n_iter``.
+    """
+    S, C = data.mask.shape[0], len(data.conditions)
+    p_all, mu_all = np.full((S, C), np.nan), np.full((S, C), np.nan)
+    sigma_all, ll_all = np.full(S, np.nan), np.full(S, -np.inf)
+    iters = np.zeros(S, dtype=np.int64)
+
+    idx = np.arange(S)  # global subject index of each working row
+    live = np.ones(S, dtype=bool)
+    em = _EM(data, rt_min, frame_time)
+    p, mu, sigma = em.start()
+    prev = np.full(S, -np.inf)
+    for n_iter in range(1, max_iter + 1):
+        p1, mu1, sigma1, loglik = em.step(p, mu, sigma)
+        done = live & ((loglik - prev < tol) | (n_iter == max_iter))
+        if done.any():
+            rows = idx[done]
+            p_all[rows], mu_all[rows] = p.reshape(-1, C)[done], mu.reshape(-1, C)[done]
+            sigma_all[rows], ll_all[rows], iters[rows] = sigma[done], loglik[done], n_iter
+            live &= ~done
+            if not live.any():
+                break
+            # Shrink the working set once it is mostly converged subjects.
+            if live.sum() <= len(idx) // 2:
+                cells = np.repeat(live, C)
+                idx = idx[live]
+                em = _EM(data.take(idx), rt_min, frame_time)
+                p, mu, sigma, p1, mu1, sigma1 = p[cells], mu[cells], sigma[live], p1[cells], mu1[cells], sigma1[live]
+                loglik = loglik[live]
+                live = np.ones(len(idx), dtype=bool)
+        prev = loglik
+        p2, mu2, sigma2, _ = em.step(p1, mu1, sigma1)
+        # A wild extrapolation (p at 0/1, huge mu) is non-finite or lowers the
+        # likelihood and is rejected below, so its float warnings are noise.
+        with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+            x0, x1, x2 = em.pack(p, mu, sigma), em.pack(p1, mu1, sigma1), em.pack(p2, mu2, sigma2)
+            r, v = x1 - x0, x2 - 2 * x1 + x0
+            alpha = -np.sqrt((r * r).sum(axis=1)) / np.maximum(np.sqrt((v * v).sum(axis=1)), 1e-300)
+            alpha = np.clip(np.nan_to_num(alpha, nan=-1.0), -_MAX_STEP, -1.0)[:, None]
+            p3, mu3, sigma3 = em.unpack(x0 - 2 * alpha * r + alpha * alpha * v)
+            p4, mu4, sigma4, loglik3 = em.step(p3, mu3, sigma3)
+        ok = np.isfinite(loglik3) & (loglik3 >= loglik) & np.isfinite(sigma4)
+        ok &= np.isfinite(p4).reshape(-1, C).all(axis=1) & np.isfinite(mu4).reshape(-1, C).all(axis=1)
+        cells = np.repeat(ok, C)
+        p, mu, sigma = np.where(cells, p4, p2), np.where(cells, mu4, mu2), np.where(ok, sigma4, sigma2)
+
+    n_trials = data.mask.sum(axis=1)
+    n_early = data.early.sum(axis=1)
+    p_early = n_early / np.maximum(n_trials, 1)
+    loglik = ll_all + np.where(n_early > 0, n_early * np.log(np.maximum(p_early, 1e-300)), 0.0) + np.where(
+        n_trials - n_early > 0, (n_trials - n_early) * np.log(np.maximum(1 - p_early, 1e-300)), 0.0)
+    empty = np.stack([((data.cond == i) & data.mask).sum(axis=1) == 0 for i in range(C)], axis=1)
+    p, mu = np.where(empty, np.nan, p_all), np.where(empty, np.nan, mu_all)
+    out: Dict[str, np.ndarray] = {}
+    for i, c in enumerate(data.conditions):
+        out[f"p_hit_{c}"] = p[:, i]
+        out[f"rt_mu_{c}"] = mu[:, i]
+    out["rt_sigma"] = sigma_all
+    out["p_early"] = p_early
+    out["loglik"] = loglik
+    out["n_trials"] = n_trials
+    out["n_iter"] = iters
+    return out
+
+
+def _fit_chunk(args: Tuple[PackedTrials, Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    data, kwargs = args
+    return fit_arrays(data, **kwargs)
+
+
+def fit_table(
+    df,
+    by: Sequence[str] = ("param_set", "seed"),
+    *,
+    workers: int = 1,
+    chunk_size: int = 1024,
+    **fit_kwargs,
+):
+    """Fit every ``by`` group of a trial table; returns one DataFrame row per subject."""
+    import pandas as pd
+
+    data = pack_trials(df, by)
+    n = len(data.subjects)
+    per_cell = np.stack([((data.cond == i) & data.mask).sum(axis=1) for i in range(len(data.conditions))], axis=1)
+    if per_cell.size and per_cell.min() < MIN_TRIALS_PER_CONDITION:
+        print(
+            f"[Warning] {int((per_cell < MIN_TRIALS_PER_CONDITION).any(axis=1).sum())}/{n} subjects have fewer than "
+            f"{MIN_TRIALS_PER_CONDITION} trials in some condition (min {int(per_cell.min())}); "
+            "p_hit fits will often sit on the 0/1 bounds"
+        )
+    chunks = [(data.take(slice(i, i + chunk_size)), fit_kwargs) for i in range(0, n, chunk_size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_fit_chunk, chunks))
+    else:
+        parts = [_fit_chunk(c) for c in chunks]
+    by = [c for c in by if c in df.columns]
+    fits = pd.DataFrame({k: np.concatenate([part[k] for part in parts]) for k in parts[0]}) if parts else pd.DataFrame()
+    for i, name in enumerate(by):
+        fits.insert(i, name, [s[i] for s in data.subjects])
+    return fits
+
+
+# --- recovery ---------------------------------------------------------------
+
+TRUTH_RANGES = {
+    "p_hit": (0.5, 0.95),
+    "rt_mu": (0.2, 0.34),
+    "rt_sigma": (0.03, 0.08),
+    "p_early": (0.0, 0.06),
+}
+
+
+def draw_truth(n_subjects: int, seed: int = 0, conditions: Sequence[str] = CONDITIONS) -> List[Dict[str, float]]:
+    """Independent uniform draws of every sampler parameter per subject (``TRUTH_RANGES``)."""
+    rng = np.random.default_rng(seed)
+    cols: Dict[str, np.ndarray] = {}
+    for c in conditions:
+        cols[f"p_hit_{c}"] = rng.uniform(*TRUTH_RANGES["p_hit"], n_subjects)
+        cols[f"rt_mu_{c}"] = rng.uniform(*TRUTH_RANGES["rt_mu"], n_subjects)
+    cols["rt_sigma"] = rng.uniform(*TRUTH_RANGES["rt_sigma"], n_subjects)
+    cols["p_early"] = rng.uniform(*TRUTH_RANGES["p_early"], n_subjects)
+    return [{k: round(float(v[i]), 6) for k, v in cols.items()} for i in range(n_subjects)]
+
+
+def _simulate_subject(job: Tuple[str, int, Dict[str, float], Optional[int]]):
+    from .headless import load_responder, run_headless
+    from .population import _load_config, session_seed
+
+    config_path, subject, params, n_trials = job
+    cfg = _load_config(config_path)
+    if n_trials:
+        blocks = int(cfg["task_config"].get("total_blocks", 1))
+        cfg = {**cfg, "task_config": {**cfg["task_config"], "total_trials": n_trials, "trial_per_block": -(-n_trials // blocks)}}
+    cfg = {**cfg, "controller_config": {**cfg["controller_config"], "enable_logging": False}}
+    sim_cfg = dict(cfg["raw"].get("sim", {}) or {})
+    responder_cfg = dict(sim_cfg.get("responder", {}) or {})
+    responder_cfg["kwargs"] = {**(responder_cfg.get("kwargs") or {}), **params}
+    result = run_headless(
+        cfg,
+        seed=session_seed(subject, "recovery"),
+        participant_id=f"rec{subject:05d}",
+        responder=load_responder({**sim_cfg, "responder": responder_cfg}),
+        write_outputs=False,
+    )
+    trials = result.trials.to_dataframe()
+    trials.insert(0, "subject", subject)
+    return trials
+
+
+def recovery_report(truth, fits) -> "Any":
+    """Bias, RMSE and Pearson r of fitted vs. true values, one row per parameter."""
+    import pandas as pd
+
+    rows = []
+    for name in truth.columns:
+        if name not in fits.columns or name == "subject":
+            continue
+        t, f = truth[name].to_numpy(float), fits[name].to_numpy(float)
+        ok = np.isfinite(t) & np.isfinite(f)
+        err = f[ok] - t[ok]
+        r = float(np.corrcoef(t[ok], f[ok])[0, 1]) if ok.sum() > 2 and t[ok].std() > 0 and f[ok].std() > 0 else float("nan")
+        rows.append({"parameter": name, "n": int(ok.sum()), "bias": float(err.mean()), "rmse": float(np.sqrt((err ** 2).mean())), "r": r})
+    return pd.DataFrame(rows)
+
+
+def run_recovery(
+    config_path: str,
+    n_subjects: int,
+    *,
+    n_trials: Optional[int] = None,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    output_dir: str = "outputs/recovery",
+    **fit_kwargs,
+):
+    """Simulate ``n_subjects`` with drawn parameters, fit them back and write/return the recovery report."""
+    import pandas as pd
+
+    from .population import _load_config
+
+    workers = workers or os.cpu_count() or 1
+    conditions = tuple(_load_config(config_path)["task_config"].get("conditions") or CONDITIONS)
+    truth = draw_truth(n_subjects, seed, conditions)
+    rt_min = float((((_load_config(config_path)["raw"].get("sim") or {}).get("responder") or {}).get("kwargs") or {}).get("rt_min_s", 0.12))
+    jobs = [(str(config_path), i, params, n_trials) for i, params in enumerate(truth)]
+    print(f"[Fit] simulating {n_subjects} subjects on {workers} workers")
+    t0 = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tables = list(pool.map(_simulate_subject, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        tables = [_simulate_subject(job) for job in jobs]
+    trials = pd.concat(tables, ignore_index=True)
+    t1 = time.perf_counter()
+    fits = fit_table(trials, by=("subject",), workers=workers, rt_min=rt_min, **fit_kwargs)
+    t2 = time.perf_counter()
+    print(f"[Fit] simulated {len(trials)} trials in {t1 - t0:.1f}s, fitted {len(fits)} subjects in {t2 - t1:.2f}s")
+
+    truth_df = pd.DataFrame(truth)
+    truth_df.insert(0, "subject", range(n_subjects))
+    report = recovery_report(truth_df, fits)
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    trials.to_csv(out / "recovery_trials.csv", index=False)
+    truth_df.merge(fits, on="subject", suffixes=("_true", "_fit")).to_csv(out / "recovery_fits.csv", index=False)
+    report.to_csv(out / "recovery_report.csv", index=False)
+    print(f"[Fit] recovery -> {out}")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fit MidSamplerResponder parameters to MID trial tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fit_p = sub.add_parser("fit", help="Fit every subject in a trial table.")
+    fit_p.add_argument("trials", help="Trial CSV (e.g. population_trials.csv or a single session).")
+    fit_p.add_argument("--by", nargs="*", default=["param_set", "seed"], help="Columns identifying a subject.")
+    fit_p.add_argument("--workers", type=int, default=1, help="Process count.")
+    fit_p.add_argument("--rt-min", type=float, default=0.12, help="Responder rt_min_s.")
+    fit_p.add_argument("--frame-rate", type=float, default=60.0, help="RT resolution (0 for exact RTs).")
+    fit_p.add_argument("-o", "--output", default=None, help="Write fits to this CSV.")
+    rec_p = sub.add_parser("recover", help="Simulate subjects with known parameters and fit them back.")
+    rec_p.add_argument("--config", default="config/config_sampler_sim.yaml", help="Sim config file.")
+    rec_p.add_argument("--subjects", type=int, default=200)
+    rec_p.add_argument("--trials", type=int, default=180, help="Trials per session (0: config total_trials).")
+    rec_p.add_argument("--seed", type=int, default=0)
+    rec_p.add_argument("--workers", type=int, default=None, help="Process count (default: all cores).")
+    rec_p.add_argument("--output-dir", default="outputs/recovery")
+    args = parser.parse_args(argv)
+
+    if args.command == "fit":
+        import pandas as pd
+
+        frame_time = 1.0 / args.frame_rate if args.frame_rate else 0.0
+        t0 = time.perf_counter()
+        fits = fit_table(pd.read_csv(args.trials), by=args.by, workers=args.workers, rt_min=args.rt_min, frame_time=frame_time)
+        print(f"[Fit] {len(fits)} subjects in {time.perf_counter() - t0:.2f}s")
+        if args.output:
+            fits.to_csv(args.output, index=False)
+            print(f"[Fit] fits -> {args.output}")
+        else:
+            print(fits.to_string(index=False))
+    else:
+        report = run_recovery(args.config, args.subjects, n_trials=args.trials or None, seed=args.seed, workers=args.workers, output_dir=args.output_dir)
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""
+Window-free simulation backend for the MID task.
+
+The headless backend runs the same ``run_trial`` phase logic (cue →
+anticipation → target → prefeedback → feedback) against a virtual clock: no
+PsychoPy window, no stimulus preloading and no real-time waits. Responders
+receive the same ``Observation`` fields the psyflow runtime builds from
+``set_trial_context``, so a sampler session finishes in milliseconds.
+
+Enable it from a sim config with ``sim.backend: headless``, or call
+:func:`run_headless` directly (e.g. from batch scripts).
+"""
+
+from __future__ import annotations
+
+import importlib
+import random
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from psyflow import BlockUnit, TaskSettings
+from psyflow.sim.contracts import Observation
+
+from .event_store import log_suffix, open_event_sink
+from .records import TrialTable
+from .run_trial import run_trial
+from .schedule import load_or_compile
+from .stats import SessionStats
+from .utils import build_controller
+
+
+class VirtualClock:
+    """Monotonic simulated clock; time only moves when a phase advances it."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+
+    def getTime(self) -> float:
+        return self.now
+
+    def advance(self, dt: float) -> float:
+        self.now += max(0.0, float(dt))
+        return self.now
+
+
+class HeadlessTriggers:
+    """Trigger runtime stand-in that records ``(virtual_time, code)`` pairs."""
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.events: List[Tuple[float, int]] = []
+
+    def send(self, code: Optional[int]) -> None:
+        if code is not None:
+            self.events.append((self.clock.now, code))
+
+    def close(self) -> None:
+        return None
+
+
+class HeadlessStimBank:
+    """
+    Name-only stand-in for ``StimBank``.
+
+    ``get`` returns the stimulus name and ``get_and_format`` the formatted text,
+    so missing stimuli still fail the way they would with a real ``StimBank``.
+    """
+
+    def __init__(self, stim_config: Dict[str, Any]):
+        self.stim_config = stim_config
+
+    def get(self, name: str) -> str:
+        if name not in self.stim_config:
+            raise KeyError(f"Stimulus '{name}' not found in stim_config.")
+        return name
+
+    def get_and_format(self, name: str, **kwargs) -> str:
+        self.get(name)
+        return str(self.stim_config[name].get("text", "")).format(**kwargs)
+
+
+@dataclass
+class HeadlessSession:
+    participant_id: str
+    session_id: str
+    seed: int
+    mode: str = "sim"
+
+
+class ScriptedResponder:
+    """Minimal equivalent of the ``scripted`` responder: always press ``key`` at ``rt_s``."""
+
+    def __init__(self, key: str = "space", rt_s: float = 0.25):
+        self.key = str(key)
+        self.rt_s = float(rt_s)
+
+    def start_session(self, session, rng) -> None:
+        return None
+
+    def act(self, obs):
+        from psyflow.sim.contracts import Action
+
+        key = self.key if self.key in (obs.valid_keys or []) else None
+        return Action(key=key, rt_s=self.rt_s if key else None, meta={"source": "scripted"})
+
+    def on_feedback(self, fb) -> None:
+        return None
+
+    def end_session(self) -> None:
+        return None
+
+
+def load_responder(sim_cfg: Dict[str, Any]):
+    """Instantiate the responder named by ``sim.responder`` (``module:Class`` or ``scripted``)."""
+    spec = sim_cfg.get("responder", {}) or {}
+    kind = str(spec.get("type", "scripted"))
+    kwargs = dict(spec.get("kwargs", {}) or {})
+    if kind == "scripted":
+        return ScriptedResponder(**kwargs)
+    module_name, _, attr = kind.partition(":")
+    if not attr:
+        raise ValueError(f"[Headless] responder type must be 'scripted' or 'module:Class', got {kind!r}")
+    return getattr(importlib.import_module(module_name), attr)(**kwargs)
+
+
+class HeadlessUnit:
+    """
+    Window-free counterpart of ``StimUnit`` covering the calls made by
+    ``run_trial`` and ``main.run``. State keys match ``StimUnit`` so the
+    resulting trial table has the same columns.
+    """
+
+    def __init__(self, unit_label: str, engine: "HeadlessEngine"):
+        self.label = unit_label
+        self.engine = engine
+        self.state: Dict[str, Any] = {}
+        self.stimuli: List[Any] = []
+        self.context: Optional[Dict[str, Any]] = None
+        self._t0 = engine.clock.now
+
+    def add_stim(self, *stims) -> "HeadlessUnit":
+        self.stimuli.extend(stims)
+        return self
+
+    def set_state(self, prefix: Optional[str] = None, **kwargs) -> "HeadlessUnit":
+        effective_prefix = prefix if prefix is not None else self.label
+        for k, v in kwargs.items():
+            self.state[f"{effective_prefix}_{k}" if effective_prefix else k] = v
+        return self
+
+    def get_state(self, key: str, default: Any = None, prefix: Optional[str] = None) -> Any:
+        if key in self.state:
+            return self.state[key]
+        effective_prefix = prefix if prefix is not None else self.label
+        return self.state.get(f"{effective_prefix}_{key}" if effective_prefix else key, default)
+
+    def to_dict(self, target: Optional[dict] = None) -> "HeadlessUnit":
+        if target is not None:
+            target.update(self.state)
+        return self
+
+    def _onset(self, onset_trigger: Optional[int]) -> float:
+        clock = self.engine.clock
+        self.engine.triggers.send(onset_trigger)
+        self.set_state(
+            onset_time=clock.now - self._t0,
+            onset_time_global=clock.now,
+            onset_trigger=onset_trigger,
+            flip_time=clock.now,
+        )
+        return clock.now
+
+    def _close(self) -> None:
+        clock = self.engine.clock
+        self.set_state(close_time=clock.now - self._t0, close_time_global=clock.now)
+
+    def show(self, duration=None, onset_trigger: Optional[int] = None, offset_trigger: Optional[int] = None) -> "HeadlessUnit":
+        t_val = self.engine.sample_duration(duration)
+        self.set_state(duration=t_val)
+        self._onset(onset_trigger)
+        self.engine.clock.advance(self.engine.quantize(t_val))
+        self._close()
+        self.engine.triggers.send(offset_trigger)
+        return self
+
+    def capture_response(
+        self,
+        keys: List[str],
+        duration,
+        onset_trigger: Optional[int] = None,
+        response_trigger=None,
+        timeout_trigger: Optional[int] = None,
+        terminate_on_response: bool = True,
+        correct_keys: Optional[List[str]] = None,
+        **kwargs,
+    ) -> "HeadlessUnit":
+        t_val = self.engine.sample_duration(duration)
+        self.set_state(duration=t_val)
+        onset = self._onset(onset_trigger)
+        self._t0 = onset
+        window = self.engine.quantize(t_val)
+
+        if correct_keys is None:
+            correct_keys = keys
+        elif isinstance(correct_keys, str):
+            correct_keys = [correct_keys]
+
+        key, rt = self.engine.respond(self, list(keys), t_val)
+        if key is not None:
+            rt = self.engine.quantize_rt(rt)
+        if key is not None and rt < window:
+            self.engine.clock.advance(rt)
+            self.set_state(
+                hit=key in correct_keys,
+                correct_keys=correct_keys,
+                response=key,
+                key_press=True,
+                rt=rt,
+            )
+            self._close()
+            code = response_trigger.get(key) if isinstance(response_trigger, dict) else response_trigger
+            self.engine.triggers.send(code)
+            self.set_state(response_trigger=code)
+            if not terminate_on_response:
+                self.engine.clock.advance(window - rt)
+        else:
+            self.engine.clock.advance(window)
+            self.set_state(
+                hit=False,
+                correct_keys=correct_keys,
+                response=None,
+                key_press=False,
+                rt=None,
+                timeout_trigger=timeout_trigger,
+            )
+            self._close()
+            self.engine.triggers.send(timeout_trigger)
+        return self
+
+    def wait_and_continue(self, keys: List[str] = ["space"], min_wait: Optional[float] = None, log_message=None, terminate: bool = False) -> "HeadlessUnit":
+        _, rt = self.engine.respond(self, list(keys), None, min_wait_s=min_wait)
+        self.engine.clock.advance(max(rt or self.engine.default_rt_s, min_wait or 0.0))
+        return self
+
+
+class HeadlessEngine:
+    """
+    Owns the virtual clock, trigger recorder and responder for one headless session,
+    and exposes ``make_unit``/``set_context`` hooks for ``run_trial``.
+    """
+
+    def __init__(
+        self,
+        responder,
+        session: HeadlessSession,
+        *,
+        policy: str = "warn",
+        default_rt_s: float = 0.2,
+        clamp_rt: bool = False,
+        frame_rate: Optional[float] = 60.0,
+        log_path: Optional[Path] = None,
+        log_format: str = "jsonl",
+        timing_scale: float = 1.0,
+        min_frames: int = 0,
+    ):
+        self.clock = VirtualClock()
+        self.triggers = HeadlessTriggers(self.clock)
+        self.responder = responder
+        self.session = session
+        self.policy = policy
+        self.default_rt_s = float(default_rt_s)
+        self.clamp_rt = bool(clamp_rt)
+        self.frame_time = 1.0 / frame_rate if frame_rate else None
+        self.timing_scale = float(timing_scale)
+        self.min_frames = int(min_frames)
+        self.timing_rng = random.Random(f"{session.seed}:timing")
+        self.response_rng = random.Random(session.seed)
+        self.log_path = Path(log_path) if log_path else None
+        self.log_format = log_format
+        self._log = None
+        self._trial_counter = 0
+
+    def __enter__(self) -> "HeadlessEngine":
+        if self.log_path is not None:
+            self._log = open_event_sink(self.log_path, self.log_format)
+        self.responder.start_session(self.session, self.response_rng)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.responder.end_session()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def log_session(self, **fields) -> None:
+        """Write the session header line (read back by ``src/replay.py``)."""
+        if self._log is not None:
+            self._log.write({"event": "session", "session_id": self.session.session_id, **fields})
+
+    def make_unit(self, unit_label: str, **kwargs) -> HeadlessUnit:
+        return HeadlessUnit(unit_label, self)
+
+    def set_context(self, unit: HeadlessUnit, **fields) -> None:
+        unit.context = fields
+
+    def next_trial_id(self) -> int:
+        # Per-session ids keep results independent of what else ran in this process.
+        self._trial_counter += 1
+        return self._trial_counter
+
+    def sample_duration(self, duration) -> float:
+        """Sample a duration spec and apply ``timing_scale`` (QA time compression)."""
+        if isinstance(duration, (list, tuple)):
+            if len(duration) == 2:
+                return self.timing_rng.uniform(*duration) * self.timing_scale
+            if len(duration) == 1:
+                return float(duration[0]) * self.timing_scale
+            raise ValueError(f"Duration list/tuple must have 1 or 2 elements, got {len(duration)}")
+        if isinstance(duration, (int, float)):
+            return float(duration) * self.timing_scale
+        raise TypeError(f"Invalid duration type: {type(duration)}")
+
+    def quantize(self, t: float) -> float:
+        """Round a presentation duration to whole frames (at least ``min_frames``), as frame-based ``StimUnit`` timing does."""
+        if self.frame_time is None:
+            return t
+        return max(round(t / self.frame_time), self.min_frames) * self.frame_time
+
+    def quantize_rt(self, rt: float) -> float:
+        """Keys are polled once per flip, so a press is registered on the next frame boundary."""
+        if self.frame_time is None:
+            return rt
+        n = -(-rt // self.frame_time)
+        return max(1.0, n) * self.frame_time
+
+    def _observation(self, unit: HeadlessUnit, keys: List[str], deadline_s: Optional[float], min_wait_s: Optional[float]) -> Dict[str, Any]:
+        ctx = unit.context or {}
+        # The sampled (and possibly time-scaled) window wins over the context's nominal spec.
+        deadline = deadline_s if deadline_s is not None else ctx.get("deadline_s")
+        if isinstance(deadline, (list, tuple)):
+            deadline = None
+        return {
+            "trial_id": ctx.get("trial_id"),
+            "phase": ctx.get("phase", unit.label),
+            "deadline_s": deadline,
+            "response_window_s": deadline,
+            "valid_keys": list(ctx.get("valid_keys", keys)),
+            "block_id": ctx.get("block_id"),
+            "condition_id": ctx.get("condition_id"),
+            "task_factors": dict(ctx.get("task_factors", {})),
+            "stim_id": ctx.get("stim_id"),
+            "extras": {"min_wait_s": min_wait_s} if min_wait_s is not None else {},
+        }
+
+    def respond(self, unit: HeadlessUnit, keys: List[str], deadline_s: Optional[float], min_wait_s: Optional[float] = None) -> Tuple[Optional[str], Optional[float]]:
+        """Ask the responder for an action and apply the sim policy to it."""
+        payload = self._observation(unit, keys, deadline_s, min_wait_s)
+        action = self.responder.act(Observation.from_dict(payload))
+        key, rt = action.key, action.rt_s
+        if key is not None and key not in keys:
+            if self.policy == "strict":
+                raise ValueError(f"[Headless] responder pressed invalid key {key!r} in phase {payload['phase']!r}")
+            key, rt = None, None
+        if key is not None:
+            rt = self.default_rt_s if rt is None else float(rt)
+            if self.clamp_rt and deadline_s is not None:
+                rt = min(max(rt, 0.0), float(deadline_s))
+        if self._log is not None:
+            self._log.write({
+                "event": "act",
+                "session_id": self.session.session_id,
+                "t_s": self.clock.now,
+                "observation": payload,
+                "action": {"key": action.key, "rt_s": action.rt_s, "meta": dict(action.meta or {})},
+            })
+        return key, rt
+
+
+@dataclass
+class HeadlessResult:
+    trials: TrialTable
+    triggers: List[Tuple[float, int]]
+    session: HeadlessSession
+    res_file: Optional[str] = None
+    log_path: Optional[str] = None
+    virtual_duration_s: float = 0.0
+    wall_duration_s: float = 0.0
+    stats: Optional[SessionStats] = None
+    extras: Dict[str, Any] = field(default_factory=dict)
+
+
+def _session_ids(sim_cfg: Dict[str, Any], task_name: str, seed: Optional[int], participant_id: Optional[str]) -> Tuple[int, str, str]:
+    cfg_seed = int(sim_cfg.get("seed", 0))
+    if seed is None and participant_id is None:
+        seed = cfg_seed
+        participant_id = str(sim_cfg.get("participant_id") or "sim")
+        session_id = str(sim_cfg.get("session_id") or f"sub-{participant_id}_task-{task_name}_seed{seed}")
+        return seed, participant_id, session_id
+    seed = cfg_seed if seed is None else int(seed)
+    participant_id = participant_id or f"sim{seed:03d}"
+    return seed, participant_id, f"sub-{participant_id}_task-{task_name}_seed{seed}"
+
+
+def run_headless(
+    cfg: Dict[str, Any],
+    *,
+    task_root: Optional[Path] = None,
+    seed: Optional[int] = None,
+    participant_id: Optional[str] = None,
+    responder=None,
+    output_dir: Optional[Path] = None,
+    write_outputs: bool = True,
+    frame_rate: Optional[float] = 60.0,
+    timing_scale: float = 1.0,
+    min_frames: int = 0,
+) -> HeadlessResult:
+    """
+    Run one full MID session (instruction, blocks, block breaks, goodbye) on a
+    virtual clock and return the trial table and recorded triggers.
+
+    ``seed``/``participant_id`` override the ``sim`` section; when either is
+    given the session id and event-log name are derived from them.
+    ``timing_scale``/``min_frames`` compress presented durations as the QA
+    runtime's ``enable_scaling`` does.
+    """
+    wall_start = time.perf_counter()
+    task_root = Path(task_root) if task_root is not None else Path.cwd()
+    sim_cfg = dict(cfg["raw"].get("sim", {}) or {})
+    task_name = str(cfg["task_config"].get("task_name", "mid"))
+    seed, participant_id, session_id = _session_ids(sim_cfg, task_name, seed, participant_id)
+
+    output_dir = Path(output_dir) if output_dir is not None else task_root / sim_cfg.get("output_dir", "outputs/sim")
+    log_format = str(sim_cfg.get("log_format", "jsonl"))
+    log_path = None
+    if write_outputs:
+        log_path = output_dir / f"{session_id}_sim_events{log_suffix(log_format)}"
+
+    session = HeadlessSession(participant_id=participant_id, session_id=session_id, seed=seed)
+    engine = HeadlessEngine(
+        responder if responder is not None else load_responder(sim_cfg),
+        session,
+        policy=str(sim_cfg.get("policy", "warn")),
+        default_rt_s=float(sim_cfg.get("default_rt_s", 0.2)),
+        clamp_rt=bool(sim_cfg.get("clamp_rt", False)),
+        frame_rate=frame_rate,
+        log_path=log_path,
+        log_format=log_format,
+        timing_scale=timing_scale,
+        min_frames=min_frames,
+    )
+
+    settings = TaskSettings.from_dict(cfg["task_config"])
+    settings.save_path = str(output_dir)
+    settings.add_subinfo({"subject_id": participant_id})
+    settings.triggers = cfg["trigger_config"]
+    plan = None
+    if getattr(settings, "precompile_schedule", True):
+        plan = load_or_compile(settings, task_root / "outputs" / "schedule_cache" if write_outputs else None)
+    settings.controller = cfg["controller_config"]
+    settings.mode = "sim"
+    if write_outputs:
+        settings.save_to_json()
+    controller = build_controller(settings.controller)
+    stim_bank = HeadlessStimBank(cfg["stim_config"])
+    trigger_runtime = engine.triggers
+    make_unit = engine.make_unit
+
+    trials = TrialTable(settings.total_blocks * settings.trials_per_block)
+    stats = SessionStats()
+    with engine:
+        engine.log_session(
+            participant_id=participant_id,
+            seed=seed,
+            frame_rate=frame_rate,
+            res_file=settings.res_file if write_outputs else None,
+        )
+        trigger_runtime.send(settings.triggers.get("exp_onset"))
+        make_unit("instruction_text").add_stim(stim_bank.get("instruction_text")).wait_and_continue()
+
+        for block_i in range(settings.total_blocks):
+            trials.reserve(len(trials) + settings.trials_per_block)
+            block = BlockUnit(
+                block_id=f"block_{block_i}",
+                block_idx=block_i,
+                settings=settings,
+                window=None,
+                keyboard=None,
+            )
+            if plan is not None:
+                block.add_condition(plan.conditions(block_i))
+            else:
+                block.generate_conditions()
+            # Each trial writes into its own TrialTable row; the block only holds row handles.
+            (
+                block.on_start(lambda b: trigger_runtime.send(settings.triggers.get("block_onset")))
+                .on_end(lambda b: trigger_runtime.send(settings.triggers.get("block_end")))
+                .run_trial(
+                    partial(
+                        run_trial,
+                        stim_bank=stim_bank,
+                        controller=controller,
+                        trigger_runtime=trigger_runtime,
+                        block_id=f"block_{block_i}",
+                        block_idx=block_i,
+                        unit_factory=make_unit,
+                        set_context=engine.set_context,
+                        trial_id_fn=engine.next_trial_id,
+                        stats=stats,
+                        schedule=plan.replay(block_i) if plan is not None else None,
+                        new_row=trials.new_row,
+                    )
+                )
+            )
+
+            block_stats = stats.block(f"block_{block_i}")
+            make_unit("block").add_stim(
+                stim_bank.get_and_format(
+                    "block_break",
+                    block_num=block_i + 1,
+                    total_blocks=settings.total_blocks,
+                    accuracy=block_stats.hit_rate,
+                    total_score=block_stats.score,
+                )
+            ).wait_and_continue()
+
+        make_unit("goodbye").add_stim(
+            stim_bank.get_and_format("good_bye", total_score=stats.session.score)
+        ).wait_and_continue(terminate=True)
+        trigger_runtime.send(settings.triggers.get("exp_end"))
+
+    res_file = None
+    if write_outputs:
+        trials.to_dataframe(plain=True).to_csv(settings.res_file, index=False)
+        res_file = settings.res_file
+
+    return HeadlessResult(
+        trials=trials,
+        triggers=engine.triggers.events,
+        session=session,
+        res_file=res_file,
+        log_path=str(log_path) if log_path else None,
+        virtual_duration_s=engine.clock.now,
+        wall_duration_s=time.perf_counter() - wall_start,
+        stats=stats,
+    )
@@ -0,0 +1,82 @@
+"""
+Import-time profile per entry point, using ``python -X importtime``.
+
+Each profile runs in a fresh interpreter and imports exactly what that entry
+path imports, then reports total import time and the slowest top-level imports.
+
+Usage::
+
+    python -m src.import_profile              # all profiles
+    python -m src.import_profile --profile headless --top 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+TASK_ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_imports() -> str:
+    """The import statements at the top level of ``main.run`` (the windowed path), read from main.py."""
+    tree = ast.parse((TASK_ROOT / "main.py").read_text(encoding="utf-8"))
+    run = next(node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "run")
+    return "; ".join(ast.unparse(node) for node in run.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+# Statements mirroring the imports each main.py path performs.
+PROFILES: Dict[str, str] = {
+    "cli": "import main; from psyflow import parse_task_run_options",
+    "headless": "import main; import src.config_cache; from psyflow import load_config; import src.headless",
+    "window": f"import main; {run_imports()}",
+    "population": "import src.population, src.headless",
+    "controller": "from src import Controller; Controller().update(True)",
+}
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(statement: str) -> List[Tuple[int, int, int, str]]:
+    """Return ``(self_us, cumulative_us, depth, module)`` rows for ``statement``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=TASK_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"[import_profile] failed to run {statement!r}:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2, m.group(4)))
+    return rows
+
+
+def report(name: str, rows: List[Tuple[int, int, int, str]], top: int) -> None:
+    total_ms = sum(r[0] for r in rows) / 1000
+    print(f"== {name}: {total_ms:.1f} ms total, {len(rows)} modules")
+    top_level = sorted((r for r in rows if r[2] == 0), key=lambda r: r[1], reverse=True)[:top]
+    for _, cumulative, _, module in top_level:
+        print(f"   {cumulative / 1000:9.1f} ms  {module}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import-time profile of MID entry points.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), action="append", help="Profile(s) to run (default: all).")
+    parser.add_argument("--top", type=int, default=10, help="Top-level imports to list per profile.")
+    args = parser.parse_args(argv)
+
+    for name in args.profile or PROFILES:
+        report(name, profile(PROFILES[name]), args.top)
+
+
+if __name__ == "__main__":
+    main()
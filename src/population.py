@@ -0,0 +1,185 @@
+"""
+Population simulation runner: many simulated participants across a process pool.
+
+Each job is one (responder parameter set, seed) pair run through the headless
+backend (``src/headless.py``). Session seeds are derived from the job identity
+alone, so results are identical whatever the worker count or scheduling order.
+Per-session trial tables and ``*_sim_events.jsonl`` logs are merged into one
+combined CSV and one combined event log (JSONL, or ``.evc`` with
+``sim.log_format: columnar``) in job order.
+
+Usage::
+
+    python -m src.population --config config/config_sampler_sim.yaml --seeds 0:200 --workers 64
+    python -m src.population --params sweeps/ability_sets.yaml --seeds 0:50
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .event_store import iter_events, log_suffix, open_event_sink
+
+
+@dataclass(frozen=True)
+class PopulationJob:
+    config_path: str
+    param_set: str
+    responder_kwargs: Tuple[Tuple[str, Any], ...]
+    seed: int
+    output_dir: str
+
+
+def session_seed(seed: int, param_set: str) -> int:
+    """Deterministic, independent 32-bit stream seed for one (param set, seed) job."""
+    digest = hashlib.sha256(f"{param_set}:{int(seed)}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def parse_seeds(spec: str) -> List[int]:
+    """Parse ``"0:100"`` (half-open range), ``"1,5,9"`` or a single integer."""
+    spec = spec.strip()
+    if ":" in spec:
+        start, stop = spec.split(":", 1)
+        return list(range(int(start), int(stop)))
+    return [int(s) for s in spec.split(",") if s.strip()]
+
+
+def load_param_sets(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Load named responder parameter sets from YAML/JSON (``{name: {kwarg: value}}``).
+    Values override ``sim.responder.kwargs``; with no file a single ``base`` set is used.
+    """
+    if not path:
+        return {"base": {}}
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict) or not all(isinstance(v, dict) for v in data.values()):
+        raise ValueError(f"[Population] {path} must map set names to responder kwargs.")
+    return data
+
+
+@lru_cache(maxsize=None)
+def _load_config(config_path: str) -> Dict[str, Any]:
+    from .config_cache import load_compiled_config
+
+    return load_compiled_config(config_path)
+
+
+def _run_job(job: PopulationJob) -> Dict[str, Any]:
+    from .headless import load_responder, run_headless
+
+    cfg = _load_config(job.config_path)
+    sim_cfg = dict(cfg["raw"].get("sim", {}) or {})
+    responder_cfg = dict(sim_cfg.get("responder", {}) or {})
+    responder_cfg["kwargs"] = {**(responder_cfg.get("kwargs") or {}), **dict(job.responder_kwargs)}
+    responder = load_responder({**sim_cfg, "responder": responder_cfg})
+
+    result = run_headless(
+        cfg,
+        seed=session_seed(job.seed, job.param_set),
+        participant_id=f"sim{job.seed:03d}",
+        responder=responder,
+        output_dir=Path(job.output_dir) / "sessions" / job.param_set,
+    )
+    meta = {"param_set": job.param_set, "seed": job.seed, "participant_id": result.session.participant_id}
+    trials = result.trials.to_dataframe(plain=True)
+    for i, (key, value) in enumerate(meta.items()):
+        trials.insert(i, key, value)
+    return {
+        "meta": meta,
+        "trials": trials,
+        "log_path": result.log_path,
+    }
+
+
+def run_population(
+    config_path: str,
+    seeds: Iterable[int],
+    param_sets: Optional[Dict[str, Dict[str, Any]]] = None,
+    *,
+    output_dir: str = "outputs/sim_population",
+    workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    Simulate every (param set, seed) pair across ``workers`` processes and merge
+    the outputs. Returns the paths of the combined trial table and event log.
+    """
+    import pandas as pd
+
+    param_sets = param_sets or {"base": {}}
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    jobs = [
+        PopulationJob(
+            config_path=str(config_path),
+            param_set=name,
+            responder_kwargs=tuple(sorted(kwargs.items())),
+            seed=int(seed),
+            output_dir=str(out),
+        )
+        for name, kwargs in param_sets.items()
+        for seed in seeds
+    ]
+    workers = workers or os.cpu_count() or 1
+    print(f"[Population] {len(jobs)} sessions on {workers} workers -> {out}")
+
+    if workers == 1:
+        results = [_run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    trials_path = out / "population_trials.csv"
+    pd.concat([res["trials"] for res in results], ignore_index=True).to_csv(trials_path, index=False)
+
+    log_format = str((_load_config(str(config_path))["raw"].get("sim") or {}).get("log_format", "jsonl"))
+    events_path = out / f"population_sim_events{log_suffix(log_format)}"
+    merged = open_event_sink(events_path, log_format)
+    try:
+        for res in results:
+            if not res["log_path"]:
+                continue
+            for record in iter_events(res["log_path"]):
+                # The session header's seed is the derived session_seed(); keep the job seed as "seed"
+                # so events join population_trials.csv on (param_set, seed).
+                if "seed" in record:
+                    record = {("session_seed" if key == "seed" else key): value for key, value in record.items()}
+                merged.write({**res["meta"], **record})
+    finally:
+        merged.close()
+
+    print(f"[Population] trials -> {trials_path}")
+    print(f"[Population] events -> {events_path}")
+    return {"trials": str(trials_path), "events": str(events_path)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run many simulated MID participants in parallel (headless).")
+    parser.add_argument("--config", default="config/config_sampler_sim.yaml", help="Sim config file.")
+    parser.add_argument("--seeds", default="0:10", help="Seed range 'start:stop', list '1,2,3' or single seed.")
+    parser.add_argument("--params", default=None, help="YAML/JSON file of named responder parameter sets.")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: all cores).")
+    parser.add_argument("--output-dir", default="outputs/sim_population", help="Combined output directory.")
+    args = parser.parse_args(argv)
+
+    run_population(
+        args.config,
+        parse_seeds(args.seeds),
+        load_param_sets(args.params),
+        output_dir=args.output_dir,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
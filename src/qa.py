@@ -0,0 +1,522 @@
+"""
+Time-compressed QA on a virtual clock (``qa.backend: headless``).
+
+:func:`run_qa_headless` runs the full QA session through the headless backend
+(``src/headless.py``) with :class:`CoverageResponder`, which alternates hits
+and timeouts per condition so every cue/target/response/feedback trigger
+fires. It then checks the result against ``qa.acceptance_criteria`` on the
+virtual timeline:
+
+- ``required_columns`` are present in the trial table;
+- ``expected_trial_count`` trials were run;
+- responses only use ``allowed_keys``;
+- every code in ``trigger_codes_expected`` was sent (``triggers_required``);
+- the trigger sequence matches the one implied by the trial table (exp/block
+  framing, cue → anticipation → target → key press/no response → fixation →
+  hit/miss feedback per trial);
+- within each trial, every onset trigger follows the previous one by the
+  previous phase's scheduled duration rounded to whole frames (the recorded
+  RT when a key press ends the target window), so a runtime that drops,
+  doubles or mis-rounds a phase is caught.
+
+``qa.enable_scaling``/``timing_scale``/``min_frames`` compress durations as in
+the windowed QA runtime. Outputs are ``qa_virtual_trace.csv``,
+``qa_virtual_triggers.csv`` and ``qa_virtual_report.json`` in ``qa.output_dir``.
+With ``qa.spot_check_trials: N`` ``main.py`` then runs the first N trials of
+the same schedule in real time in the usual windowed QA flow.
+
+:class:`StreamingValidator` checks the same criteria incrementally, one trial
+row or trigger at a time, and raises :class:`AcceptanceViolation` on the first
+violation; its state does not grow with session length. The windowed QA run
+wraps its result writer and trigger runtime with it (``qa.stream_validate``,
+default on) and logs every trigger to ``qa_triggers.csv``. Archived traces are
+validated offline the same way, streaming each file, across a process pool::
+
+    python -m src.qa --config config/config_qa.yaml --workers 8 archive/**/qa_trace.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PHASE_TRIGGERS = (
+    ("cue", "{condition}_cue_onset"),
+    ("anticipation", "{condition}_anti_onset"),
+    ("target", "{condition}_target_onset"),
+    ("prefeedback_fixation", "fixation_onset"),
+    ("feedback", "{condition}_{outcome}_fb_onset"),
+)
+RESPONSE_COLUMNS = ("anticipation_response", "target_response")
+# Trial-table column holding the scheduled duration of each phase in PHASE_TRIGGERS.
+PHASE_DURATION_COLUMNS = {
+    "cue": "cue_duration",
+    "anticipation": "anticipation_duration",
+    "target": "target_duration",
+    "prefeedback_fixation": "prefeedback_fixation_duration",
+}
+
+
+class CoverageResponder:
+    """
+    Deterministic QA responder: never presses during anticipation, and per
+    condition alternates a press at half the target deadline (hit) with no
+    response (timeout), so both branches of every condition are exercised.
+    """
+
+    def __init__(self, key: str = "space", continue_rt_s: float = 0.25, hit_fraction: float = 0.5):
+        self.key = str(key)
+        self.continue_rt_s = float(continue_rt_s)
+        self.hit_fraction = float(hit_fraction)
+        self._counts: Dict[str, int] = {}
+
+    def start_session(self, session, rng) -> None:
+        self._counts = {}
+
+    def act(self, obs):
+        from psyflow.sim.contracts import Action
+
+        key = self.key if self.key in (obs.valid_keys or []) else None
+        phase = (obs.phase or "").lower()
+        if key is None or phase.startswith("anticipation"):
+            return Action(key=None, rt_s=None, meta={"source": "qa_coverage", "phase": phase})
+        if phase.startswith("target"):
+            condition = str(obs.condition_id)
+            n = self._counts.get(condition, 0)
+            self._counts[condition] = n + 1
+            if n % 2:
+                return Action(key=None, rt_s=None, meta={"source": "qa_coverage", "phase": phase, "reason": "timeout"})
+            return Action(key=key, rt_s=float(obs.deadline_s) * self.hit_fraction, meta={"source": "qa_coverage", "phase": phase})
+        min_wait = (obs.extras or {}).get("min_wait_s") or 0.0
+        return Action(key=key, rt_s=max(self.continue_rt_s, float(min_wait)), meta={"source": "qa_coverage", "phase": phase})
+
+    def on_feedback(self, fb) -> None:
+        return None
+
+    def end_session(self) -> None:
+        return None
+
+
+def expected_trigger_sequence(trials: List[Dict[str, Any]], triggers: Dict[str, Any], trials_per_block: int) -> List[Tuple[Optional[int], str, Optional[Tuple[int, str]]]]:
+    """``(code, label, (trial index, phase) for onset triggers)`` for every trigger the session should send, in order."""
+    seq: List[Tuple[Optional[int], str, Optional[Tuple[int, str]]]] = [(triggers.get("exp_onset"), "exp_onset", None)]
+    for i, trial in enumerate(trials):
+        if i % trials_per_block == 0:
+            seq.append((triggers.get("block_onset"), "block_onset", None))
+        condition = trial["condition"]
+        outcome = "hit" if trial.get("feedback_hit") else "miss"
+        for phase, template in PHASE_TRIGGERS:
+            name = template.format(condition=condition, outcome=outcome)
+            seq.append((triggers.get(name), name, (i, phase)))
+            if phase == "target":
+                event = "key_press" if trial.get("target_key_press") else "no_response"
+                seq.append((triggers.get(f"{condition}_{event}"), f"{condition}_{event}", None))
+        if (i + 1) % trials_per_block == 0 or i + 1 == len(trials):
+            seq.append((triggers.get("block_end"), "block_end", None))
+    seq.append((triggers.get("exp_end"), "exp_end", None))
+    return [item for item in seq if item[0] is not None]
+
+
+def scheduled_phase_gaps(trial: Dict[str, Any], frame_rate: Optional[float] = None, min_frames: int = 0) -> Dict[str, float]:
+    """
+    Expected time from each phase onset to the next one in ``trial``: the
+    phase's scheduled duration rounded to whole frames (at least ``min_frames``),
+    or the recorded RT when a key press ends the target window early.
+    """
+    def frames(duration: float) -> float:
+        if not frame_rate:
+            return duration
+        return max(round(duration * frame_rate), min_frames) / frame_rate
+
+    gaps = {phase: frames(float(trial[column])) for phase, column in PHASE_DURATION_COLUMNS.items()}
+    rt = trial.get("target_rt")
+    if trial.get("target_key_press") and rt is not None and rt == rt and float(rt) < gaps["target"]:
+        gaps["target"] = float(rt)
+    return gaps
+
+
+def check_acceptance(
+    trials: List[Dict[str, Any]],
+    columns: List[str],
+    events: List[Tuple[float, int]],
+    triggers: Dict[str, Any],
+    criteria: Dict[str, Any],
+    trials_per_block: int,
+    frame_rate: Optional[float] = None,
+    min_frames: int = 0,
+) -> List[Dict[str, Any]]:
+    """Evaluate ``acceptance_criteria``, trigger order and trigger spacing; one ``{name, passed, detail}`` per check."""
+    checks: List[Dict[str, Any]] = []
+
+    def add(name: str, passed: bool, detail: str = "") -> None:
+        checks.append({"name": name, "passed": bool(passed), "detail": detail})
+
+    required = list(criteria.get("required_columns") or [])
+    missing = [c for c in required if c not in columns]
+    add("required_columns", not missing, f"missing: {missing}" if missing else f"{len(required)} present")
+
+    expected_n = criteria.get("expected_trial_count")
+    if expected_n is not None:
+        add("expected_trial_count", len(trials) == int(expected_n), f"{len(trials)} trials, expected {expected_n}")
+
+    allowed = criteria.get("allowed_keys")
+    if allowed is not None:
+        used = {t.get(c) for t in trials for c in RESPONSE_COLUMNS} - {None}
+        bad = sorted(used - set(allowed))
+        add("allowed_keys", not bad, f"unexpected keys: {bad}" if bad else f"keys used: {sorted(used)}")
+
+    codes = [code for _, code in events]
+    if criteria.get("triggers_required", False):
+        add("triggers_required", bool(codes), f"{len(codes)} triggers sent")
+    expected_codes = criteria.get("trigger_codes_expected")
+    if expected_codes is not None:
+        absent = sorted(set(expected_codes) - set(codes))
+        add("trigger_codes_expected", not absent, f"never sent: {absent}" if absent else f"all {len(set(expected_codes))} codes sent")
+
+    times = [t for t, _ in events]
+    backwards = next((i for i in range(1, len(times)) if times[i] < times[i - 1]), None)
+    add("trigger_timestamps_monotonic", backwards is None, f"time goes backwards at trigger #{backwards}" if backwards is not None else "")
+
+    expected = expected_trigger_sequence(trials, triggers, trials_per_block)
+    order_detail = f"{len(expected)} triggers in expected order"
+    order_ok = len(expected) == len(events)
+    sent_at: Dict[Tuple[int, str], float] = {}
+    for i, ((code, label, phase_key), (t, sent)) in enumerate(zip(expected, events)):
+        if code != sent:
+            order_ok = False
+            order_detail = f"trigger #{i}: sent {sent} at t={t:.3f}s, expected {code} ({label})"
+            break
+        if phase_key is not None:
+            sent_at[phase_key] = t
+    if order_ok is False and order_detail.endswith("expected order"):
+        order_detail = f"sent {len(events)} triggers, expected {len(expected)}"
+    add("trigger_order", order_ok, order_detail)
+
+    # Compare trigger timestamps with the schedule, not with the phase onsets the
+    # same clock wrote into the trial table.
+    if not order_ok:
+        add("trigger_onset_alignment", False, "not checked: trigger order mismatch")
+        return checks
+    phases = [phase for phase, _ in PHASE_TRIGGERS]
+    checked = off = 0
+    first_off = ""
+    for i, trial in enumerate(trials):
+        try:
+            gaps = scheduled_phase_gaps(trial, frame_rate, min_frames)
+        except (KeyError, TypeError, ValueError):
+            continue
+        for phase, following in zip(phases, phases[1:]):
+            if (i, phase) not in sent_at or (i, following) not in sent_at:
+                continue
+            checked += 1
+            actual = sent_at[(i, following)] - sent_at[(i, phase)]
+            if abs(actual - gaps[phase]) > 1e-6:
+                off += 1
+                first_off = first_off or f"; first: trial {i + 1} {following} after {actual:.4f}s, scheduled {gaps[phase]:.4f}s"
+    add(
+        "trigger_onset_alignment",
+        checked > 0 and off == 0,
+        f"{off} of {checked} onset intervals off their scheduled frame-rounded duration{first_off}",
+    )
+    return checks
+
+
+def run_qa_headless(cfg: Dict[str, Any], *, task_root: Optional[Path] = None, frame_rate: float = 60.0) -> Dict[str, Any]:
+    """Run the QA session on a virtual clock, write trace/triggers/report, and return the report."""
+    import pandas as pd
+
+    from .headless import run_headless
+
+    wall_start = time.perf_counter()
+    task_root = Path(task_root) if task_root is not None else Path.cwd()
+    qa_cfg = dict(cfg["raw"].get("qa") or {})
+    output_dir = task_root / qa_cfg.get("output_dir", "outputs/qa")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    scaling = bool(qa_cfg.get("enable_scaling", False))
+
+    result = run_headless(
+        cfg,
+        task_root=task_root,
+        participant_id="qa",
+        responder=CoverageResponder(key=(cfg["task_config"].get("key_list") or ["space"])[0]),
+        write_outputs=False,
+        frame_rate=frame_rate,
+        timing_scale=float(qa_cfg.get("timing_scale", 1.0)) if scaling else 1.0,
+        min_frames=int(qa_cfg.get("min_frames", 0)) if scaling else 0,
+    )
+    df = result.trials.to_dataframe()
+    trials = list(result.trials)
+    task = cfg["task_config"]
+    # Same rule as TaskSettings.trials_per_block.
+    trials_per_block = math.ceil(int(task.get("total_trials", len(trials))) / int(task.get("total_blocks", 1))) or 1
+    checks = check_acceptance(
+        trials,
+        list(df.columns),
+        result.triggers,
+        dict(cfg["trigger_config"]),
+        dict(qa_cfg.get("acceptance_criteria") or {}),
+        trials_per_block,
+        frame_rate=frame_rate,
+        min_frames=int(qa_cfg.get("min_frames", 0)) if scaling else 0,
+    )
+
+    trace_path = output_dir / "qa_virtual_trace.csv"
+    df.to_csv(trace_path, index=False)
+    pd.DataFrame(result.triggers, columns=["t_s", "code"]).to_csv(output_dir / "qa_virtual_triggers.csv", index=False)
+    report = {
+        "passed": all(c["passed"] for c in checks),
+        "checks": checks,
+        "n_trials": len(trials),
+        "n_triggers": len(result.triggers),
+        "virtual_duration_s": result.virtual_duration_s,
+        "wall_duration_s": time.perf_counter() - wall_start,
+        "trace": str(trace_path),
+    }
+    with open(output_dir / "qa_virtual_report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+class AcceptanceViolation(RuntimeError):
+    """A trial row or trigger broke ``qa.acceptance_criteria``."""
+
+
+def trigger_codes(triggers: Dict[str, Any]) -> frozenset:
+    """Every code in a trigger map (``trigger_config``)."""
+    return frozenset(v for v in triggers.values() if isinstance(v, int) and not isinstance(v, bool))
+
+
+class StreamingValidator:
+    """
+    Incremental ``acceptance_criteria`` checker.
+
+    Feed rows to :meth:`check_row` and triggers to :meth:`check_trigger` as they
+    are produced, then call :meth:`finish`; the first violation raises
+    :class:`AcceptanceViolation`. Only counts, the last trigger time and the set
+    of codes seen are kept. ``known_codes`` (the trigger map) additionally
+    rejects codes the task never defines.
+    """
+
+    def __init__(self, criteria: Dict[str, Any], *, known_codes: Optional[Iterable[int]] = None, source: str = ""):
+        expected_n = criteria.get("expected_trial_count")
+        allowed = criteria.get("allowed_keys")
+        expected_codes = criteria.get("trigger_codes_expected")
+        self.required = tuple(criteria.get("required_columns") or ())
+        self.expected_n = int(expected_n) if expected_n is not None else None
+        self.allowed = frozenset(allowed) if allowed is not None else None
+        self.triggers_required = bool(criteria.get("triggers_required", False))
+        self.expected_codes = frozenset(int(c) for c in expected_codes) if expected_codes is not None else None
+        self.known_codes = frozenset(known_codes) if known_codes is not None else None
+        self.source = source
+        self.n_rows = 0
+        self.n_triggers = 0
+        self.last_t: Optional[float] = None
+        self.codes_seen: set = set()
+
+    def fail(self, message: str) -> None:
+        raise AcceptanceViolation(f"{self.source}: {message}" if self.source else message)
+
+    def check_columns(self, columns: Iterable[str]) -> None:
+        """Check a file header once instead of every row's keys."""
+        missing = [c for c in self.required if c not in set(columns)]
+        if missing:
+            self.fail(f"missing required columns {missing}")
+
+    def check_row(self, row: Dict[str, Any], *, columns_checked: bool = False) -> None:
+        where = f"trial row {self.n_rows}"
+        if not columns_checked:
+            missing = [c for c in self.required if c not in row]
+            if missing:
+                self.fail(f"{where}: missing required columns {missing}")
+        self.n_rows += 1
+        if self.expected_n is not None and self.n_rows > self.expected_n:
+            self.fail(f"{where}: more than expected_trial_count={self.expected_n} trials")
+        if self.allowed is not None:
+            for column in RESPONSE_COLUMNS:
+                key = row.get(column)
+                if key is not None and key != "" and key not in self.allowed:
+                    self.fail(f"{where}: {column}={key!r} is not in allowed_keys {sorted(self.allowed)}")
+
+    def check_trigger(self, t: float, code: int) -> None:
+        code = int(code)
+        where = f"trigger {self.n_triggers} (code {code} at t={t:.6f}s)"
+        if self.known_codes is not None and code not in self.known_codes:
+            self.fail(f"{where}: code is not in the trigger map")
+        if self.last_t is not None and t < self.last_t:
+            self.fail(f"{where}: timestamp goes backwards from {self.last_t:.6f}s")
+        self.last_t = t
+        self.n_triggers += 1
+        self.codes_seen.add(code)
+
+    def finish(self, *, triggers_checked: bool = True) -> Dict[str, Any]:
+        """End-of-stream checks (trial count, required/expected triggers); returns the counts."""
+        if self.expected_n is not None and self.n_rows != self.expected_n:
+            self.fail(f"{self.n_rows} trials, expected_trial_count is {self.expected_n}")
+        if triggers_checked:
+            if self.triggers_required and not self.n_triggers:
+                self.fail("no triggers were sent (triggers_required)")
+            if self.expected_codes is not None:
+                absent = sorted(self.expected_codes - self.codes_seen)
+                if absent:
+                    self.fail(f"trigger codes never sent: {absent}")
+        return {"rows": self.n_rows, "triggers": self.n_triggers}
+
+
+class ValidatedWriter:
+    """Result-writer proxy that validates every row after it is journaled."""
+
+    def __init__(self, writer, validator: StreamingValidator):
+        self._writer = writer
+        self._validator = validator
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._writer.write(row)
+        self._validator.check_row(row)
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+
+class ValidatedTriggerRuntime:
+    """
+    Trigger runtime proxy that validates every code after it is sent and
+    appends ``t_s,code`` to ``log_path`` (seconds since the proxy was created).
+    """
+
+    def __init__(self, runtime, validator: StreamingValidator, log_path: Optional[str | Path] = None):
+        self._runtime = runtime
+        self._validator = validator
+        self._t0 = time.perf_counter()
+        self._log = None
+        if log_path is not None:
+            Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(log_path, "w", encoding="utf-8", newline="")
+            self._log.write("t_s,code\n")
+
+    def send(self, code, *args, **kwargs):
+        result = self._runtime.send(code, *args, **kwargs)
+        if code is not None:
+            t = time.perf_counter() - self._t0
+            if self._log is not None:
+                self._log.write(f"{t:.6f},{code}\n")
+                self._log.flush()
+            self._validator.check_trigger(t, code)
+        return result
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        return self._runtime.close()
+
+    def __getattr__(self, name):
+        return getattr(self._runtime, name)
+
+
+def trigger_log_path(trace: str | Path) -> Path:
+    """Trigger log archived next to a trace: ``qa_trace.csv`` → ``qa_triggers.csv``."""
+    trace = Path(trace)
+    stem = trace.stem
+    stem = stem[: -len("_trace")] + "_triggers" if stem.endswith("_trace") else stem + "_triggers"
+    return trace.with_name(stem + ".csv")
+
+
+def _blank_to_none(row: Dict[str, str]) -> Dict[str, Any]:
+    return {k: (v if v != "" else None) for k, v in row.items()}
+
+
+def validate_trace(
+    trace: str | Path,
+    criteria: Dict[str, Any],
+    *,
+    triggers: Optional[str | Path] = None,
+    known_codes: Optional[Iterable[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Stream one archived trace (and its trigger log, default
+    :func:`trigger_log_path`) through :class:`StreamingValidator`, stopping at
+    the first violation. Trigger checks are skipped when there is no log.
+    """
+    trigger_path = Path(triggers) if triggers is not None else trigger_log_path(trace)
+    validator = StreamingValidator(criteria, known_codes=known_codes, source=Path(trace).name)
+    result: Dict[str, Any] = {"trace": str(trace), "passed": False, "rows": 0, "triggers": None, "error": None}
+    try:
+        with open(trace, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            validator.check_columns(reader.fieldnames or [])
+            for row in reader:
+                validator.check_row(_blank_to_none(row), columns_checked=True)
+        has_triggers = trigger_path.is_file()
+        if has_triggers:
+            with open(trigger_path, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    validator.check_trigger(float(row["t_s"]), int(row["code"]))
+        validator.finish(triggers_checked=has_triggers)
+        result["passed"] = True
+        result["triggers"] = validator.n_triggers if has_triggers else None
+    except AcceptanceViolation as exc:
+        result["error"] = str(exc)
+    result["rows"] = validator.n_rows
+    return result
+
+
+def validate_traces(
+    traces: Iterable[str | Path],
+    criteria: Dict[str, Any],
+    *,
+    known_codes: Optional[Iterable[int]] = None,
+    workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """:func:`validate_trace` over many sessions, optionally across a process pool."""
+    traces = [str(t) for t in traces]
+    check = partial(validate_trace, criteria=criteria, known_codes=frozenset(known_codes) if known_codes is not None else None)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(check, traces, chunksize=8))
+    return [check(t) for t in traces]
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    for check in report["checks"]:
+        status = "PASS" if check["passed"] else "FAIL"
+        print(f"[QA] {status} {check['name']}: {check['detail']}")
+    print(
+        f"[QA] {'passed' if report['passed'] else 'FAILED'}: {report['n_trials']} trials, "
+        f"virtual {report['virtual_duration_s']:.1f}s in {report['wall_duration_s'] * 1000:.0f} ms"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate archived QA traces against qa.acceptance_criteria.")
+    parser.add_argument("traces", nargs="+", help="Trace CSVs; trigger logs are read from <name>_triggers.csv when present.")
+    parser.add_argument("--config", default="config/config_qa.yaml", help="Config holding qa.acceptance_criteria and the trigger map.")
+    parser.add_argument("--workers", type=int, default=1, help="Process count.")
+    parser.add_argument("--any-trial-count", action="store_true", help="Skip the expected_trial_count check.")
+    args = parser.parse_args(argv)
+
+    from .population import _load_config
+
+    cfg = _load_config(args.config)
+    criteria = dict((cfg["raw"].get("qa") or {}).get("acceptance_criteria") or {})
+    if args.any_trial_count:
+        criteria.pop("expected_trial_count", None)
+    results = validate_traces(args.traces, criteria, known_codes=trigger_codes(cfg["trigger_config"]), workers=args.workers)
+    failed = [r for r in results if not r["passed"]]
+    for r in results:
+        triggers = "no trigger log" if r["triggers"] is None else f"{r['triggers']} triggers"
+        status = "PASS" if r["passed"] else "FAIL"
+        print(f"[QA] {status} {r['trace']}: {r['rows']} rows, {triggers}" + (f" - {r['error']}" if r["error"] else ""))
+    print(f"[QA] {len(results) - len(failed)}/{len(results)} traces passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Fixed-schema, columnar MID trial records.
+
+:class:`TrialTable` stores every column ``run_trial`` produces in its own
+preallocated NumPy array (struct of arrays) instead of keeping one dict per
+trial. Floats use NaN for missing values, integer and boolean columns carry a
+missing-value mask, and string columns (condition, block id, response keys)
+are stored as small integer codes. :meth:`TrialTable.new_row` hands out a
+:class:`TrialRow`, a dict-like write handle that ``run_trial`` and
+``StimUnit.to_dict`` fill in place, so no per-trial dict is built or kept.
+:meth:`TrialTable.to_dataframe` wraps the arrays as pandas columns without
+copying them; with ``plain=True`` it rebuilds the column order and dtypes that
+``pd.DataFrame(list_of_trial_dicts)`` would give, which is what the result CSV
+is written from.
+
+Keys outside :data:`MID_SCHEMA` are kept in a plain per-column list so no data
+is dropped.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+PHASE_PREFIXES = ("cue", "anticipation", "target", "prefeedback_fixation", "feedback")
+_TIMES = ("duration", "onset_time", "onset_time_global", "onset_trigger", "flip_time")
+_CLOSE = ("close_time", "close_time_global")
+_RESPONSE = ("hit", "correct_keys", "response", "key_press", "rt", "response_trigger", "timeout_trigger")
+
+
+def _kind(column: str) -> str:
+    if column.endswith(("_trigger", "_delta")) or column in ("trial_id", "trial_index"):
+        return "i"
+    if column.endswith(("_hit", "_key_press")):
+        return "b"
+    if column.endswith(("_response", "_correct_keys")) or column in ("condition", "block_id"):
+        return "c"
+    return "f"
+
+
+def _schema() -> Tuple[Tuple[str, str], ...]:
+    columns = ["condition", "trial_id"]
+    for phase in PHASE_PREFIXES:
+        columns += [f"{phase}_{key}" for key in _TIMES]
+        if phase in ("anticipation", "target"):
+            columns += [f"{phase}_{key}" for key in _RESPONSE]
+        columns += [f"{phase}_{key}" for key in _CLOSE]
+        if phase == "anticipation":
+            columns.append("anticipation_early_response")
+        if phase == "feedback":
+            columns += ["feedback_hit", "feedback_delta"]
+    columns += ["trial_index", "block_id"]
+    return tuple((column, _kind(column)) for column in columns)
+
+
+# (column, kind): f = float64 (NaN missing), i = int64 + mask, b = bool + mask, c = int16 codes.
+MID_SCHEMA = _schema()
+_DTYPES = {"f": np.float64, "i": np.int64, "b": np.bool_, "c": np.int16}
+
+
+class TrialRow:
+    """Dict-like handle on one :class:`TrialTable` row; writes go straight into the column arrays."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "TrialTable", index: int):
+        self.table = table
+        self.index = index
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.table.set(self.index, key, value)
+
+    def update(self, other: Any = (), **kwargs: Any) -> None:
+        items = other.items() if hasattr(other, "items") else other
+        for key, value in items:
+            self.table.set(self.index, key, value)
+        for key, value in kwargs.items():
+            self.table.set(self.index, key, value)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.table._seen:
+            raise KeyError(key)
+        return self.table.get(self.index, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.table.get(self.index, key) if key in self.table._seen else default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.table._seen
+
+    def keys(self) -> List[str]:
+        return list(self.table.order)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self.table.get(self.index, key)) for key in self.table.order]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.table.order)
+
+
+class TrialTable:
+    """Preallocated struct-of-arrays trial table with the MID column schema."""
+
+    __slots__ = ("capacity", "n", "values", "masks", "categories", "_codes", "_floats", "_ints", "_bools", "_cats",
+                 "_columns", "extra", "order", "_seen", "_nonint")
+
+    def __init__(self, capacity: int = 0):
+        self.capacity = 0
+        self.n = 0
+        self.values: Dict[str, np.ndarray] = {}
+        self.masks: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List[Any]] = {name: [] for name, kind in MID_SCHEMA if kind == "c"}
+        self._codes: Dict[str, Dict[Any, int]] = {name: {} for name in self.categories}
+        self.extra: Dict[str, List[Any]] = {}
+        # Columns in first-write order (the key order of the trial dicts) and
+        # float columns that received a non-int value (the rest were ints in the dicts).
+        self.order: List[str] = []
+        self._seen: set = set()
+        self._nonint: set = set()
+        self.reserve(capacity)
+
+    def reserve(self, capacity: int) -> "TrialTable":
+        """Grow every column to hold at least ``capacity`` rows (e.g. once per block)."""
+        capacity = int(capacity)
+        if capacity <= self.capacity:
+            return self
+        for name, kind in MID_SCHEMA:
+            if kind == "f":
+                arr = np.full(capacity, np.nan)
+            elif kind == "c":
+                arr = np.full(capacity, -1, dtype=np.int16)
+            else:
+                arr = np.zeros(capacity, dtype=_DTYPES[kind])
+                mask = np.ones(capacity, dtype=np.bool_)
+                if name in self.masks:
+                    mask[: self.n] = self.masks[name][: self.n]
+                self.masks[name] = mask
+            if name in self.values:
+                arr[: self.n] = self.values[name][: self.n]
+            self.values[name] = arr
+        self.capacity = capacity
+        # Per-kind (name, array[, mask]) tuples so append() does no schema lookups.
+        self._floats = tuple((name, self.values[name]) for name, kind in MID_SCHEMA if kind == "f")
+        self._ints = tuple((name, self.values[name], self.masks[name]) for name, kind in MID_SCHEMA if kind == "i")
+        self._bools = tuple((name, self.values[name], self.masks[name]) for name, kind in MID_SCHEMA if kind == "b")
+        self._cats = tuple((name, self.values[name], self._codes[name], self.categories[name]) for name in self.categories)
+        self._columns = {name: (kind, self.values[name], self.masks.get(name)) for name, kind in MID_SCHEMA}
+        return self
+
+    def new_row(self) -> TrialRow:
+        """Open the next row (all values missing) and return a write handle on it."""
+        i = self.n
+        if i >= self.capacity:
+            self.reserve(max(16, 2 * self.capacity))
+        for column in self.extra.values():
+            column.append(None)
+        self.n = i + 1
+        return TrialRow(self, i)
+
+    def set(self, i: int, name: str, value: Any) -> None:
+        """Write one value of row ``i``; None marks it missing."""
+        if name not in self._seen:
+            self._seen.add(name)
+            self.order.append(name)
+        spec = self._columns.get(name)
+        if spec is None:
+            column = self.extra.get(name)
+            if column is None:
+                column = self.extra[name] = [None] * self.n
+            column[i] = value
+            return
+        kind, arr, mask = spec
+        if kind == "f":
+            if value is None:
+                arr[i] = np.nan
+            else:
+                arr[i] = value
+                if type(value) is not int:
+                    self._nonint.add(name)
+        elif kind == "c":
+            if value is None:
+                arr[i] = -1
+                return
+            codes, categories = self._codes[name], self.categories[name]
+            key = tuple(value) if isinstance(value, list) else value
+            code = codes.get(key)
+            if code is None:
+                code = codes[key] = len(categories)
+                categories.append(value)
+            arr[i] = code
+        elif value is None:
+            mask[i] = True
+        else:
+            arr[i] = value
+            mask[i] = False
+
+    def get(self, i: int, name: str) -> Any:
+        """Value of column ``name`` in row ``i`` (None when missing)."""
+        spec = self._columns.get(name)
+        if spec is None:
+            column = self.extra.get(name)
+            return None if column is None else column[i]
+        kind, arr, mask = spec
+        value = arr[i]
+        if kind == "f":
+            return None if math.isnan(value) else float(value)
+        if kind == "c":
+            return None if value < 0 else self.categories[name][value]
+        return None if mask[i] else value.item()
+
+    def append(self, row: Dict[str, Any]) -> None:
+        i = self.n
+        if i >= self.capacity:
+            self.reserve(max(16, 2 * self.capacity))
+        get = row.get
+        nonint = self._nonint
+        for name, arr in self._floats:
+            value = get(name)
+            if value is not None:
+                arr[i] = value
+                if type(value) is not int:
+                    nonint.add(name)
+        for name, arr, mask in self._ints:
+            value = get(name)
+            if value is not None:
+                arr[i] = value
+                mask[i] = False
+        for name, arr, mask in self._bools:
+            value = get(name)
+            if value is not None:
+                arr[i] = value
+                mask[i] = False
+        for name, arr, codes, categories in self._cats:
+            value = get(name)
+            if value is None:
+                continue
+            key = tuple(value) if isinstance(value, list) else value
+            code = codes.get(key)
+            if code is None:
+                code = codes[key] = len(categories)
+                categories.append(value)
+            arr[i] = code
+        seen = self._seen
+        for key, value in row.items():
+            if key not in seen:
+                seen.add(key)
+                self.order.append(key)
+            if key not in self.values:
+                self.extra.setdefault(key, [None] * i).append(value)
+        for column in self.extra.values():
+            if len(column) <= i:
+                column.append(None)
+        self.n = i + 1
+
+    def extend(self, rows) -> "TrialTable":
+        for row in rows:
+            self.append(row)
+        return self
+
+    def __len__(self) -> int:
+        return self.n
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Row ``i`` as a plain dict (None for missing values), e.g. for journaling."""
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        out = {name: self.get(i, name) for name, _ in MID_SCHEMA}
+        for key, column in self.extra.items():
+            out[key] = column[i]
+        return out
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return self.row(i + self.n if i < 0 else i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self.row(i) for i in range(self.n))
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw view of a column's first ``n`` values (codes for string columns)."""
+        return self.values[name][: self.n]
+
+    def to_dataframe(self, columns: Optional[List[str]] = None, plain: bool = False):
+        """
+        The filled rows as a DataFrame, columns in first-write order. By default
+        each column wraps its array without copying (nullable integer/boolean
+        and categorical dtypes). ``plain=True`` gives the dtypes
+        ``pd.DataFrame(list_of_trial_dicts)`` infers instead: float for integer
+        columns with missing values, object for booleans with missing values
+        and for strings, int where a float column only ever held ints.
+        """
+        import pandas as pd
+
+        n = self.n
+        data: Dict[str, Any] = {}
+        for name in self.order:
+            if columns is not None and name not in columns:
+                continue
+            spec = self._columns.get(name)
+            if spec is None:
+                data[name] = self.extra[name]
+                continue
+            kind, arr, mask = spec
+            values = arr[:n]
+            if kind == "f":
+                if plain and name not in self._nonint and not np.isnan(values).any():
+                    values = values.astype(np.int64)
+                data[name] = values
+            elif kind == "c":
+                if plain:
+                    lookup = np.empty(len(self.categories[name]) + 1, dtype=object)
+                    lookup[:-1] = self.categories[name]  # may hold lists, so fill rather than np.array()
+                    data[name] = lookup[values]  # code -1 picks the trailing None
+                else:
+                    labels = [str(v) if isinstance(v, list) else v for v in self.categories[name]]
+                    data[name] = pd.Categorical.from_codes(values, categories=pd.Index(labels, dtype=object))
+            elif not plain:
+                array_type = pd.arrays.IntegerArray if kind == "i" else pd.arrays.BooleanArray
+                data[name] = array_type(values, mask[:n], copy=False)
+            elif not mask[:n].any():
+                data[name] = values
+            elif kind == "i":
+                data[name] = np.where(mask[:n], np.nan, values)
+            else:
+                column = values.astype(object)
+                column[mask[:n]] = None
+                data[name] = column
+        return pd.DataFrame(data, copy=False)
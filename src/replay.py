@@ -0,0 +1,244 @@
+"""
+Replay a simulated session from its ``*_sim_events.jsonl`` (or ``.evc``) log.
+
+The log is streamed record by record (``src.event_store.iter_events``); :class:`ReplayResponder`
+hands the recorded actions back to the headless backend in order, checking that
+every observation it is asked about (trial, phase, condition, deadline) is the
+one that was logged. ``run_trial`` and ``Controller`` run exactly as in the
+original session, and the regenerated trial table is compared with the archived
+CSV. Any difference in task logic, controller behaviour or psyflow scheduling
+shows up as an observation mismatch or a differing cell. A session with no
+archived table to compare against fails.
+
+Only logs written by the headless backend (``sim.backend: headless``) can be
+replayed: they start with a ``session`` header giving the participant, seed,
+frame rate and result file. Logs of psyflow's windowed sim runtime have no
+such header and their observations carry real-window timing, so they are
+rejected with :class:`UnsupportedLog`.
+
+Usage::
+
+    python -m src.replay --config config/config_sampler_sim.yaml outputs/sim_sampler/*_sim_events.jsonl
+    python -m src.replay --config config/config_sampler_sim.yaml --workers 16 --tables archive/tables archive/**/*_sim_events.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .event_store import iter_events
+
+_CHECKED_FIELDS = ("trial_id", "phase", "condition_id", "block_id", "deadline_s")
+
+
+class ReplayMismatch(RuntimeError):
+    """The replayed session asked for a response the log does not contain."""
+
+
+class UnsupportedLog(ValueError):
+    """The log was not written by the headless backend and cannot be replayed."""
+
+
+def session_header(path: str | Path) -> Dict[str, Any]:
+    """Session fields from the log's ``session`` header line; raises :class:`UnsupportedLog` without one."""
+    first = next(iter_events(path), {})
+    if first.get("event") != "session":
+        raise UnsupportedLog(
+            f"{path} has no headless session header (first event {first.get('event')!r}); only logs written "
+            "with sim.backend: headless can be replayed, not psyflow windowed-runtime logs"
+        )
+    return first
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=0.0, abs_tol=1e-9)
+    return a == b
+
+
+class ReplayResponder:
+    """Responder that returns the logged actions in order instead of deciding."""
+
+    def __init__(self, events: Iterator[Dict[str, Any]]):
+        self.events = events
+        self.n_acts = 0
+        self.failed = False
+
+    def start_session(self, session, rng) -> None:
+        return None
+
+    def act(self, obs):
+        from psyflow.sim.contracts import Action
+
+        record = next(self.events, None)
+        if record is None:
+            self.failed = True
+            raise ReplayMismatch(f"log ended before phase {obs.phase!r} of trial {obs.trial_id}")
+        logged = record.get("observation", {})
+        for name in _CHECKED_FIELDS:
+            if not _same(getattr(obs, name, None), logged.get(name)):
+                self.failed = True
+                raise ReplayMismatch(
+                    f"act #{self.n_acts + 1}: {name} is {getattr(obs, name, None)!r}, log has {logged.get(name)!r}"
+                )
+        self.n_acts += 1
+        action = record.get("action", {})
+        return Action(key=action.get("key"), rt_s=action.get("rt_s"), meta=dict(action.get("meta") or {}))
+
+    def on_feedback(self, fb) -> None:
+        return None
+
+    def end_session(self) -> None:
+        # Also called while an act() mismatch unwinds the session; keep that error.
+        if self.failed:
+            return
+        leftover = next(self.events, None)
+        if leftover is not None:
+            raise ReplayMismatch(f"session finished after {self.n_acts} acts but the log has more")
+
+
+@dataclass
+class ReplayReport:
+    log_path: str
+    n_acts: int = 0
+    n_trials: int = 0
+    expected: Optional[str] = None
+    mismatches: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+
+def compare_tables(replayed, expected) -> List[str]:
+    """Cell-level differences between two trial DataFrames (after a CSV round trip)."""
+    import io
+
+    import pandas as pd
+
+    buf = io.StringIO()
+    replayed.to_csv(buf, index=False)
+    buf.seek(0)
+    replayed = pd.read_csv(buf)
+    problems = []
+    if len(replayed) != len(expected):
+        problems.append(f"trial count {len(replayed)} != {len(expected)}")
+    missing = [c for c in expected.columns if c not in replayed.columns]
+    if missing:
+        problems.append(f"columns missing from replay: {missing}")
+    n = min(len(replayed), len(expected))
+    for column in expected.columns:
+        if column in missing:
+            continue
+        a, b = replayed[column].iloc[:n], expected[column].iloc[:n]
+        numeric = all(pd.api.types.is_numeric_dtype(x) and not pd.api.types.is_bool_dtype(x) for x in (a, b))
+        if numeric:
+            diff = ~((a - b).abs().le(1e-9) | (a.isna() & b.isna()))
+        else:
+            diff = ~((a.astype(str) == b.astype(str)) | (a.isna() & b.isna()))
+        if diff.any():
+            row = int(diff.idxmax())
+            problems.append(f"{column}: {int(diff.sum())} rows differ (first row {row}: {a[row]!r} != {b[row]!r})")
+    return problems
+
+
+def replay_session(
+    cfg: Dict[str, Any],
+    log_path: str | Path,
+    *,
+    expected: Optional[str | Path] = None,
+    tables_dir: Optional[str | Path] = None,
+    task_root: Optional[Path] = None,
+) -> ReplayReport:
+    """
+    Re-run the session recorded in ``log_path`` and compare it with ``expected``
+    (default: the ``res_file`` named in the log header, looked up by file name
+    in ``tables_dir`` when given). Fails if there is no table to compare against.
+    """
+    from .headless import run_headless
+
+    report = ReplayReport(log_path=str(log_path))
+    try:
+        header = session_header(log_path)
+    except UnsupportedLog as exc:
+        report.mismatches.append(str(exc))
+        return report
+    responder = ReplayResponder(iter_events(log_path, event="act"))
+    try:
+        result = run_headless(
+            cfg,
+            task_root=task_root,
+            seed=header.get("seed"),
+            participant_id=header.get("participant_id"),
+            responder=responder,
+            write_outputs=False,
+            frame_rate=header.get("frame_rate", 60.0),
+        )
+    except ReplayMismatch as exc:
+        report.n_acts = responder.n_acts
+        report.mismatches.append(str(exc))
+        return report
+    report.n_acts = responder.n_acts
+    report.n_trials = len(result.trials)
+
+    if expected is None and header.get("res_file"):
+        res_file = Path(header["res_file"])
+        expected = Path(tables_dir) / res_file.name if tables_dir is not None else res_file
+    if expected is None or not Path(expected).is_file():
+        where = f"{expected} does not exist" if expected is not None else "the log header names no result file"
+        report.mismatches.append(f"no archived trial table to compare against: {where} (use --tables DIR)")
+        return report
+
+    import pandas as pd
+
+    report.expected = str(expected)
+    report.mismatches += compare_tables(result.trials.to_dataframe(), pd.read_csv(expected))
+    return report
+
+
+def _replay_one(log_path: str, config_path: str, task_root: Optional[str], tables_dir: Optional[str] = None) -> ReplayReport:
+    from .population import _load_config
+
+    return replay_session(
+        _load_config(config_path),
+        log_path,
+        tables_dir=tables_dir,
+        task_root=Path(task_root) if task_root else None,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay simulated MID sessions from their event logs and verify the trial tables.")
+    parser.add_argument("logs", nargs="+", help="*_sim_events.jsonl files.")
+    parser.add_argument("--config", default="config/config_sampler_sim.yaml", help="Config the sessions were run with.")
+    parser.add_argument("--workers", type=int, default=1, help="Process count.")
+    parser.add_argument("--tables", default=None, help="Directory holding the archived trial CSVs (default: the res_file path in each log header).")
+    args = parser.parse_args(argv)
+
+    run_one = partial(_replay_one, config_path=args.config, task_root=str(Path.cwd()), tables_dir=args.tables)
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            reports = list(pool.map(run_one, args.logs, chunksize=8))
+    else:
+        reports = [run_one(path) for path in args.logs]
+
+    failed = [r for r in reports if not r.ok]
+    for r in reports:
+        status = "OK  " if r.ok else "FAIL"
+        checked = f" vs {Path(r.expected).name}" if r.expected else ""
+        print(f"[Replay] {status} {r.log_path}: {r.n_acts} acts, {r.n_trials} trials{checked}")
+        for problem in r.mismatches:
+            print(f"         - {problem}")
+    print(f"[Replay] {len(reports) - len(failed)}/{len(reports)} sessions reproduced")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
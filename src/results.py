@@ -0,0 +1,149 @@
+"""
+Streaming, crash-safe trial result writer.
+
+Each trial row is appended to a JSON-lines journal (``<res_file>.partial.jsonl``)
+and flushed as soon as the trial returns, so an abort mid-session keeps every
+completed trial. On close the journal is materialized into ``res_file`` with
+the same ``pd.DataFrame(rows).to_csv(index=False)`` call the task always used,
+so the CSV has the same columns in the same order as the in-memory path; new
+columns appearing mid-session are handled by the journal being schema-free.
+Values pass through JSON, so tuples and sets come back as lists and other
+non-JSON values as their ``str()``.
+
+A leftover journal from a crashed run can be turned into a CSV with::
+
+    python -m src.results recover outputs/human/sub-101_task_eeg_mid_....csv.partial.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+JOURNAL_SUFFIX = ".partial.jsonl"
+RESULT_FORMATS = ("csv", "parquet")
+
+
+def _json_default(value: Any) -> Any:
+    # numpy scalars (e.g. from custom condition generators) expose .item().
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def iter_journal(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Yield rows from a journal, skipping a torn final line left by a crash."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+
+def materialize(journal_path: str | Path, res_file: str | Path, result_format: str = "csv") -> str:
+    """Write the journal rows to ``res_file`` (and a ``.parquet`` sibling for ``parquet``)."""
+    import pandas as pd
+
+    df = pd.DataFrame(list(iter_journal(journal_path)))
+    df.to_csv(res_file, index=False)
+    if result_format == "parquet":
+        try:
+            df.to_parquet(Path(res_file).with_suffix(".parquet"), index=False)
+        except ImportError as exc:
+            raise ImportError("result_format 'parquet' requires pyarrow: pip install pyarrow") from exc
+    return str(res_file)
+
+
+class TrialResultWriter:
+    """
+    Append-only per-trial writer.
+
+    - ``fsync_every``: 0 flushes to the OS after each row; N > 0 also fsyncs every N rows.
+    - ``result_format``: ``csv`` (default) or ``parquet`` (CSV plus a columnar Parquet copy).
+    """
+
+    def __init__(self, res_file: str, *, fsync_every: int = 0, result_format: str = "csv"):
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"[TrialResultWriter] result_format must be one of {RESULT_FORMATS}, got {result_format!r}")
+        self.res_file = str(res_file)
+        self.journal_path = self.res_file + JOURNAL_SUFFIX
+        self.fsync_every = int(fsync_every)
+        self.result_format = result_format
+        self.n_rows = 0
+        self._fh = None
+
+    def __enter__(self) -> "TrialResultWriter":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def open(self) -> "TrialResultWriter":
+        Path(self.journal_path).parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.journal_path, "a", encoding="utf-8")
+        return self
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(row, ensure_ascii=False, default=_json_default) + "\n")
+        self._fh.flush()
+        self.n_rows += 1
+        if self.fsync_every and self.n_rows % self.fsync_every == 0:
+            os.fsync(self._fh.fileno())
+
+    def close(self) -> Optional[str]:
+        """Finalize ``res_file`` from the journal and remove the journal."""
+        if self._fh is None:
+            return None
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        self._fh = None
+        if self.n_rows == 0:
+            os.remove(self.journal_path)
+            return None
+        materialize(self.journal_path, self.res_file, self.result_format)
+        os.remove(self.journal_path)
+        return self.res_file
+
+
+def streaming_trial(func, writer: TrialResultWriter, block_id: str):
+    """
+    Wrap a trial function for ``BlockUnit.run_trial`` so each row is written as
+    soon as the trial returns, with the same ``trial_index``/``block_id``/``condition``
+    fields ``BlockUnit`` adds afterwards.
+    """
+    trial_index = 0
+
+    def run(win, kb, settings, condition, **kwargs):
+        nonlocal trial_index
+        result = func(win, kb, settings, condition, **kwargs)
+        row = dict(result)
+        row.update({"trial_index": trial_index, "block_id": block_id, "condition": condition})
+        writer.write(row)
+        trial_index += 1
+        return result
+
+    return run
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Trial result journal utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("recover", help="Rebuild a result CSV from a leftover .partial.jsonl journal.")
+    rec.add_argument("journal")
+    rec.add_argument("--format", default="csv", choices=RESULT_FORMATS)
+    args = parser.parse_args(argv)
+
+    journal = str(args.journal)
+    res_file = journal[: -len(JOURNAL_SUFFIX)] if journal.endswith(JOURNAL_SUFFIX) else journal + ".csv"
+    print(f"[Results] recovered -> {materialize(journal, res_file, args.format)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,43 @@ def run_trial(
     trigger_runtime,
     block_id=None,
     block_idx=None,
+    unit_factory=None,
+    set_context=set_trial_context,
+    trial_id_fn=next_trial_id,
+    stats=None,
+    probe=None,
+    schedule=None,
+    checkpoint=None,
+    new_row=None,
 ):
     """
     Run one MID trial (task-specific phases for responder context).
+
+    ``unit_factory``, ``set_context`` and ``trial_id_fn`` default to psyflow's
+    ``StimUnit``, ``set_trial_context`` and ``next_trial_id``; the headless
+    backend (``src/headless.py``) swaps them for window-free, per-session
+    equivalents driven by a virtual clock. ``stats`` (``src.stats.SessionStats``)
+    receives one running-aggregate update per trial; ``probe``
+    (``src.timing_probe.TimingProbe``) records per-phase onset timing.
+    ``schedule`` is an iterator of precompiled ``src.schedule.TrialPlan`` entries
+    supplying this trial's jittered durations. ``checkpoint``
+    (``src.checkpoint.ControllerCheckpoint``) saves the staircase after the update.
+    ``new_row`` returns the mapping the trial's fields are written into (default:
+    a new dict); headless runs pass ``TrialTable.new_row`` so each trial is
+    written straight into the preallocated columnar table.
     """
-    trial_id = next_trial_id()
-    trial_data = {"condition": condition, "trial_id": trial_id}
-    make_unit = partial(StimUnit, win=win, kb=kb, runtime=trigger_runtime)
+    trial_id = trial_id_fn()
+    anticipation_duration = settings.anticipation_duration
+    prefeedback_duration = settings.prefeedback_duration
+    if schedule is not None:
+        plan = next(schedule)
+        if plan.condition != condition:
+            raise ValueError(f"[MID] schedule out of sync: planned {plan.condition!r}, got {condition!r}")
+        anticipation_duration = plan.anticipation_duration
+        prefeedback_duration = plan.prefeedback_duration
+    trial_data = new_row() if new_row is not None else {}
+    trial_data.update({"condition": condition, "trial_id": trial_id})
+    make_unit = unit_factory or partial(StimUnit, win=win, kb=kb, runtime=trigger_runtime)
 
     make_unit(unit_label="cue").add_stim(stim_bank.get(f"{condition}_cue")).show(
         duration=settings.cue_duration,
@@ -27,11 +57,11 @@ def run_trial(
     ).to_dict(trial_data)
 
     anti = make_unit(unit_label="anticipation").add_stim(stim_bank.get("fixation"))
-    set_trial_context(
+    set_context(
         anti,
         trial_id=trial_id,
         phase="anticipation_fixation",
-        deadline_s=settings.anticipation_duration,
+        deadline_s=anticipation_duration,
         valid_keys=list(settings.key_list),
         block_id=block_id,
         condition_id=str(condition),
@@ -40,7 +70,7 @@ def run_trial(
     )
     anti.capture_response(
         keys=settings.key_list,
-        duration=settings.anticipation_duration,
+        duration=anticipation_duration,
         onset_trigger=settings.triggers.get(f"{condition}_anti_onset"),
         terminate_on_response=False,
     )
@@ -50,7 +80,7 @@ def run_trial(
 
     duration = controller.get_duration(condition)
     target = make_unit(unit_label="target").add_stim(stim_bank.get(f"{condition}_target"))
-    set_trial_context(
+    set_context(
         target,
         trial_id=trial_id,
         phase="target_response_window",
@@ -76,7 +106,7 @@ def run_trial(
     target.to_dict(trial_data)
 
     make_unit(unit_label="prefeedback_fixation").add_stim(stim_bank.get("fixation")).show(
-        duration=settings.prefeedback_duration,
+        duration=prefeedback_duration,
         onset_trigger=settings.triggers.get("fixation_onset"),
     ).to_dict(trial_data)
 
@@ -86,6 +116,10 @@ def run_trial(
     penalty_if_miss = {"win": 0, "lose": -settings.delta, "neut": 0}
     delta = reward_if_hit.get(condition, 0) if hit else penalty_if_miss.get(condition, 0)
     controller.update(hit, condition)
+    if checkpoint is not None:
+        checkpoint.after_trial(controller, trial_id)
+    if stats is not None:
+        stats.update(block_id, condition, target.get_state("hit", False), delta, target.get_state("rt"))
 
     hit_type = "hit" if hit else "miss"
     fb_stim = stim_bank.get(f"{condition}_{hit_type}_feedback")
@@ -95,4 +129,6 @@ def run_trial(
     )
     fb.set_state(hit=hit, delta=delta).to_dict(trial_data)
 
+    if probe is not None:
+        probe.record_trial(trial_data)
     return trial_data
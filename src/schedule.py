@@ -0,0 +1,162 @@
+"""
+Precompiled MID session schedules.
+
+:func:`load_or_compile` builds the whole session plan ahead of time — per-block
+condition sequences (from ``BlockUnit.generate_conditions``, so the order is
+identical to generating them at block start), the jittered anticipation and
+prefeedback durations of every trial, and the trigger codes per condition — and
+caches it as compact JSON keyed by a hash of the relevant config and the block
+seeds. Blocks then replay the plan with ``BlockUnit.add_condition`` and
+``run_trial(schedule=...)``; with ``seed_mode: same_across_sub`` every
+participant and every batch-sim worker shares one compiled file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+SCHEDULE_VERSION = 1
+TRIGGER_EVENTS = ("cue_onset", "anti_onset", "target_onset", "key_press", "no_response", "hit_fb_onset", "miss_fb_onset")
+_PLANS: Dict[str, "SessionPlan"] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class TrialPlan:
+    condition: str
+    anticipation_duration: float
+    prefeedback_duration: float
+
+
+@dataclass
+class SessionPlan:
+    key: str
+    blocks: List[List[TrialPlan]]
+    triggers: Dict[str, Dict[str, Optional[int]]]
+
+    def block(self, block_idx: int) -> List[TrialPlan]:
+        return self.blocks[block_idx]
+
+    def conditions(self, block_idx: int) -> List[str]:
+        return [trial.condition for trial in self.blocks[block_idx]]
+
+    def replay(self, block_idx: int) -> Iterator[TrialPlan]:
+        return iter(self.blocks[block_idx])
+
+    def head(self, n_trials: int) -> "SessionPlan":
+        """Single-block plan of the first ``n_trials`` trials (e.g. for a QA spot check)."""
+        trials = [trial for block in self.blocks for trial in block][: int(n_trials)]
+        return SessionPlan(key=f"{self.key}:head{len(trials)}", blocks=[trials], triggers=self.triggers)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": SCHEDULE_VERSION,
+            "key": self.key,
+            "triggers": self.triggers,
+            "blocks": [
+                {
+                    "conditions": [t.condition for t in block],
+                    "anticipation": [t.anticipation_duration for t in block],
+                    "prefeedback": [t.prefeedback_duration for t in block],
+                }
+                for block in self.blocks
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "SessionPlan":
+        blocks = [
+            [TrialPlan(*row) for row in zip(b["conditions"], b["anticipation"], b["prefeedback"])]
+            for b in data["blocks"]
+        ]
+        return cls(key=data["key"], blocks=blocks, triggers=data["triggers"])
+
+
+def _sample(duration, rng: random.Random) -> float:
+    # Same rule StimUnit applies to a duration spec: (min, max) is uniform, scalars are fixed.
+    if isinstance(duration, (list, tuple)):
+        if len(duration) == 2:
+            return rng.uniform(*duration)
+        if len(duration) == 1:
+            return float(duration[0])
+        raise ValueError(f"Duration list/tuple must have 1 or 2 elements, got {len(duration)}")
+    return float(duration)
+
+
+def schedule_key(settings) -> str:
+    """Hash of everything the plan depends on: structure, conditions, jitter ranges, triggers, seeds."""
+    payload = {
+        "version": SCHEDULE_VERSION,
+        "total_blocks": settings.total_blocks,
+        "trials_per_block": settings.trials_per_block,
+        "conditions": list(settings.conditions),
+        "anticipation_duration": settings.anticipation_duration,
+        "prefeedback_duration": settings.prefeedback_duration,
+        "block_seed": list(settings.block_seed),
+        "triggers": dict(settings.triggers),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:20]
+
+
+def is_seeded(settings) -> bool:
+    """True when every block has a seed, i.e. the plan is reproducible and safe to cache."""
+    seeds = getattr(settings, "block_seed", None)
+    return bool(seeds) and all(seed is not None for seed in seeds)
+
+
+def compile_schedule(settings) -> SessionPlan:
+    """Generate the full session plan from ``settings`` (after ``add_subinfo`` and ``settings.triggers``)."""
+    from psyflow import BlockUnit
+
+    blocks = []
+    for block_i in range(settings.total_blocks):
+        unit = BlockUnit(block_id=f"block_{block_i}", block_idx=block_i, settings=settings).generate_conditions()
+        # An unseeded block gets unseeded jitter too, not one shared "None" stream.
+        rng = random.Random(f"{unit.seed}:{block_i}:jitter") if unit.seed is not None else random.Random()
+        blocks.append([
+            TrialPlan(
+                condition=condition,
+                anticipation_duration=_sample(settings.anticipation_duration, rng),
+                prefeedback_duration=_sample(settings.prefeedback_duration, rng),
+            )
+            for condition in unit.conditions
+        ])
+    triggers = {
+        condition: {event: settings.triggers.get(f"{condition}_{event}") for event in TRIGGER_EVENTS}
+        for condition in settings.conditions
+    }
+    return SessionPlan(key=schedule_key(settings), blocks=blocks, triggers=triggers)
+
+
+def load_or_compile(settings, cache_dir: str | Path | None = None) -> SessionPlan:
+    """
+    Return the plan for ``settings`` from memory, the on-disk cache, or a fresh compile.
+    With ``cache_dir=None`` the plan is only memoized in-process. A plan with
+    any unseeded block (``block_seed`` entry None) is random per session, so
+    it is always compiled fresh and never memoized or cached.
+    """
+    if not is_seeded(settings):
+        return compile_schedule(settings)
+    key = schedule_key(settings)
+    plan = _PLANS.get(key)
+    if plan is not None:
+        return plan
+
+    path = Path(cache_dir) / f"schedule_{key}.json" if cache_dir is not None else None
+    if path is None:
+        plan = compile_schedule(settings)
+    elif path.is_file():
+        plan = SessionPlan.from_json(json.loads(path.read_text(encoding="utf-8")))
+    else:
+        plan = compile_schedule(settings)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(plan.to_json(), separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+    _PLANS[key] = plan
+    return plan
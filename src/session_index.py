@@ -0,0 +1,425 @@
+"""
+Incremental cross-session index of the ``outputs/`` tree.
+
+:func:`update_index` walks a directory and records every session's metadata
+and summaries in SQLite (``outputs/session_index.sqlite``), so group-level
+queries read one small database instead of re-parsing every file. Per file
+kind:
+
+- result CSVs (``sub-*.csv``, ``qa_trace.csv``): trial count, hit rate, score
+  and mean RT per session, per block (``blocks``) and per condition
+  (``conditions``, with mean and final target duration);
+- settings JSON: subject, mode, seeds, controller parameters and a hash of the
+  task configuration (settings minus per-session fields, so sessions run with
+  the same config share it);
+- sim event logs (``*_sim_events.jsonl``/``.evc``): the session header
+  (participant, seed, frame rate);
+- controller checkpoints (``*_controller.jsonl``): the controller parameters.
+
+Files are tied to a session by the result file stem they belong to
+(``res_file`` in settings JSON and event-log headers, the
+``_controller.jsonl`` suffix). The ``files`` table keeps size, mtime and
+SHA-256 per path: unchanged size/mtime skips the file without reading it, a
+changed stat with the same hash only refreshes the stat, and anything else is
+re-ingested in its own transaction. Files that disappeared are dropped. The
+``sessions`` and ``session_conditions`` views join the per-kind tables into one
+row per session (or per session and condition).
+
+Usage::
+
+    python -m src.session_index update [--root outputs]
+    python -m src.session_index query "SELECT condition, COUNT(*) AS n, AVG(hit_rate) AS hit_rate
+        FROM session_conditions WHERE controller_step = 0.03 GROUP BY condition"
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .checkpoint import CHECKPOINT_SUFFIX
+
+DEFAULT_ROOT = "outputs"
+DEFAULT_DB = "outputs/session_index.sqlite"
+INDEX_VERSION = 1
+EVENTS_SUFFIXES = ("_sim_events.jsonl", "_sim_events.evc")
+# Merged multi-session tables and side outputs that are not one session's trials.
+SKIP_PREFIXES = ("population_", "recovery_")
+SKIP_SUFFIXES = ("_triggers.csv", ".partial.jsonl", "_timing.json", "_trigger_dispatch.json", "_report.json")
+# Settings fields that differ between sessions of the same configuration.
+SESSION_FIELDS = ("subject_id", "subname", "age", "gender", "res_file", "log_file", "json_file", "save_path",
+                  "block_seed", "overall_seed", "mode", "controller_resume_from")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    session_key TEXT,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_session ON files(session_key);
+CREATE TABLE IF NOT EXISTS results (
+    session_key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    n_trials INTEGER,
+    n_blocks INTEGER,
+    hit_rate REAL,
+    total_score REAL,
+    mean_rt REAL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    session_key TEXT NOT NULL,
+    block_id TEXT NOT NULL,
+    n_trials INTEGER,
+    hit_rate REAL,
+    score REAL,
+    mean_rt REAL,
+    PRIMARY KEY (session_key, block_id)
+);
+CREATE TABLE IF NOT EXISTS conditions (
+    session_key TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    n_trials INTEGER,
+    hit_rate REAL,
+    score REAL,
+    mean_rt REAL,
+    target_duration_mean REAL,
+    target_duration_final REAL,
+    PRIMARY KEY (session_key, condition)
+);
+CREATE TABLE IF NOT EXISTS settings (
+    session_key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    subject_id TEXT,
+    mode TEXT,
+    task_name TEXT,
+    overall_seed INTEGER,
+    block_seed TEXT,
+    total_blocks INTEGER,
+    total_trials INTEGER,
+    config_hash TEXT,
+    controller_type TEXT,
+    controller_step REAL,
+    target_accuracy REAL,
+    controller TEXT
+);
+CREATE TABLE IF NOT EXISTS event_logs (
+    session_key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    session_id TEXT,
+    participant_id TEXT,
+    seed INTEGER,
+    frame_rate REAL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    session_key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    controller_type TEXT,
+    controller_step REAL,
+    target_accuracy REAL,
+    controller TEXT
+);
+CREATE VIEW IF NOT EXISTS sessions AS
+SELECT k.session_key,
+       COALESCE(s.subject_id, e.participant_id) AS subject_id,
+       s.mode,
+       s.task_name,
+       COALESCE(e.seed, s.overall_seed) AS seed,
+       s.config_hash,
+       COALESCE(s.controller_type, c.controller_type) AS controller_type,
+       COALESCE(s.controller_step, c.controller_step) AS controller_step,
+       COALESCE(s.target_accuracy, c.target_accuracy) AS target_accuracy,
+       e.frame_rate,
+       r.n_trials, r.n_blocks, r.hit_rate, r.total_score, r.mean_rt,
+       r.path AS res_file
+FROM (SELECT DISTINCT session_key FROM files WHERE session_key IS NOT NULL) k
+LEFT JOIN results r USING (session_key)
+LEFT JOIN settings s USING (session_key)
+LEFT JOIN event_logs e USING (session_key)
+LEFT JOIN checkpoints c USING (session_key);
+CREATE VIEW IF NOT EXISTS session_conditions AS
+SELECT s.session_key, s.subject_id, s.mode, s.seed, s.config_hash, s.controller_type, s.controller_step,
+       s.target_accuracy, c.condition, c.n_trials, c.hit_rate, c.score, c.mean_rt,
+       c.target_duration_mean, c.target_duration_final
+FROM sessions s JOIN conditions c USING (session_key);
+"""
+
+# Per-kind tables holding rows derived from one file (cleared before re-ingesting it).
+_DERIVED = {
+    "results": ("results", "blocks", "conditions"),
+    "settings": ("settings",),
+    "events": ("event_logs",),
+    "checkpoint": ("checkpoints",),
+}
+
+
+def _connect(db_path: str | Path) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if version is not None and int(version[0]) != INDEX_VERSION:
+        # Summaries changed shape: forget every file so the next scan re-ingests them.
+        for table in ("files",) + tuple(t for tables in _DERIVED.values() for t in tables):
+            conn.execute(f"DELETE FROM {table}")
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+    conn.commit()
+    return conn
+
+
+def file_kind(path: Path) -> Optional[str]:
+    """Which ingester handles ``path``, or None for files the index does not track."""
+    name = path.name
+    if name.startswith(SKIP_PREFIXES) or name.endswith(SKIP_SUFFIXES):
+        return None
+    if name.endswith(CHECKPOINT_SUFFIX):
+        return "checkpoint"
+    if name.endswith(EVENTS_SUFFIXES):
+        return "events"
+    if path.suffix == ".csv":
+        return "results"
+    if path.suffix == ".json":
+        return "settings"
+    return None
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _session_key(directory: Path, res_file: Any, root: Path) -> Optional[str]:
+    """Result-file stem relative to ``root``; ``res_file`` is resolved next to the file that names it."""
+    if not res_file:
+        return None
+    res = directory / Path(str(res_file)).name
+    return res.with_suffix("").relative_to(root).as_posix()
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _controller_fields(controller: Dict[str, Any]) -> Tuple[Optional[str], Optional[float], Optional[float], str]:
+    kind = controller.get("type") or "staircase"
+    kind = {"Controller": "staircase", "BayesianController": "bayesian"}.get(kind, kind)
+    return (kind, _float(controller.get("step")), _float(controller.get("target_accuracy")),
+            json.dumps(controller, sort_keys=True, default=str))
+
+
+def _ingest_results(path: Path, root: Path) -> Tuple[Optional[str], Dict[str, List[tuple]]]:
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    if "condition" not in df or "feedback_hit" not in df:
+        return None, {}
+    key = path.with_suffix("").relative_to(root).as_posix()
+    hit = df["feedback_hit"].astype(str).str.lower().isin(("true", "1", "1.0")).astype(float)
+    score = pd.to_numeric(df["feedback_delta"], errors="coerce") if "feedback_delta" in df else hit * float("nan")
+    rt = pd.to_numeric(df["target_rt"], errors="coerce") if "target_rt" in df else hit * float("nan")
+    duration = pd.to_numeric(df["target_duration"], errors="coerce") if "target_duration" in df else hit * float("nan")
+    frame = pd.DataFrame({"condition": df["condition"].astype(str), "hit": hit, "score": score, "rt": rt, "duration": duration})
+    frame["block_id"] = df["block_id"].astype(str) if "block_id" in df else "block_0"
+
+    def clean(value):
+        return None if pd.isna(value) else float(value)
+
+    rows: Dict[str, List[tuple]] = {
+        "results": [(key, str(path), len(frame), int(frame["block_id"].nunique()), clean(frame["hit"].mean()),
+                     clean(frame["score"].sum(min_count=1)), clean(frame["rt"].mean()))],
+        "blocks": [
+            (key, block, len(g), clean(g["hit"].mean()), clean(g["score"].sum(min_count=1)), clean(g["rt"].mean()))
+            for block, g in frame.groupby("block_id", sort=True)
+        ],
+        "conditions": [
+            (key, cond, len(g), clean(g["hit"].mean()), clean(g["score"].sum(min_count=1)), clean(g["rt"].mean()),
+             clean(g["duration"].mean()), clean(g["duration"].dropna().iloc[-1]) if g["duration"].notna().any() else None)
+            for cond, g in frame.groupby("condition", sort=True)
+        ],
+    }
+    return key, rows
+
+
+def config_hash(settings: Dict[str, Any]) -> str:
+    """Hash of a settings JSON without the per-session fields (:data:`SESSION_FIELDS`)."""
+    payload = {k: v for k, v in settings.items() if k not in SESSION_FIELDS}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _infer_mode(path: Path, root: Path) -> Optional[str]:
+    for part in path.relative_to(root).parts[:-1]:
+        for mode in ("human", "qa", "sim"):
+            if part == mode or part.startswith(mode + "_"):
+                return mode
+    return None
+
+
+def _ingest_settings(path: Path, root: Path) -> Tuple[Optional[str], Dict[str, List[tuple]]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or "res_file" not in data or "task_name" not in data:
+        return None, {}
+    key = _session_key(path.parent, data["res_file"], root)
+    if key is None:
+        return None, {}
+    controller = data.get("controller") if isinstance(data.get("controller"), dict) else {}
+    kind, step, target, controller_json = _controller_fields(controller) if controller else (None, None, None, None)
+    block_seed = data.get("block_seed")
+    row = (key, str(path), None if data.get("subject_id") is None else str(data["subject_id"]),
+           data.get("mode") or _infer_mode(path, root), data.get("task_name"), data.get("overall_seed"),
+           json.dumps(block_seed) if block_seed is not None else None, data.get("total_blocks"),
+           data.get("total_trials"), config_hash(data), kind, step, target, controller_json)
+    return key, {"settings": [row]}
+
+
+def _ingest_events(path: Path, root: Path) -> Tuple[Optional[str], Dict[str, List[tuple]]]:
+    from .event_store import iter_events
+
+    header = next(iter_events(path), None)
+    if not header or header.get("event") != "session":
+        return None, {}
+    key = _session_key(path.parent, header.get("res_file"), root)
+    if key is None:
+        return None, {}
+    row = (key, str(path), header.get("session_id"), header.get("participant_id"), header.get("seed"),
+           _float(header.get("frame_rate")))
+    return key, {"event_logs": [row]}
+
+
+def _ingest_checkpoint(path: Path, root: Path) -> Tuple[Optional[str], Dict[str, List[tuple]]]:
+    with open(path, encoding="utf-8") as f:
+        first = json.loads(f.readline() or "{}")
+    params = first.get("params")
+    if not isinstance(params, dict):
+        return None, {}
+    key = _session_key(path.parent, path.name[: -len(CHECKPOINT_SUFFIX)] + ".csv", root)
+    return key, {"checkpoints": [(key, str(path), *_controller_fields(params))]}
+
+
+_INGESTERS = {
+    "results": _ingest_results,
+    "settings": _ingest_settings,
+    "events": _ingest_events,
+    "checkpoint": _ingest_checkpoint,
+}
+
+
+def _walk(root: Path) -> Iterator[Tuple[Path, str]]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            kind = file_kind(path)
+            if kind is not None:
+                yield path, kind
+
+
+def _forget(conn: sqlite3.Connection, kind: str, session_key: Optional[str], path: str) -> None:
+    if session_key is None:
+        return
+    for table in _DERIVED[kind]:
+        if table in ("blocks", "conditions"):
+            conn.execute(f"DELETE FROM {table} WHERE session_key = ?", (session_key,))
+        else:
+            conn.execute(f"DELETE FROM {table} WHERE session_key = ? AND path = ?", (session_key, path))
+
+
+def update_index(root: str | Path = DEFAULT_ROOT, db_path: str | Path = DEFAULT_DB) -> Dict[str, int]:
+    """Bring the index at ``db_path`` up to date with ``root``; returns counts per outcome."""
+    root = Path(root).resolve()
+    conn = _connect(db_path)
+    known = {
+        row[0]: row[1:]
+        for row in conn.execute("SELECT path, kind, session_key, size, mtime_ns, sha256 FROM files")
+    }
+    counts = {"new": 0, "changed": 0, "touched": 0, "unchanged": 0, "removed": 0, "failed": 0}
+    seen = set()
+    for path, kind in _walk(root):
+        rel = path.relative_to(root).as_posix()
+        seen.add(rel)
+        stat = path.stat()
+        old = known.get(rel)
+        if old is not None and old[2] == stat.st_size and old[3] == stat.st_mtime_ns:
+            counts["unchanged"] += 1
+            continue
+        digest = _sha256(path)
+        if old is not None and old[4] == digest:
+            conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (stat.st_size, stat.st_mtime_ns, rel))
+            conn.commit()
+            counts["touched"] += 1
+            continue
+        try:
+            key, rows = _INGESTERS[kind](path, root)
+        except Exception as exc:  # a half-written or foreign file must not stop the scan
+            print(f"[Index] skipped {rel}: {type(exc).__name__}: {exc}")
+            counts["failed"] += 1
+            key, rows = None, {}
+        with conn:
+            if old is not None:
+                _forget(conn, old[0], old[1], str(path))
+            for table, table_rows in rows.items():
+                width = len(table_rows[0]) if table_rows else 0
+                conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({', '.join('?' * width)})", table_rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (rel, kind, key, stat.st_size, stat.st_mtime_ns, digest, time.time()),
+            )
+        counts["changed" if old is not None else "new"] += 1
+
+    with conn:
+        for rel in set(known) - seen:
+            kind, key = known[rel][:2]
+            _forget(conn, kind, key, str(root / rel))
+            conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+            counts["removed"] += 1
+    conn.close()
+    return counts
+
+
+def query(sql: str, db_path: str | Path = DEFAULT_DB, params: Tuple[Any, ...] = ()):
+    """Run ``sql`` against the session index and return a DataFrame."""
+    import pandas as pd
+
+    with sqlite3.connect(str(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Index MID session outputs in SQLite and query them.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update_p = sub.add_parser("update", help="Ingest new or changed files under --root.")
+    update_p.add_argument("--root", default=DEFAULT_ROOT, help="Directory to scan.")
+    update_p.add_argument("--db", default=DEFAULT_DB, help="SQLite index database.")
+    query_p = sub.add_parser("query", help="Run SQL against the index.")
+    query_p.add_argument("sql", nargs="?", default="SELECT * FROM sessions ORDER BY session_key")
+    query_p.add_argument("--db", default=DEFAULT_DB, help="SQLite index database.")
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        t0 = time.perf_counter()
+        counts = update_index(args.root, args.db)
+        summary = ", ".join(f"{n} {name}" for name, n in counts.items() if n)
+        print(f"[Index] {args.root}: {summary or 'nothing to scan'} in {time.perf_counter() - t0:.2f}s -> {args.db}")
+    else:
+        print(query(args.sql, args.db).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
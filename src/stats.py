@@ -0,0 +1,106 @@
+"""
+Running per-block / per-condition score aggregates.
+
+``run_trial`` feeds one update per trial, so block-break and goodbye screens
+(and any live monitoring) read hit rates, scores and RT summaries in O(1)
+instead of re-walking trial lists.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional, Tuple
+
+
+class RunningAggregate:
+    """Trial count, hit count, score sum and Welford RT moments for one slice of trials."""
+
+    __slots__ = ("trials", "hits", "score", "rt_n", "rt_mean", "_rt_m2", "rt_min", "rt_max")
+
+    def __init__(self):
+        self.trials = 0
+        self.hits = 0
+        self.score = 0
+        self.rt_n = 0
+        self.rt_mean = 0.0
+        self._rt_m2 = 0.0
+        self.rt_min = math.inf
+        self.rt_max = -math.inf
+
+    def add(self, hit: bool, delta: float, rt: Optional[float] = None) -> None:
+        self.trials += 1
+        self.hits += bool(hit)
+        self.score += delta
+        if rt is not None:
+            self.rt_n += 1
+            d = rt - self.rt_mean
+            self.rt_mean += d / self.rt_n
+            self._rt_m2 += d * (rt - self.rt_mean)
+            self.rt_min = min(self.rt_min, rt)
+            self.rt_max = max(self.rt_max, rt)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.trials if self.trials else 0.0
+
+    @property
+    def rt_sd(self) -> Optional[float]:
+        return math.sqrt(self._rt_m2 / (self.rt_n - 1)) if self.rt_n > 1 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trials": self.trials,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "score": self.score,
+            "rt_n": self.rt_n,
+            "rt_mean": self.rt_mean if self.rt_n else None,
+            "rt_sd": self.rt_sd,
+            "rt_min": self.rt_min if self.rt_n else None,
+            "rt_max": self.rt_max if self.rt_n else None,
+        }
+
+
+class SessionStats:
+    """
+    Session, per-block, per-condition and per-(block, condition) running aggregates.
+
+    ``hit`` is the target-window hit (``target_hit``), matching what the block
+    break screen has always reported; ``delta`` is ``feedback_delta``.
+    """
+
+    def __init__(self):
+        self.session = RunningAggregate()
+        self.blocks: Dict[str, RunningAggregate] = {}
+        self.conditions: Dict[str, RunningAggregate] = {}
+        self.block_conditions: Dict[Tuple[str, str], RunningAggregate] = {}
+
+    def update(self, block_id: Optional[str], condition: str, hit: bool, delta: float, rt: Optional[float] = None) -> None:
+        block_id = str(block_id)
+        for agg in (
+            self.session,
+            self._get(self.blocks, block_id),
+            self._get(self.conditions, condition),
+            self._get(self.block_conditions, (block_id, condition)),
+        ):
+            agg.add(hit, delta, rt)
+
+    @staticmethod
+    def _get(table: Dict[Any, RunningAggregate], key: Any) -> RunningAggregate:
+        agg = table.get(key)
+        if agg is None:
+            agg = table[key] = RunningAggregate()
+        return agg
+
+    def block(self, block_id: str) -> RunningAggregate:
+        return self.blocks.get(str(block_id)) or RunningAggregate()
+
+    def condition(self, condition: str) -> RunningAggregate:
+        return self.conditions.get(condition) or RunningAggregate()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "session": self.session.to_dict(),
+            "blocks": {k: v.to_dict() for k, v in self.blocks.items()},
+            "conditions": {k: v.to_dict() for k, v in self.conditions.items()},
+        }
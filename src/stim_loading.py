@@ -0,0 +1,75 @@
+"""
+Lazy stimulus preloading for the MID task.
+
+``preload_mode: all`` (default) keeps the old ``StimBank.preload_all()``.
+``preload_mode: lazy`` builds only what the first screen needs (instruction +
+fixation) and warms the per-condition cue/target/feedback stimuli while the
+instruction is on screen, one stimulus per frame via :class:`StimWarmer`.
+Anything not warmed yet (e.g. a fast key press) is still built on first
+``StimBank.get``; stimuli a QA/sim run never draws are never built.
+
+GL objects belong to one window and cannot be shared between runs, so every
+run builds its own stimuli; nothing is memoized across runs.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+from psychopy import visual
+
+PRELOAD_MODES = ("all", "lazy")
+FIRST_SCREEN_STIMS = ("instruction_text", "instruction_text_voice", "fixation")
+TRIAL_STIM_TEMPLATES = ("{condition}_cue", "{condition}_target", "{condition}_hit_feedback", "{condition}_miss_feedback")
+
+
+def trial_stim_names(conditions: Iterable[str], available: Iterable[str]) -> Tuple[str, ...]:
+    """Stimuli ``run_trial`` draws for ``conditions``, in first-use order, limited to registered names."""
+    names = [
+        template.format(condition=condition)
+        for template in TRIAL_STIM_TEMPLATES
+        for condition in conditions
+    ]
+    available = set(available)
+    return tuple(name for name in dict.fromkeys(names) if name in available)
+
+
+class StimWarmer(visual.BaseVisualStim):
+    """
+    Invisible stimulus that instantiates one pending ``StimBank`` entry per ``draw()``.
+
+    Added to the instruction ``StimUnit``, it spreads stimulus construction over
+    the frames the participant spends reading, on the render thread that owns
+    the GL context.
+    """
+
+    def __init__(self, win, stim_bank, names: Iterable[str]):
+        super().__init__(win, name="stim_warmer", autoLog=False)
+        self.stim_bank = stim_bank
+        self.pending = deque(names)
+
+    def draw(self, win=None):
+        if self.pending:
+            self.stim_bank.get(self.pending.popleft())
+
+    @property
+    def done(self) -> bool:
+        return not self.pending
+
+
+def preload_stimuli(stim_bank, win, conditions, mode: str = "all") -> Tuple[object, Optional[StimWarmer]]:
+    """
+    Preload ``stim_bank`` according to ``mode`` and return ``(stim_bank, warmer)``.
+    ``warmer`` is None in ``all`` mode, otherwise it should be added to the instruction screen.
+    """
+    if mode not in PRELOAD_MODES:
+        raise ValueError(f"[MID] preload_mode must be one of {PRELOAD_MODES}, got {mode!r}")
+    if mode == "all":
+        return stim_bank.preload_all(), None
+
+    for name in FIRST_SCREEN_STIMS:
+        if stim_bank.has(name):
+            stim_bank.get(name)
+    names = trial_stim_names(conditions, stim_bank.keys())
+    return stim_bank, StimWarmer(win, stim_bank, names)
@@ -0,0 +1,289 @@
+"""
+Parameter sweep for adaptive-controller tuning.
+
+Takes grids of controller parameters (``controller_config`` keys, including ``type``) and
+``MidSamplerResponder`` ability parameters (``p_hit_*``, ``rt_mu_*``,
+``rt_sigma``, ...), runs ``--seeds`` headless sessions per grid cell across a
+process pool, and stores per-session, per-condition metrics in SQLite:
+
+- ``trials_to_converge``: first trial (within the condition) after which the
+  target duration stays within ``tolerance`` (default ``2 * step``) of its
+  mean over the last third of the session.
+- ``final_accuracy`` / ``accuracy_error``: hit rate over the last third, and
+  its difference from ``target_accuracy``.
+- ``duration_mean`` / ``duration_var``: target duration over the last third.
+
+Rows are committed as sessions finish; rerunning the same sweep skips every
+(cell, seed) already in the database. The ``cell_summary`` view averages the
+metrics over seeds.
+
+Grid file (YAML/JSON); a value is a scalar, a list, or a range
+(``{start, stop, num}`` inclusive linspace, or ``{start, stop, step}``)::
+
+    controller:
+      initial_duration: [0.2, 0.25]
+      step: {start: 0.01, stop: 0.04, step: 0.01}
+    responder:
+      p_hit_win: [0.7, 0.85]
+
+Usage::
+
+    python -m src.sweep run --grid sweeps/controller.yaml --seeds 0:20 --workers 16
+    python -m src.sweep query "SELECT * FROM cell_summary ORDER BY abs(accuracy_error) LIMIT 10"
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from .population import _load_config, parse_seeds, session_seed
+
+DEFAULT_DB = "outputs/sweep/sweep.sqlite"
+METRICS = ("n_trials", "hit_rate", "trials_to_converge", "final_accuracy", "accuracy_error", "duration_mean", "duration_var")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cells (
+    cell_id TEXT PRIMARY KEY,
+    config_path TEXT NOT NULL,
+    controller TEXT NOT NULL,
+    responder TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    cell_id TEXT NOT NULL REFERENCES cells(cell_id),
+    seed INTEGER NOT NULL,
+    condition TEXT NOT NULL,
+    n_trials INTEGER,
+    hit_rate REAL,
+    trials_to_converge INTEGER,
+    final_accuracy REAL,
+    accuracy_error REAL,
+    duration_mean REAL,
+    duration_var REAL,
+    PRIMARY KEY (cell_id, seed, condition)
+);
+CREATE TABLE IF NOT EXISTS done (
+    cell_id TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    PRIMARY KEY (cell_id, seed)
+);
+CREATE VIEW IF NOT EXISTS cell_summary AS
+SELECT s.cell_id, c.controller, c.responder, s.condition,
+       COUNT(*) AS n_sessions,
+       AVG(s.hit_rate) AS hit_rate,
+       AVG(s.trials_to_converge) AS trials_to_converge,
+       AVG(s.final_accuracy) AS final_accuracy,
+       AVG(s.accuracy_error) AS accuracy_error,
+       AVG(s.duration_mean) AS duration_mean,
+       AVG(s.duration_var) AS duration_var,
+       AVG(s.duration_mean * s.duration_mean) - AVG(s.duration_mean) * AVG(s.duration_mean) AS between_session_var
+FROM sessions s JOIN cells c USING (cell_id)
+GROUP BY s.cell_id, s.condition;
+"""
+
+
+@dataclass(frozen=True)
+class SweepJob:
+    config_path: str
+    cell_id: str
+    controller: Tuple[Tuple[str, Any], ...]
+    responder: Tuple[Tuple[str, Any], ...]
+    seed: int
+    tolerance: Optional[float]
+
+
+def expand_values(spec: Any) -> List[Any]:
+    """Expand a grid entry: scalar, list, ``{start, stop, num}`` or ``{start, stop, step}``."""
+    if isinstance(spec, dict):
+        start, stop = float(spec["start"]), float(spec["stop"])
+        if "num" in spec:
+            values = np.linspace(start, stop, int(spec["num"]))
+        else:
+            step = float(spec["step"])
+            values = np.arange(start, stop + step / 2, step)
+        return [round(float(v), 10) for v in values]
+    if isinstance(spec, (list, tuple)):
+        return list(spec)
+    return [spec]
+
+
+def _product(grid: Dict[str, Any]) -> List[Dict[str, Any]]:
+    names = sorted(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(expand_values(grid[n]) for n in names))]
+
+
+def cell_id(config_path: str, controller: Dict[str, Any], responder: Dict[str, Any]) -> str:
+    """Cell identity: config file name and contents plus the grid values, so an edited config starts fresh cells."""
+    config_sha = hashlib.sha256(Path(config_path).read_bytes()).hexdigest()
+    payload = {"config": Path(config_path).name, "config_sha256": config_sha, "controller": controller, "responder": responder}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def load_grid(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        grid = yaml.safe_load(f) or {}
+    extra = set(grid) - {"controller", "responder"}
+    if extra:
+        raise ValueError(f"[Sweep] grid file may only contain 'controller' and 'responder', got {extra}")
+    return {"controller": dict(grid.get("controller") or {}), "responder": dict(grid.get("responder") or {})}
+
+
+def condition_metrics(durations: np.ndarray, hits: np.ndarray, target_accuracy: float, tolerance: float) -> Dict[str, Any]:
+    """Convergence, final-accuracy and duration-spread metrics for one condition's trial sequence."""
+    n = len(durations)
+    if n == 0:
+        return {name: None for name in METRICS}
+    tail = max(1, n // 3)
+    final = durations[-tail:]
+    outside = np.flatnonzero(np.abs(durations - final.mean()) > tolerance)
+    final_accuracy = float(hits[-tail:].mean())
+    return {
+        "n_trials": n,
+        "hit_rate": float(hits.mean()),
+        "trials_to_converge": int(outside[-1] + 1) if len(outside) else 0,
+        "final_accuracy": final_accuracy,
+        "accuracy_error": final_accuracy - target_accuracy,
+        "duration_mean": float(final.mean()),
+        "duration_var": float(final.var()),
+    }
+
+
+def _run_sweep_job(job: SweepJob) -> Tuple[SweepJob, List[Dict[str, Any]]]:
+    from .headless import load_responder, run_headless
+    from .utils import build_controller
+
+    cfg = _load_config(job.config_path)
+    controller_cfg = {**cfg["controller_config"], **dict(job.controller), "enable_logging": False}
+    controller = build_controller(controller_cfg)
+    sim_cfg = dict(cfg["raw"].get("sim", {}) or {})
+    responder_cfg = dict(sim_cfg.get("responder", {}) or {})
+    responder_cfg["kwargs"] = {**(responder_cfg.get("kwargs") or {}), **dict(job.responder)}
+    responder = load_responder({**sim_cfg, "responder": responder_cfg})
+
+    result = run_headless(
+        {**cfg, "controller_config": controller_cfg},
+        seed=session_seed(job.seed, job.cell_id),
+        participant_id=f"sim{job.seed:03d}",
+        responder=responder,
+        write_outputs=False,
+    )
+    table = result.trials
+    codes = table.column("condition")
+    durations = table.column("target_duration")
+    hits = table.column("feedback_hit").astype(float)
+    tolerance = job.tolerance if job.tolerance is not None else 2 * controller.step
+    rows = []
+    for code, condition in enumerate(table.categories["condition"]):
+        mask = codes == code
+        rows.append({
+            "condition": condition,
+            **condition_metrics(durations[mask], hits[mask], controller.target_accuracy, tolerance),
+        })
+    return job, rows
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def run_sweep(
+    config_path: str,
+    grid: Dict[str, Dict[str, Any]],
+    seeds: Iterable[int],
+    *,
+    db_path: str = DEFAULT_DB,
+    workers: Optional[int] = None,
+    tolerance: Optional[float] = None,
+) -> str:
+    """Run every (grid cell, seed) not yet recorded in ``db_path`` and return the database path."""
+    from .utils import build_controller
+
+    conn = _connect(db_path)
+    seeds = [int(s) for s in seeds]
+    jobs = []
+    for controller in _product(grid.get("controller", {})):
+        build_controller(controller)  # reject unknown controller keys up front
+        for responder in _product(grid.get("responder", {})):
+            cid = cell_id(config_path, controller, responder)
+            conn.execute(
+                "INSERT OR IGNORE INTO cells VALUES (?, ?, ?, ?)",
+                (cid, str(config_path), json.dumps(controller, sort_keys=True), json.dumps(responder, sort_keys=True)),
+            )
+            done = {row[0] for row in conn.execute("SELECT seed FROM done WHERE cell_id = ?", (cid,))}
+            jobs += [
+                SweepJob(str(config_path), cid, tuple(sorted(controller.items())), tuple(sorted(responder.items())), seed, tolerance)
+                for seed in seeds
+                if seed not in done
+            ]
+    conn.commit()
+
+    workers = workers or os.cpu_count() or 1
+    print(f"[Sweep] {len(jobs)} sessions to run on {workers} workers -> {db_path}")
+
+    def record(job: SweepJob, rows: List[Dict[str, Any]]) -> None:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, {', '.join('?' for _ in METRICS)})",
+            [(job.cell_id, job.seed, row["condition"], *(row[m] for m in METRICS)) for row in rows],
+        )
+        conn.execute("INSERT OR IGNORE INTO done VALUES (?, ?)", (job.cell_id, job.seed))
+        conn.commit()
+
+    try:
+        if workers == 1:
+            for job in jobs:
+                record(*_run_sweep_job(job))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for future in as_completed([pool.submit(_run_sweep_job, job) for job in jobs]):
+                    record(*future.result())
+    finally:
+        conn.close()
+    return db_path
+
+
+def query(sql: str, db_path: str = DEFAULT_DB):
+    """Run ``sql`` against the sweep database and return a DataFrame."""
+    import pandas as pd
+
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(sql, conn)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep controller and responder parameters over headless MID sessions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="Run (or resume) a sweep.")
+    run_p.add_argument("--config", default="config/config_sampler_sim.yaml", help="Sim config file.")
+    run_p.add_argument("--grid", required=True, help="YAML/JSON grid of controller/responder parameters.")
+    run_p.add_argument("--seeds", default="0:20", help="Seed range 'start:stop', list '1,2,3' or single seed.")
+    run_p.add_argument("--workers", type=int, default=None, help="Process count (default: all cores).")
+    run_p.add_argument("--tolerance", type=float, default=None, help="Convergence band in seconds (default: 2 * step).")
+    run_p.add_argument("--db", default=DEFAULT_DB, help="SQLite results database.")
+    query_p = sub.add_parser("query", help="Run SQL against the results database.")
+    query_p.add_argument("sql", nargs="?", default="SELECT * FROM cell_summary ORDER BY abs(accuracy_error)")
+    query_p.add_argument("--db", default=DEFAULT_DB, help="SQLite results database.")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        run_sweep(args.config, load_grid(args.grid), parse_seeds(args.seeds), db_path=args.db, workers=args.workers, tolerance=args.tolerance)
+        print(query("SELECT * FROM cell_summary ORDER BY abs(accuracy_error) LIMIT 20", args.db).to_string(index=False))
+    else:
+        print(query(args.sql, args.db).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Opt-in frame-timing and trigger-latency instrumentation (``task.timing_probe: true``).
+
+Per trial, :meth:`TimingProbe.record_trial` reads the onset/close timestamps
+``StimUnit`` already stores for the five MID phases and writes, per phase, the
+onset drift (actual onset − scheduled onset, where the scheduled onset is the
+previous phase's onset plus its planned duration), the displayed-duration error
+and the number of dropped frames into preallocated ``array('d')`` buffers.
+Trigger sends are timed by wrapping the trigger runtime. Nothing is aggregated
+on the hot path; :meth:`TimingProbe.summary` computes percentiles at session end.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PHASES = ("cue", "anticipation", "target", "prefeedback_fixation", "feedback")
+PERCENTILES = (50, 95, 99)
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"n": 0, **{f"p{p}": None for p in PERCENTILES}, "max": None}
+    values = sorted(values)
+    n = len(values)
+    out: Dict[str, Any] = {"n": n}
+    for p in PERCENTILES:
+        out[f"p{p}"] = values[min(n - 1, max(0, math.ceil(p / 100 * n) - 1))]
+    out["max"] = values[-1]
+    return out
+
+
+class TimedTriggerRuntime:
+    """Trigger runtime proxy that records the wall time of every ``send`` into the probe."""
+
+    def __init__(self, runtime, probe: "TimingProbe"):
+        self._runtime = runtime
+        self._probe = probe
+
+    def send(self, code, *args, **kwargs):
+        t0 = time.perf_counter()
+        result = self._runtime.send(code, *args, **kwargs)
+        if code is not None:
+            self._probe.record_trigger(time.perf_counter() - t0)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._runtime, name)
+
+
+class TimingProbe:
+    """Preallocated per-phase timing buffers plus trigger send latencies."""
+
+    def __init__(self, n_trials: int, frame_time: float = 1 / 60, triggers_per_trial: int = 8):
+        self.frame_time = float(frame_time)
+        self.capacity = max(1, int(n_trials)) * len(PHASES)
+        self.phase_idx = array("b", bytes(self.capacity))
+        self.onset_drift = array("d", bytes(8 * self.capacity))
+        self.duration_error = array("d", bytes(8 * self.capacity))
+        self.dropped_frames = array("l", bytes(array("l").itemsize * self.capacity))
+        self.n = 0
+        self.trigger_capacity = max(1, int(n_trials)) * triggers_per_trial + 16
+        self.trigger_latency = array("d", bytes(8 * self.trigger_capacity))
+        self.n_triggers = 0
+        self.overflow = 0
+
+    def wrap_triggers(self, runtime) -> TimedTriggerRuntime:
+        return TimedTriggerRuntime(runtime, self)
+
+    def record_trigger(self, latency_s: float) -> None:
+        if self.n_triggers < self.trigger_capacity:
+            self.trigger_latency[self.n_triggers] = latency_s
+            self.n_triggers += 1
+        else:
+            self.overflow += 1
+
+    @staticmethod
+    def _planned(trial: Dict[str, Any], phase: str) -> Optional[float]:
+        # A response in the target window ends the phase early (terminate_on_response).
+        if phase == "target" and trial.get("target_response") is not None and trial.get("target_rt") is not None:
+            return float(trial["target_rt"])
+        duration = trial.get(f"{phase}_duration")
+        return None if duration is None else float(duration)
+
+    def record_trial(self, trial: Dict[str, Any]) -> None:
+        onsets = [trial.get(f"{phase}_onset_time_global") for phase in PHASES]
+        for i, phase in enumerate(PHASES):
+            onset = onsets[i]
+            planned = self._planned(trial, phase)
+            if onset is None or planned is None:
+                continue
+            if self.n >= self.capacity:
+                self.overflow += 1
+                return
+            prev_onset = onsets[i - 1] if i else None
+            prev_planned = self._planned(trial, PHASES[i - 1]) if i else None
+            drift = onset - (prev_onset + prev_planned) if prev_onset is not None and prev_planned is not None else 0.0
+            end = onsets[i + 1] if i + 1 < len(PHASES) else trial.get(f"{phase}_close_time_global")
+            error = (end - onset - planned) if end is not None else 0.0
+
+            k = self.n
+            self.phase_idx[k] = i
+            self.onset_drift[k] = drift
+            self.duration_error[k] = error
+            self.dropped_frames[k] = max(0, round(error / self.frame_time))
+            self.n = k + 1
+
+    def summary(self) -> Dict[str, Any]:
+        phases: Dict[str, Any] = {}
+        for i, phase in enumerate(PHASES):
+            rows = [k for k in range(self.n) if self.phase_idx[k] == i]
+            phases[phase] = {
+                "onset_drift_ms": _percentiles([self.onset_drift[k] * 1000 for k in rows]),
+                "duration_error_ms": _percentiles([self.duration_error[k] * 1000 for k in rows]),
+                "dropped_frames": sum(self.dropped_frames[k] for k in rows),
+                "phases_with_drops": sum(1 for k in rows if self.dropped_frames[k] > 0),
+            }
+        return {
+            "frame_time_ms": self.frame_time * 1000,
+            "phases": phases,
+            "trigger_latency_ms": _percentiles([self.trigger_latency[k] * 1000 for k in range(self.n_triggers)]),
+            "overflow": self.overflow,
+        }
+
+    def write_summary(self, path: str | Path) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"[TimingProbe] summary saved to {path}")
+        return str(path)
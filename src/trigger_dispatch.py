@@ -0,0 +1,176 @@
+"""
+Asynchronous trigger dispatch (``task.trigger_dispatch: async``).
+
+``StimUnit`` sends onset triggers from ``win.callOnFlip`` callbacks, so with a
+serial driver the port write (plus ``triggers.timing.post_delay_s``) runs on
+the render thread right after the flip. :class:`AsyncTriggerRuntime` wraps the
+configured trigger runtime (hardware or the ``qa``/``sim`` mock): ``send``
+only timestamps the event and appends it to a bounded FIFO, and one dedicated
+worker thread performs the writes in order.
+
+- Ordering: a single worker drains one FIFO, so codes reach the port in the
+  order ``send`` was called.
+- Bounded queue: ``deque.append``/``popleft`` need no lock; a semaphore holding
+  ``queue_size`` permits only blocks ``send`` when the queue is full, so events
+  are delayed rather than dropped or reordered.
+- Timestamps: ``send`` runs in the flip callback, so the ``time.perf_counter()``
+  it takes is the event's flip time. It is kept with the code for every event
+  and written to the summary's ``events`` list as ``[t_flip_s, code]``.
+- Metrics: queue depth at enqueue, enqueue → write-complete latency and port
+  write time per event, in preallocated buffers; :meth:`summary` gives
+  percentiles and ``main.py`` writes ``<res_file stem>_trigger_dispatch.json``.
+
+``close`` drains the queue and always closes the wrapped runtime (releasing the
+port); a write error in the worker is re-raised by the next ``send`` or after
+``close``. With ``task.timing_probe`` the probe wraps the inner runtime, so its
+trigger latency is the port write on the worker thread, not the enqueue.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .timing_probe import _percentiles
+
+DISPATCH_MODES = ("sync", "async")
+
+
+class AsyncTriggerRuntime:
+    """Trigger runtime proxy that hands writes to a worker thread through a bounded FIFO."""
+
+    def __init__(self, runtime, queue_size: int = 256, n_events: int = 4096):
+        if int(queue_size) < 1:
+            raise ValueError(f"[MID] trigger_queue_size must be >= 1, got {queue_size!r}")
+        self._runtime = runtime
+        self.queue_size = int(queue_size)
+        self._queue: deque = deque()
+        self._space = threading.Semaphore(self.queue_size)
+        self._wakeup = threading.Event()
+        self._busy = False
+        self._closed = False
+        self.error: Optional[BaseException] = None
+
+        self.capacity = max(1, int(n_events))
+        self.depth = array("l", bytes(array("l").itemsize * self.capacity))
+        self.code = array("l", bytes(array("l").itemsize * self.capacity))
+        self.t_flip = array("d", bytes(8 * self.capacity))
+        self.latency = array("d", bytes(8 * self.capacity))
+        self.write_time = array("d", bytes(8 * self.capacity))
+        self.n = 0
+        self.overflow = 0
+        self.max_depth = 0
+
+        self._worker = threading.Thread(target=self._run, name="trigger-dispatch", daemon=True)
+        self._worker.start()
+
+    def send(self, code, *args, **kwargs) -> None:
+        if self.error is not None:
+            raise self.error
+        if code is None:
+            return None
+        t = time.perf_counter()
+        self._space.acquire()
+        self._queue.append((t, code, args, kwargs, len(self._queue) + 1))
+        self._wakeup.set()
+        return None
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queue:
+                self._busy = True
+                t_enqueue, code, args, kwargs, depth = self._queue.popleft()
+                try:
+                    t0 = time.perf_counter()
+                    self._runtime.send(code, *args, **kwargs)
+                    t1 = time.perf_counter()
+                except BaseException as exc:  # surfaced on the render thread by send/close
+                    self.error = exc
+                    t0 = t1 = time.perf_counter()
+                finally:
+                    self._space.release()
+                self._record(t_enqueue, code, depth, t1 - t_enqueue, t1 - t0)
+                self._busy = False
+            if self._closed and not self._queue:
+                return
+
+    def _record(self, t_enqueue: float, code, depth: int, latency: float, write_time: float) -> None:
+        self.max_depth = max(self.max_depth, depth)
+        if self.n < self.capacity:
+            k = self.n
+            self.t_flip[k] = t_enqueue
+            self.code[k] = int(code)
+            self.depth[k] = depth
+            self.latency[k] = latency
+            self.write_time[k] = write_time
+            self.n = k + 1
+        else:
+            self.overflow += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued trigger has been written; False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self._queue or self._busy:
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            time.sleep(0.0005)
+        return True
+
+    def close(self):
+        try:
+            self.flush()
+            self._closed = True
+            self._wakeup.set()
+            self._worker.join()
+        finally:
+            result = self._runtime.close()
+        if self.error is not None:
+            raise self.error
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "queue_size": self.queue_size,
+            "n_triggers": self.n + self.overflow,
+            "max_depth": self.max_depth,
+            "queue_depth": _percentiles([float(self.depth[k]) for k in range(self.n)]),
+            "dispatch_latency_ms": _percentiles([self.latency[k] * 1000 for k in range(self.n)]),
+            "write_time_ms": _percentiles([self.write_time[k] * 1000 for k in range(self.n)]),
+            "overflow": self.overflow,
+            "clock": "time.perf_counter",
+            "events": [[self.t_flip[k], self.code[k]] for k in range(self.n)],
+        }
+
+    def write_summary(self, path: str | Path) -> str:
+        summary = self.summary()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(
+            f"[MID] trigger dispatch: {summary['n_triggers']} triggers, max queue depth {summary['max_depth']}, "
+            f"p99 latency {summary['dispatch_latency_ms']['p99'] or 0:.2f} ms -> {path}"
+        )
+        return str(path)
+
+    def __getattr__(self, name):
+        return getattr(self._runtime, name)
+
+
+def wrap_dispatch(runtime, settings, triggers_per_trial: int = 8):
+    """Return ``runtime`` wrapped per ``task.trigger_dispatch`` (``sync`` leaves it unchanged)."""
+    mode = getattr(settings, "trigger_dispatch", "sync") or "sync"
+    if mode not in DISPATCH_MODES:
+        raise ValueError(f"[MID] trigger_dispatch must be one of {DISPATCH_MODES}, got {mode!r}")
+    if mode == "sync":
+        return runtime
+    return AsyncTriggerRuntime(
+        runtime,
+        queue_size=getattr(settings, "trigger_queue_size", 256),
+        n_events=int(settings.total_trials) * triggers_per_trial + 16,
+    )
@@ -1,6 +1,38 @@
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Set
 
-from typing import Dict, List, Optional
-from psychopy import logging
+
+def _log_data(msg: str) -> None:
+    # psychopy.logging is imported on first use so the controller can run
+    # (e.g. in batch sims and sweeps) without paying the PsychoPy import cost.
+    from psychopy import logging
+
+    logging.data(msg)
+
+
+ACCURACY_MODES = ("cumulative", "window", "ewma")
+CONTROLLER_TYPES = ("staircase", "bayesian")
+POOLED_KEY = "*"  # label of the pooled (condition_specific=False) key in saved state
+
+
+class _OutcomeWindow:
+    """
+    Fixed-size ring buffer of hit/miss outcomes with a running hit count,
+    so the windowed accuracy is available in O(1) per trial.
+    """
+
+    def __init__(self, size: int):
+        self.buffer: Deque[bool] = deque(maxlen=size)
+        self.hits = 0
+
+    def push(self, hit: bool) -> None:
+        if len(self.buffer) == self.buffer.maxlen:
+            self.hits -= self.buffer[0]
+        self.buffer.append(hit)
+        self.hits += hit
+
+    def accuracy(self) -> float:
+        return self.hits / len(self.buffer) if self.buffer else 0.0
 
 
 class Controller:
@@ -10,6 +42,18 @@ class Controller:
 
     It supports both general (pooled) or condition-specific tracking,
     and is suitable for use across multiple blocks of trials.
+
+    Accuracy is tracked with running hit/trial counters per key, so each update
+    costs O(1) regardless of session length. ``accuracy_mode`` selects the
+    accuracy the staircase reacts to:
+
+    - ``cumulative``: hits / trials over the whole session (default).
+    - ``window``: hit rate over the last ``window_size`` trials (ring buffer).
+    - ``ewma``: exponentially-weighted hit rate with smoothing ``ewma_alpha``.
+
+    ``state``/``load_state`` export and restore the per-key staircase state;
+    ``pop_dirty`` returns the keys updated since the last call, so checkpoints
+    (``src/checkpoint.py``) only write what changed.
     """
 
     def __init__(
@@ -20,8 +64,18 @@ class Controller:
         step: float = 0.02,
         target_accuracy: float = 0.66,
         condition_specific: bool = True,
-        enable_logging: bool = True
+        enable_logging: bool = True,
+        accuracy_mode: str = "cumulative",
+        window_size: int = 20,
+        ewma_alpha: float = 0.1
     ):
+        if accuracy_mode not in ACCURACY_MODES:
+            raise ValueError(f"[AdaptiveController] accuracy_mode must be one of {ACCURACY_MODES}, got {accuracy_mode!r}")
+        if int(window_size) < 1:
+            raise ValueError(f"[AdaptiveController] window_size must be >= 1, got {window_size}")
+        if not 0.0 < float(ewma_alpha) <= 1.0:
+            raise ValueError(f"[AdaptiveController] ewma_alpha must be in (0, 1], got {ewma_alpha}")
+
         self.initial_duration = initial_duration
         self.min_duration = min_duration
         self.max_duration = max_duration
@@ -29,9 +83,16 @@ class Controller:
         self.target_accuracy = target_accuracy
         self.condition_specific = condition_specific
         self.enable_logging = enable_logging
+        self.accuracy_mode = accuracy_mode
+        self.window_size = int(window_size)
+        self.ewma_alpha = float(ewma_alpha)
 
         self.durations: Dict[Optional[str], float] = {}
-        self.histories: Dict[Optional[str], List[bool]] = {}
+        self.hits: Dict[Optional[str], int] = {}
+        self.trials: Dict[Optional[str], int] = {}
+        self.windows: Dict[Optional[str], _OutcomeWindow] = {}
+        self.ewma: Dict[Optional[str], float] = {}
+        self._dirty: Set[Optional[str]] = set()
 
     @classmethod
     def from_dict(cls, config: dict) -> 'Controller':
@@ -48,7 +109,10 @@ class Controller:
             'step': 0.02,
             'target_accuracy': 0.66,
             'condition_specific': True,
-            'enable_logging': True
+            'enable_logging': True,
+            'accuracy_mode': 'cumulative',
+            'window_size': 20,
+            'ewma_alpha': 0.1
         }
 
         # Check for unsupported keys
@@ -64,15 +128,41 @@ class Controller:
     def _get_key(self, condition: Optional[str]) -> Optional[str]:
         return condition if self.condition_specific else None
 
+    def _init_key(self, key: Optional[str]) -> None:
+        self.durations[key] = self.initial_duration
+        self.hits[key] = 0
+        self.trials[key] = 0
+        if self.accuracy_mode == "window":
+            self.windows[key] = _OutcomeWindow(self.window_size)
+
+    def accuracy(self, condition: Optional[str] = None) -> float:
+        """Return the accuracy the staircase currently tracks for ``condition``."""
+        key = self._get_key(condition)
+        return self._accuracy(key)
+
+    def _accuracy(self, key: Optional[str]) -> float:
+        if self.accuracy_mode == "window":
+            return self.windows[key].accuracy()
+        if self.accuracy_mode == "ewma":
+            return self.ewma.get(key, 0.0)
+        trials = self.trials.get(key, 0)
+        return self.hits[key] / trials if trials else 0.0
+
     def update(self, hit: bool, condition: Optional[str] = None):
         key = self._get_key(condition)
 
         if key not in self.durations:
-            self.durations[key] = self.initial_duration
-            self.histories[key] = []
+            self._init_key(key)
 
-        self.histories[key].append(bool(hit))
-        acc = sum(self.histories[key]) / len(self.histories[key])
+        hit = bool(hit)
+        self.hits[key] += hit
+        self.trials[key] += 1
+        if self.accuracy_mode == "window":
+            self.windows[key].push(hit)
+        elif self.accuracy_mode == "ewma":
+            prev = self.ewma.get(key)
+            self.ewma[key] = float(hit) if prev is None else prev + self.ewma_alpha * (hit - prev)
+        acc = self._accuracy(key)
 
         old_duration = self.durations[key]
         if acc > self.target_accuracy:
@@ -81,23 +171,92 @@ class Controller:
             new_duration = min(self.max_duration, old_duration + self.step)
 
         self.durations[key] = new_duration
+        self._dirty.add(key)
 
         if self.enable_logging:
             label = f"[{condition}]" if condition else ""
-            logging.data(f"[Controller📢]Adaptive{label} — Trials: {len(self.histories[key])}, "
+            _log_data(f"[Controller📢]Adaptive{label} — Trials: {self.trials[key]}, "
                          f"[Controller📢]Accuracy: {acc:.2%}, Duration updated: {old_duration:.3f} → {new_duration:.3f}")
 
     def get_duration(self, condition: Optional[str] = None) -> float:
         key = self._get_key(condition)
         if key not in self.durations:
-            self.durations[key] = self.initial_duration
-            self.histories[key] = []
+            self._init_key(key)
         return self.durations[key]
 
 
+    def pop_dirty(self) -> Set[Optional[str]]:
+        """Return and clear the keys updated since the previous call."""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def state(self, keys: Optional[Iterable[Optional[str]]] = None) -> Dict[str, Dict[str, Any]]:
+        """JSON-safe staircase state per key (all keys, or only ``keys``)."""
+        out = {}
+        for key in (self.durations if keys is None else keys):
+            entry: Dict[str, Any] = {
+                "duration": self.durations[key],
+                "hits": self.hits[key],
+                "trials": self.trials[key],
+            }
+            if key in self.windows:
+                entry["window"] = [int(h) for h in self.windows[key].buffer]
+            if key in self.ewma:
+                entry["ewma"] = self.ewma[key]
+            out[POOLED_KEY if key is None else key] = entry
+        return out
+
+    def load_state(self, state: Dict[str, Dict[str, Any]]) -> 'Controller':
+        """
+        Restore per-key state saved by ``state``. Durations are clamped to the
+        current ``[min_duration, max_duration]``; window/EWMA history missing
+        from the snapshot (e.g. saved under another ``accuracy_mode``) starts empty.
+        Raises ``ValueError`` if ``state`` has keys but none match
+        ``condition_specific`` (pooled snapshot into a per-condition controller
+        or vice versa).
+        """
+        matching = {label: entry for label, entry in state.items() if (label == POOLED_KEY) != self.condition_specific}
+        if state and not matching:
+            raise ValueError(
+                f"[MID] controller state has keys {sorted(state)} but none match "
+                f"condition_specific={self.condition_specific}; nothing to restore"
+            )
+        for label, entry in matching.items():
+            key = None if label == POOLED_KEY else label
+            self._init_key(key)
+            self.durations[key] = min(self.max_duration, max(self.min_duration, float(entry["duration"])))
+            self.hits[key] = int(entry.get("hits", 0))
+            self.trials[key] = int(entry.get("trials", 0))
+            if key in self.windows:
+                for hit in entry.get("window", [])[-self.window_size:]:
+                    self.windows[key].push(bool(hit))
+            if self.accuracy_mode == "ewma" and entry.get("ewma") is not None:
+                self.ewma[key] = float(entry["ewma"])
+            self._dirty.add(key)
+        return self
+
     def describe(self):
         print("Adaptive Controller Status")
-        for key, history in self.histories.items():
+        for key, trials in self.trials.items():
+            if not trials:
+                continue
             label = f"[{key}]" if key else "[All]"
-            acc = sum(history) / len(history)
-            print(f"{label} — Accuracy: {acc:.2%} ({len(history)} trials), Duration: {self.durations[key]:.3f}")
+            acc = self._accuracy(key)
+            print(f"{label} — Accuracy: {acc:.2%} ({trials} trials), Duration: {self.durations[key]:.3f}")
+
+
+def build_controller(config: dict):
+    """
+    Build the controller selected by ``config["type"]``: ``staircase``
+    (default, :class:`Controller`) or ``bayesian`` (``src.bayesian.BayesianController``).
+    The remaining keys go to that class's ``from_dict``.
+    """
+    config = dict(config)
+    kind = config.pop("type", "staircase") or "staircase"
+    if kind not in CONTROLLER_TYPES:
+        raise ValueError(f"[AdaptiveController] type must be one of {CONTROLLER_TYPES}, got {kind!r}")
+    if kind == "bayesian":
+        from .bayesian import BayesianController
+
+        return BayesianController.from_dict(config)
+    return Controller.from_dict(config)
@@ -0,0 +1,132 @@
+"""
+Content-addressed cache for TTS instruction audio.
+
+Audio is keyed by a hash of (text, voice, synthesizer settings), so a launch
+reuses the file from any earlier session as long as the instruction text and
+voice are unchanged, and edits to the text can never play stale audio. Entries
+are evicted least-recently-used beyond ``max_entries``/``max_bytes``.
+
+``EdgeTTSSynthesizer`` is the default (network) backend; ``OfflineSynthesizer``
+writes deterministic silent WAV files so the cache can be exercised offline.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import wave
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class EdgeTTSSynthesizer:
+    """edge-tts backend (same engine ``StimBank.convert_to_voice`` uses)."""
+
+    name = "edge-tts"
+    suffix = ".mp3"
+
+    def __call__(self, text: str, voice: str, out_path: Path, **settings) -> None:
+        import asyncio
+
+        import edge_tts
+
+        async def _generate():
+            await edge_tts.Communicate(text=text, voice=voice, **settings).save(str(out_path))
+
+        asyncio.run(_generate())
+
+
+class OfflineSynthesizer:
+    """Network-free stand-in: writes silent 16 kHz mono WAV, 50 ms per character (max 30 s)."""
+
+    name = "offline"
+    suffix = ".wav"
+
+    def __call__(self, text: str, voice: str, out_path: Path, **settings) -> None:
+        rate = 16000
+        n_frames = int(rate * min(30.0, 0.05 * len(text)))
+        with wave.open(str(out_path), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes(b"\x00\x00" * n_frames)
+
+
+class VoiceCache:
+    """Content-addressed TTS audio store with LRU eviction (by file mtime)."""
+
+    def __init__(
+        self,
+        cache_dir: str | Path = "assets/voice_cache",
+        *,
+        synthesizer: Any = None,
+        max_entries: int = 16,
+        max_bytes: Optional[int] = None,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.synthesizer = synthesizer or EdgeTTSSynthesizer()
+        self.max_entries = int(max_entries)
+        self.max_bytes = max_bytes
+
+    def key(self, text: str, voice: str, settings: Optional[Dict[str, Any]] = None) -> str:
+        payload = {"engine": self.synthesizer.name, "text": text, "voice": voice, "settings": settings or {}}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def path_for(self, text: str, voice: str, settings: Optional[Dict[str, Any]] = None) -> Path:
+        return self.cache_dir / f"{self.key(text, voice, settings)}{self.synthesizer.suffix}"
+
+    def get_or_synthesize(self, text: str, voice: str, settings: Optional[Dict[str, Any]] = None) -> Path:
+        """Return the cached audio path, synthesizing (once) on a miss."""
+        path = self.path_for(text, voice, settings)
+        if path.is_file():
+            os.utime(path)
+            return path
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        self.synthesizer(text, voice, tmp, **(settings or {}))
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def evict(self) -> None:
+        entries = sorted(
+            (p for p in self.cache_dir.glob(f"*{self.synthesizer.suffix}") if p.is_file()),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        total = 0
+        for i, p in enumerate(entries):
+            total += p.stat().st_size
+            if i >= self.max_entries or (self.max_bytes is not None and total > self.max_bytes and i > 0):
+                p.unlink(missing_ok=True)
+
+
+def register_cached_voice(
+    stim_bank,
+    stim_config: Dict[str, Any],
+    key: str,
+    *,
+    voice: str,
+    cache: VoiceCache,
+    settings: Optional[Dict[str, Any]] = None,
+    fallback_dir: str | Path = "assets",
+):
+    """
+    Register ``{key}_voice`` on ``stim_bank`` from the cache, synthesizing only on a miss.
+
+    The text comes from ``stim_config`` so no textbox has to be built. If synthesis
+    fails (e.g. offline) and a legacy ``assets/{key}_voice.mp3`` exists, that file
+    is used instead, as ``StimBank.convert_to_voice`` would.
+    """
+    text = stim_config[key]["text"]
+    try:
+        path = cache.get_or_synthesize(text, voice, settings)
+    except Exception as exc:
+        legacy = Path(fallback_dir) / f"{key}_voice.mp3"
+        if not legacy.is_file():
+            raise
+        print(f"[Warning] TTS synthesis for '{key}' failed ({exc}); using {legacy}")
+        path = legacy
+    stim_bank.add_from_dict({f"{key}_voice": {"type": "sound", "file": str(path)}})
+    return stim_bank